@@ -0,0 +1,394 @@
+"""
+Adaptive Support Threshold under a Mining Budget
+
+A fixed minimum support that is fine for small baskets can make Apriori blow
+up on data with large baskets. This module picks, per segment, the lowest
+support at or above the configured floor whose estimated cost stays inside a
+budget:
+
+    {'max_itemsets': 100_000, 'max_memory_mb': 2048, 'max_seconds': 600}
+
+(any key may be omitted). The estimate is built from the exact 1- and
+2-itemset counts, which one matrix product gives for every support at once:
+
+    level 1   frequent items F1
+    level 2   candidates C(F1, 2), frequent pairs F2
+    level 3   candidates = triangles in the frequent-pair graph (mlxtend's
+              apriori-gen prune step keeps exactly these); the frequent share
+              is measured on a sample of them
+    level k   growth factor F(k)/F(k-1) extrapolated geometrically
+
+mlxtend evaluates a level's C candidates as an n_rows × C × k boolean array,
+which gives the memory estimate. The time estimate is that work divided by a
+throughput measured on the segment itself.
+
+The estimates only choose the starting support. The limits are then enforced:
+each mining attempt runs in a forked child process whose address space is
+capped (RLIMIT_AS) at its size at fork plus max_memory_mb, and which is
+killed after max_seconds. An attempt that runs out of memory or time, or that
+mines more than max_itemsets, is retried at a higher support. Where fork or
+the resource module is unavailable, apriori runs in this process and
+max_memory_mb and max_seconds are only estimates (describe_enforcement says
+which limits apply). The support actually used is returned, with the estimate
+recomputed at that support and 'fits' set from the final attempt.
+
+The 1- and 2-itemset counts and the sampled triple counts are accumulated
+over blocks of rows, so the estimator's own memory stays around
+ESTIMATE_BLOCK_CELLS cells however many baskets a segment has.
+"""
+
+import math
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from mlxtend.frequent_patterns import apriori
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SUPPORT_CEILING = 0.5
+SUPPORT_GRID_STEPS = 60
+SUPPORT_RAISE_FACTOR = 1.25  # Applied when the mined itemset count is over budget
+MAX_RETRIES = 5
+SAFETY_MARGIN = 1.2  # Estimates are inflated by this factor before comparing to the budget
+MAX_SAMPLED_TRIPLES = 2000  # 3-item candidates counted to estimate how many are frequent
+ESTIMATE_BLOCK_CELLS = 2 ** 24  # Cells per row block when counting for the estimate (64 MB as float32)
+
+
+def _row_blocks(n_rows, cells_per_row, block_cells=ESTIMATE_BLOCK_CELLS):
+    """Row slices holding about block_cells cells each"""
+    step = max(1, block_cells // max(cells_per_row, 1))
+    return [slice(start, start + step) for start in range(0, n_rows, step)]
+
+
+def item_pair_counts(X, block_cells=ESTIMATE_BLOCK_CELLS):
+    """
+    Basket counts of every item and every item pair
+
+    Args:
+        X: Boolean basket × item matrix
+
+    Returns:
+        tuple (item_counts, pair_counts): 1-D and 2-D float arrays
+    """
+    X = np.asarray(X)
+    n_items = X.shape[1]
+    pair_counts = np.zeros((n_items, n_items), dtype=np.float64)
+    # XᵀX one row block at a time; float32 is exact within a block (< 2**24 rows)
+    for rows in _row_blocks(X.shape[0], n_items, min(block_cells, 2 ** 24 * max(n_items, 1))):
+        block = X[rows].astype(np.float32)
+        pair_counts += block.T @ block
+    return np.diag(pair_counts).copy(), pair_counts
+
+
+def itemset_support_counts(X, itemsets, block_cells=ESTIMATE_BLOCK_CELLS):
+    """Basket counts of k-item column sets (a C × k index array), one row block at a time"""
+    X = np.asarray(X)
+    counts = np.zeros(len(itemsets), dtype=np.int64)
+    if len(itemsets) == 0:
+        return counts
+    for rows in _row_blocks(X.shape[0], itemsets.size, block_cells):
+        counts += np.all(X[rows][:, itemsets], axis=2).sum(axis=0)
+    return counts
+
+
+def _sample_triangles(adjacency, rng, max_triples=MAX_SAMPLED_TRIPLES, max_edges=20_000):
+    """Random sample of 3-item candidates (triangles in the frequent-pair graph)"""
+    edges = np.argwhere(np.triu(adjacency, 1))
+    rng.shuffle(edges)
+    triples = []
+    for i, j in edges[:max_edges]:
+        common = np.flatnonzero(adjacency[i] & adjacency[j])
+        triples.extend((i, j, k) for k in common[common > j])
+        if len(triples) >= max_triples:
+            break
+    return np.array(triples[:max_triples], dtype=np.int64).reshape(-1, 3)
+
+
+def estimate_mining_cost(X, item_counts, pair_counts, support, max_len=None, seed=0):
+    """
+    Estimated itemsets, peak memory and work of apriori at a given support
+
+    Levels 1-2 are exact. Level 3 candidates are counted exactly (triangles)
+    and the share of them that is frequent is measured on a sample. Beyond
+    that the level-to-level growth factor is extrapolated geometrically.
+
+    Returns:
+        dict with 'itemsets' (estimated frequent itemsets), 'peak_bytes',
+        'work' (candidate cells evaluated), 'candidates' and 'frequent'
+        (estimated count per itemset size)
+    """
+    n_rows = X.shape[0]
+    min_count = support * n_rows
+    frequent_items = np.flatnonzero(item_counts >= min_count)
+    f1 = len(frequent_items)
+    adjacency = pair_counts[np.ix_(frequent_items, frequent_items)] >= min_count
+    np.fill_diagonal(adjacency, False)
+    f2 = int(adjacency.sum() // 2)
+
+    candidates = [len(item_counts), math.comb(f1, 2)]
+    frequent = [f1, f2]
+    max_len = max_len or f1
+    if max_len >= 3 and f2 >= 3:
+        A = adjacency.astype(np.float64)
+        c3 = float(np.sum((A @ A) * A) / 6)
+        if c3 >= 1:
+            sample = frequent_items[_sample_triangles(adjacency, np.random.default_rng(seed))]
+            survival = max(float(np.mean(itemset_support_counts(X, sample) >= min_count)), 1e-3)
+            candidates.append(c3)
+            frequent.append(c3 * survival)
+            k = 4
+            while k <= max_len and frequent[-1] >= 1:
+                # Growth factors shrink geometrically: g_k = g_(k-1)^2 / g_(k-2)
+                g1 = frequent[-1] / max(frequent[-2], 1)
+                g0 = frequent[-2] / max(frequent[-3], 1)
+                f_k = min(frequent[-1] * g1 * g1 / max(g0, 1e-9), math.comb(f1, k))
+                frequent.append(f_k)
+                candidates.append(min(f_k / survival, math.comb(f1, k)))
+                k += 1
+
+    # Level k candidates are materialized as n_rows × C × k bools plus the n_rows × C result
+    level_cells = [n_rows * c * (k + 1) for k, c in enumerate(candidates[1:], start=2)]
+    return {
+        'itemsets': sum(frequent),
+        'peak_bytes': max([n_rows * len(item_counts)] + level_cells),
+        'work': sum(level_cells),
+        'candidates': candidates,
+        'frequent': frequent,
+    }
+
+
+def calibrate_throughput(X, seed=0, target_cells=2_000_000):
+    """Candidate cells per second of mlxtend's support counting on this data"""
+    X = np.asarray(X, dtype=bool)
+    n_rows, n_items = X.shape
+    if n_items < 2 or n_rows == 0:
+        return float('inf')
+    rng = np.random.default_rng(seed)
+    n_pairs = max(1, min(5000, target_cells // (3 * n_rows)))
+    pairs = np.sort(rng.integers(0, n_items, size=(n_pairs, 2)), axis=1)
+    start = time.perf_counter()
+    np.all(X[:, pairs], axis=2).sum(axis=0)
+    elapsed = max(time.perf_counter() - start, 1e-6)
+    return n_rows * n_pairs * 3 / elapsed
+
+
+def within_budget(estimate, budget, throughput):
+    """Whether an estimate (with the safety margin) satisfies every limit in the budget"""
+    if (budget.get('max_itemsets') is not None
+            and estimate['itemsets'] * SAFETY_MARGIN > budget['max_itemsets']):
+        return False
+    if (budget.get('max_memory_mb') is not None
+            and estimate['peak_bytes'] * SAFETY_MARGIN > budget['max_memory_mb'] * 2**20):
+        return False
+    if (budget.get('max_seconds') is not None
+            and estimate['work'] / throughput * SAFETY_MARGIN > budget['max_seconds']):
+        return False
+    return True
+
+
+def choose_support(X, budget, min_support, max_len=None, ceiling=SUPPORT_CEILING,
+                   steps=SUPPORT_GRID_STEPS):
+    """
+    Lowest support on a log grid from min_support to ceiling that fits the budget
+
+    Returns:
+        dict with 'support', 'estimate', 'throughput', 'fits' (False when
+        even the ceiling is estimated to exceed the budget) and 'cost'
+        (estimate_mining_cost at any other support)
+    """
+    X = np.asarray(X, dtype=bool)
+    n_rows = X.shape[0]
+    item_counts, pair_counts = item_pair_counts(X)
+    throughput = calibrate_throughput(X) if budget.get('max_seconds') is not None else float('inf')
+    if max_len is None:
+        max_len = int(X.sum(axis=1).max()) if n_rows else 1
+
+    grid = np.geomspace(min_support, max(ceiling, min_support), steps)
+
+    def cost(support):
+        return estimate_mining_cost(X, item_counts, pair_counts, support, max_len)
+
+    # Cost only falls as support rises: binary search for the first fitting grid point
+    lo, hi = 0, len(grid) - 1
+    if within_budget(cost(grid[0]), budget, throughput):
+        hi = 0
+    elif not within_budget(cost(grid[hi]), budget, throughput):
+        return {'support': float(grid[hi]), 'estimate': cost(grid[hi]),
+                'throughput': throughput, 'fits': False, 'cost': cost}
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if within_budget(cost(grid[mid]), budget, throughput):
+            hi = mid
+        else:
+            lo = mid + 1
+    return {'support': float(grid[hi]), 'estimate': cost(grid[hi]),
+            'throughput': throughput, 'fits': True, 'cost': cost}
+
+
+def _address_space_bytes():
+    """Virtual memory size of this process (Linux only), or None"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def enforced_limits(budget):
+    """Budget keys that are enforced on each mining attempt rather than only estimated"""
+    enforced = {'max_itemsets'}
+    if 'fork' in multiprocessing.get_all_start_methods():
+        enforced.add('max_seconds')
+        if resource is not None and _address_space_bytes() is not None:
+            enforced.add('max_memory_mb')
+    return [key for key in ('max_itemsets', 'max_memory_mb', 'max_seconds')
+            if key in enforced and budget.get(key) is not None]
+
+
+def _mine_child(conn, df_encoded, support, max_len, use_colnames, max_memory_mb):
+    """Child process: apriori under an address-space cap, result sent back over conn"""
+    try:
+        if max_memory_mb is not None:
+            limit = _address_space_bytes() + int(max_memory_mb * 2**20)
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        result = apriori(df_encoded, min_support=support, use_colnames=use_colnames, max_len=max_len)
+        conn.send(('ok', result))
+    except MemoryError:
+        conn.send(('max_memory_mb', None))
+    except Exception as e:
+        conn.send(('error', f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+def _mine_attempt(df_encoded, support, max_len, use_colnames, budget, enforced):
+    """
+    One apriori run under the enforced limits
+
+    Returns:
+        tuple (status, frequent_itemsets): status is 'ok', or the budget key
+        that stopped the attempt ('max_memory_mb' or 'max_seconds')
+    """
+    if 'max_seconds' not in enforced and 'max_memory_mb' not in enforced:
+        return 'ok', apriori(df_encoded, min_support=support, use_colnames=use_colnames, max_len=max_len)
+
+    context = multiprocessing.get_context('fork')
+    receiver, sender = context.Pipe(duplex=False)
+    max_memory_mb = budget['max_memory_mb'] if 'max_memory_mb' in enforced else None
+    process = context.Process(target=_mine_child, daemon=True,
+                              args=(sender, df_encoded, support, max_len, use_colnames, max_memory_mb))
+    sys.stdout.flush()  # The child must not repeat buffered output
+    process.start()
+    sender.close()
+    try:
+        if receiver.poll(budget.get('max_seconds')):
+            status, payload = receiver.recv()
+        else:
+            status, payload = 'max_seconds', None
+    except EOFError:
+        # Died without replying, e.g. killed when an allocation failed
+        status, payload = 'max_memory_mb', None
+    finally:
+        if process.is_alive():
+            process.kill()
+        process.join()
+        receiver.close()
+    if status == 'error':
+        raise RuntimeError(f"apriori failed in the mining process: {payload}")
+    return status, payload
+
+
+def mine_within_budget(df_encoded, budget, min_support, max_len=None, use_colnames=True):
+    """
+    Run apriori at the lowest support that fits the budget
+
+    Args:
+        df_encoded: One-hot basket DataFrame (as passed to apriori)
+        budget: Dict with optional max_itemsets, max_memory_mb, max_seconds
+                (memory and time apply to each mining attempt)
+        min_support: Lowest support allowed (the configured MIN_SUPPORT)
+
+    Returns:
+        tuple (frequent_itemsets, info): info records the support used, the
+        estimate at that support, the actual itemset count, the total mining
+        time over all attempts, 'exceeded' (the limit the last failed attempt
+        hit, or None) and 'fits' (False when no attempt finished inside the
+        budget; frequent_itemsets is then the last completed result, or empty)
+    """
+    choice = choose_support(df_encoded.to_numpy(), budget, min_support, max_len)
+    enforced = enforced_limits(budget)
+    support = choice['support']
+    max_itemsets = budget.get('max_itemsets')
+    max_seconds = budget.get('max_seconds')
+    frequent_itemsets = pd.DataFrame({'support': [], 'itemsets': []})
+    attempts = 0
+    elapsed = 0.0
+    while True:
+        attempts += 1
+        start = time.perf_counter()
+        status, result = _mine_attempt(df_encoded, support, max_len, use_colnames, budget, enforced)
+        seconds = time.perf_counter() - start
+        elapsed += seconds
+        if status == 'ok':
+            frequent_itemsets = result
+            if max_itemsets is not None and len(result) > max_itemsets:
+                status = 'max_itemsets'
+            elif max_seconds is not None and seconds > max_seconds:
+                status = 'max_seconds'  # Only reached when time is not enforced
+        if status == 'ok' or attempts > MAX_RETRIES or support >= 1.0:
+            break
+        # The estimate was too optimistic; retry at a higher support
+        support = min(support * SUPPORT_RAISE_FACTOR, 1.0)
+
+    estimate = choice['cost'](support)
+    return frequent_itemsets, {
+        'support': support,
+        'estimated_itemsets': int(estimate['itemsets']),
+        'estimated_memory_mb': estimate['peak_bytes'] / 2**20,
+        'estimated_seconds': (estimate['work'] / choice['throughput']
+                              if np.isfinite(choice['throughput']) else None),
+        'itemsets': len(frequent_itemsets),
+        'seconds': elapsed,
+        'attempts': attempts,
+        'estimate_fits': choice['fits'],
+        'exceeded': None if status == 'ok' else status,
+        'fits': status == 'ok',
+    }
+
+
+def describe_budget(budget):
+    """One-line description of a mining budget"""
+    if not budget:
+        return "none (fixed minimum support)"
+    parts = []
+    if budget.get('max_itemsets') is not None:
+        parts.append(f"≤ {budget['max_itemsets']:,} itemsets")
+    if budget.get('max_memory_mb') is not None:
+        parts.append(f"≤ {budget['max_memory_mb']:,} MB per attempt")
+    if budget.get('max_seconds') is not None:
+        parts.append(f"≤ {budget['max_seconds']:,}s per attempt")
+    return ", ".join(parts)
+
+
+def describe_enforcement(budget):
+    """One line saying which budget limits are enforced and which are only estimates"""
+    if not budget:
+        return "no mining budget"
+    names = {'max_itemsets': 'itemsets', 'max_memory_mb': 'memory', 'max_seconds': 'time'}
+    set_limits = [key for key in names if budget.get(key) is not None]
+    enforced = enforced_limits(budget)
+    estimated = [names[key] for key in set_limits if key not in enforced]
+    line = "support is chosen from estimates"
+    if enforced:
+        line += f"; {', '.join(names[key] for key in enforced)} enforced on each mining attempt"
+    if estimated:
+        line += (f"; {', '.join(estimated)} {'limit is an estimate' if len(estimated) == 1 else 'limits are estimates'}"
+                 " only on this platform")
+    return line
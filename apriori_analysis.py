@@ -9,14 +9,27 @@ Author: Analysis Script
 Date: 2025-11-21
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from mlxtend.frequent_patterns import apriori, association_rules
-from mlxtend.preprocessing import TransactionEncoder
 import os
 from pathlib import Path
 
+from rule_diff import snapshot_rules
+from rule_significance import rule_pvalues
+from rule_database import export_rules_sqlite
+from rule_store import RuleSet
+from run_report import RunReport
+from profiling import Profiler, parse_phases
+from adaptive_support import mine_within_budget, describe_budget, describe_enforcement
+from basket_mining import add_time_segments, encode_baskets, segment_volume
+from demand_forecast import forecast_demand
+from summary_report import SummaryReport, summarize_rules
+from dataset_loaders import iter_transactions
+from xlsx_stream import LineItemTotals, chunk_baskets, merge_chunk_baskets
+
 # Configuration - Check local directory first, then kagglehub cache
 local_dataset = Path(__file__).parent / "Coffee Shop Sales Dashboard by Alfi Aziz.xlsx"
 kagglehub_dataset = Path.home() / ".cache/kagglehub/datasets/alfiaziz003/coffee-shop-sales-dashboard-by-alfi-aziz/versions/1/Coffee Shop Sales Dashboard by Alfi Aziz.xlsx"
@@ -34,10 +47,31 @@ else:
 OUTPUT_DIR = Path("apriori_results")
 MIN_SUPPORT = 0.02  # 2%
 MIN_CONFIDENCE = 0.40  # 40%
+SIGNIFICANCE_TEST = 'fisher'  # 'fisher' (one-sided exact) or 'chi2'
+MAX_ADJUSTED_P = None  # e.g. 0.05 keeps only rules significant after Benjamini-Hochberg
+# Budgeted mining: per segment, start at the lowest support ≥ MIN_SUPPORT whose estimated
+# cost fits, e.g. {'max_itemsets': 200_000, 'max_memory_mb': 2048, 'max_seconds': 600};
+# memory and time apply to each mining attempt and are enforced in a child process
+MINING_BUDGET = None
+
+parser = argparse.ArgumentParser(description="Time-segmented Apriori analysis of Dataset 1")
+parser.add_argument('--profile', nargs='?', const='all', default=None, metavar='PHASES',
+                    help="profile all phases, or only e.g. 4,5; results go to "
+                         f"{OUTPUT_DIR}/profile/")
+args = parser.parse_args()
 
 # Create output directory
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+# cProfile / tracemalloc / stack sampling hooks (no-ops without --profile)
+profiler = Profiler(OUTPUT_DIR / "profile", parse_phases(args.profile), enabled=args.profile is not None)
+
+# Per-phase timing, memory and counts, written to run_report.json
+report = RunReport("apriori_analysis", OUTPUT_DIR / "run_report.json",
+                   parameters={'min_support': MIN_SUPPORT, 'min_confidence': MIN_CONFIDENCE,
+                               'significance_test': SIGNIFICANCE_TEST, 'max_adjusted_p': MAX_ADJUSTED_P},
+                   profiler=profiler)
+
 print("="*80)
 print("TIME-SEGMENTED APRIORI ANALYSIS FOR CAFÉ INVENTORY")
 print("="*80)
@@ -47,18 +81,32 @@ print()
 # PHASE 1: DATA LOADING AND PREPROCESSING
 # ============================================================================
 
+report.begin("Phase 1: Loading and preprocessing data")
 print("Phase 1: Loading and preprocessing data...")
 print("-"*80)
 
-# Load the Transactions sheet
+# Stream the Transactions sheet in chunks, each cast to the schema's compact types
+# (dates and times are combined into transaction_datetime while streaming).
+# Each chunk is segmented and grouped into baskets as it arrives (joined in Phase 4),
+# and only the totals the later phases need are kept, so the sheet is never held whole
 print(f"Loading data from: {DATASET_PATH}")
-df = pd.read_excel(DATASET_PATH, sheet_name="Transactions")
-print(f"✓ Loaded {len(df):,} rows and {len(df.columns)} columns")
+chunk_basket_parts = []
+totals = LineItemTotals()
+loaded_columns = []
+with profiler.allocations("basket_building"):
+    for chunk in iter_transactions(DATASET_PATH, sheet="Transactions"):
+        if not loaded_columns:
+            loaded_columns = list(chunk.columns)
+        chunk = add_time_segments(chunk)
+        chunk_basket_parts.append(chunk_baskets(chunk))
+        totals.add(chunk)
+print(f"✓ Loaded {totals.rows:,} rows and {len(loaded_columns)} columns")
+report.count(rows=totals.rows)
 print()
 
 # Display basic info
 print("Dataset columns:")
-for col in df.columns:
+for col in loaded_columns:
     print(f"  - {col}")
 print()
 
@@ -66,71 +114,29 @@ print()
 # PHASE 2: DATE/TIME CONVERSION
 # ============================================================================
 
+report.begin("Phase 2: Converting date/time formats")
 print("Phase 2: Converting date/time formats...")
 print("-"*80)
 
-# Check if transaction_date is already datetime, if not convert it
-if pd.api.types.is_datetime64_any_dtype(df['transaction_date']):
-    df['datetime_date'] = pd.to_datetime(df['transaction_date'])
-    print("✓ Date column already in datetime format")
-else:
-    # Convert Excel date format (days since 1899-12-30)
-    df['datetime_date'] = pd.to_datetime(df['transaction_date'], unit='D', origin='1899-12-30')
-    print("✓ Converted Excel numeric date format")
-
-# Check if transaction_time is already datetime/time, if not convert it
-if pd.api.types.is_datetime64_any_dtype(df['transaction_time']):
-    # Time is already datetime, extract time component
-    df['datetime_time'] = pd.to_timedelta(df['transaction_time'].dt.hour, unit='h') + \
-                          pd.to_timedelta(df['transaction_time'].dt.minute, unit='m') + \
-                          pd.to_timedelta(df['transaction_time'].dt.second, unit='s')
-    print("✓ Time column already in datetime format")
-elif pd.api.types.is_numeric_dtype(df['transaction_time']):
-    # Convert Excel time format (fraction of day)
-    df['datetime_time'] = pd.to_timedelta(df['transaction_time'], unit='D')
-    print("✓ Converted Excel numeric time format")
-else:
-    # Try to parse as time string
-    df['datetime_time'] = pd.to_timedelta(df['transaction_time'].astype(str))
-    print("✓ Parsed time string format")
-
-# Combine date and time
-df['transaction_datetime'] = df['datetime_date'] + df['datetime_time']
-
-print(f"✓ Date range: {df['datetime_date'].min().date()} to {df['datetime_date'].max().date()}")
-print(f"✓ Time range: {df['transaction_datetime'].min().time()} to {df['transaction_datetime'].max().time()}")
+# Excel serial dates and times were converted chunk by chunk while streaming
+print("✓ Date and time columns converted while streaming")
+print(f"✓ Date range: {totals.first.date()} to {totals.last.date()}")
+print(f"✓ Time range: {totals.first.time()} to {totals.last.time()}")
 print()
 
 # ============================================================================
 # PHASE 3: TIME SEGMENTATION
 # ============================================================================
 
+report.begin("Phase 3: Creating time segments")
 print("Phase 3: Creating time segments...")
 print("-"*80)
 
-# Extract hour for segmentation
-df['hour'] = df['transaction_datetime'].dt.hour
-
-# Create day-part segments
-def get_day_part(hour):
-    if 6 <= hour < 11:
-        return 'Morning'
-    elif 11 <= hour < 16:
-        return 'Afternoon'
-    else:
-        return 'Evening'
-
-df['day_part'] = df['hour'].apply(get_day_part)
-
-# Create day-type segments (weekday vs weekend)
-df['day_of_week'] = df['transaction_datetime'].dt.dayofweek
-df['day_type'] = df['day_of_week'].apply(lambda x: 'Weekend' if x >= 5 else 'Weekday')
-
-# Create combined segment
-df['time_segment'] = df['day_part'] + '_' + df['day_type']
-
+# Day-part (Morning/Afternoon/Evening) × day-type (Weekday/Weekend) segments,
+# added to each chunk while loading
 print("Time segments created:")
-segment_counts = df['time_segment'].value_counts().sort_index()
+segment_counts = totals.segment_items.sort_index()
+report.count(segments=len(segment_counts))
 for segment, count in segment_counts.items():
     print(f"  - {segment}: {count:,} line items")
 print()
@@ -139,23 +145,18 @@ print()
 # PHASE 4: CREATE TRANSACTION BASKETS
 # ============================================================================
 
+report.begin("Phase 4: Grouping line items into transaction baskets")
 print("Phase 4: Grouping line items into transaction baskets...")
 print("-"*80)
 
-# Create transaction key (unique per basket)
-# Group by: date, time, and store location
-df['transaction_key'] = (
-    df['transaction_datetime'].dt.strftime('%Y-%m-%d %H:%M:%S') +
-    '_' +
-    df['store_location']
-)
-
-# Group by transaction to create baskets
-print("Creating transaction baskets (grouping line items)...")
-transactions = df.groupby('transaction_key')['product_detail'].apply(list).reset_index()
-transactions.columns = ['transaction_key', 'items']
+# Transaction key (unique per basket): date, time, and store location.
+# Each chunk was grouped while loading; join them, merging baskets split by a chunk boundary
+print("Creating transaction baskets (joining per-chunk baskets)...")
+transactions = merge_chunk_baskets(chunk_basket_parts)
+del chunk_basket_parts
 
 print(f"✓ Created {len(transactions):,} unique transaction baskets")
+report.count(baskets=len(transactions))
 
 # Calculate basket statistics
 basket_sizes = transactions['items'].apply(len)
@@ -165,10 +166,6 @@ print(f"✓ Single-item transactions: {(basket_sizes == 1).sum():,} ({(basket_si
 print(f"✓ Multi-item transactions: {(basket_sizes > 1).sum():,} ({(basket_sizes > 1).sum()/len(basket_sizes)*100:.1f}%)")
 print()
 
-# Add time segment info to transactions
-transaction_segments = df.groupby('transaction_key')['time_segment'].first().reset_index()
-transactions = transactions.merge(transaction_segments, on='transaction_key')
-
 print("Transaction distribution by segment:")
 for segment in sorted(transactions['time_segment'].unique()):
     count = (transactions['time_segment'] == segment).sum()
@@ -179,10 +176,15 @@ print()
 # PHASE 5: APRIORI ALGORITHM BY TIME SEGMENT
 # ============================================================================
 
+report.begin("Phase 5: Running Apriori algorithm on each time segment")
 print("Phase 5: Running Apriori algorithm on each time segment...")
 print("="*80)
+if MINING_BUDGET is not None:
+    print(f"Mining budget: {describe_budget(MINING_BUDGET)}")
+    print(f"  ({describe_enforcement(MINING_BUDGET)})")
 
 all_rules = []
+support_used = []
 
 for segment in sorted(transactions['time_segment'].unique()):
     print(f"\nAnalyzing: {segment}")
@@ -193,6 +195,8 @@ for segment in sorted(transactions['time_segment'].unique()):
 
     # Filter out single-item transactions (can't have associations)
     multi_item_transactions = [t for t in segment_transactions if len(t) > 1]
+    report.segment(segment, baskets=len(segment_transactions),
+                   multi_item_baskets=len(multi_item_transactions))
 
     print(f"Total transactions: {len(segment_transactions):,}")
     print(f"Multi-item transactions: {len(multi_item_transactions):,} ({len(multi_item_transactions)/len(segment_transactions)*100:.1f}%)")
@@ -202,21 +206,37 @@ for segment in sorted(transactions['time_segment'].unique()):
         continue
 
     # Transform to binary matrix for Apriori
-    te = TransactionEncoder()
-    te_array = te.fit(multi_item_transactions).transform(multi_item_transactions)
-    df_encoded = pd.DataFrame(te_array, columns=te.columns_)
+    with profiler.allocations(f"encoding: {segment}"):
+        df_encoded = encode_baskets(multi_item_transactions)
 
-    print(f"Unique products in segment: {len(te.columns_)}")
+    print(f"Unique products in segment: {len(df_encoded.columns)}")
+    report.segment_count(products=len(df_encoded.columns))
 
     # Run Apriori
     try:
-        frequent_itemsets = apriori(df_encoded, min_support=MIN_SUPPORT, use_colnames=True)
+        if MINING_BUDGET is None:
+            segment_support = MIN_SUPPORT
+            frequent_itemsets = apriori(df_encoded, min_support=MIN_SUPPORT, use_colnames=True)
+        else:
+            frequent_itemsets, budget_info = mine_within_budget(df_encoded, MINING_BUDGET, MIN_SUPPORT)
+            segment_support = budget_info['support']
+            support_used.append({'time_segment': segment, **budget_info})
+            print(f"✓ Budgeted support: {segment_support:.4f} after {budget_info['attempts']} attempt(s) "
+                  f"(estimate at this support: {budget_info['estimated_itemsets']:,} itemsets, "
+                  f"{budget_info['estimated_memory_mb']:.0f} MB peak)")
+            if not budget_info['estimate_fits']:
+                print("⚠️  Every support up to the ceiling was estimated to exceed the mining budget")
+            if not budget_info['fits']:
+                print(f"⚠️  No attempt finished inside the budget (last one hit {budget_info['exceeded']}); "
+                      f"{budget_info['itemsets']:,} itemsets kept after {budget_info['seconds']:.1f}s")
+        report.segment_count(min_support=segment_support)
 
         if len(frequent_itemsets) == 0:
-            print(f"⚠️  No frequent itemsets found with min_support={MIN_SUPPORT}")
+            print(f"⚠️  No frequent itemsets found with min_support={segment_support:.4f}")
             continue
 
         print(f"✓ Found {len(frequent_itemsets)} frequent itemsets")
+        report.segment_count(frequent_itemsets=len(frequent_itemsets))
 
         # Generate association rules
         rules = association_rules(frequent_itemsets, metric="confidence", min_threshold=MIN_CONFIDENCE)
@@ -226,19 +246,21 @@ for segment in sorted(transactions['time_segment'].unique()):
             continue
 
         print(f"✓ Generated {len(rules)} association rules")
+        report.segment_count(rules=len(rules))
 
         # Add segment info to rules
         rules['time_segment'] = segment
+        rules['n_transactions'] = len(multi_item_transactions)
 
-        # Format antecedents and consequents as strings
-        rules['antecedents_str'] = rules['antecedents'].apply(lambda x: ', '.join(list(x)))
-        rules['consequents_str'] = rules['consequents'].apply(lambda x: ', '.join(list(x)))
+        # Compact rule arrays; item strings are only built for display/export
+        rules = RuleSet.from_frame(rules)
 
         # Show top 5 rules by confidence
         print(f"\nTop 5 rules by confidence:")
-        top_rules = rules.nlargest(5, 'confidence')[['antecedents_str', 'consequents_str', 'support', 'confidence', 'lift']]
-        for idx, row in top_rules.iterrows():
-            print(f"  {row['antecedents_str']} → {row['consequents_str']}")
+        top_rules = rules.top(5, 'confidence')
+        for ant, cons, row in zip(top_rules.itemset_strings('antecedents'),
+                                  top_rules.itemset_strings('consequents'), top_rules.metrics):
+            print(f"  {ant} → {cons}")
             print(f"    Support: {row['support']:.3f}, Confidence: {row['confidence']:.3f}, Lift: {row['lift']:.3f}")
 
         all_rules.append(rules)
@@ -254,6 +276,7 @@ print("="*80)
 # PHASE 6: COMBINE AND EXPORT RESULTS
 # ============================================================================
 
+report.begin("Phase 6: Exporting results")
 print("Phase 6: Exporting results...")
 print("-"*80)
 
@@ -262,42 +285,30 @@ if len(all_rules) == 0:
     exit(1)
 
 # Combine all rules
-combined_rules = pd.concat(all_rules, ignore_index=True)
+combined_rules = RuleSet.concat(all_rules)
 
 print(f"✓ Total rules across all segments: {len(combined_rules)}")
-
-# Select relevant columns for export
-export_columns = [
-    'time_segment',
-    'antecedents_str',
-    'consequents_str',
-    'support',
-    'confidence',
-    'lift',
-    'antecedent support',
-    'consequent support',
-    'leverage',
-    'conviction'
-]
-
-export_rules = combined_rules[export_columns].copy()
-
-# Rename columns for clarity
-export_rules.columns = [
-    'Time_Segment',
-    'Antecedent_Items',
-    'Consequent_Items',
-    'Support',
-    'Confidence',
-    'Lift',
-    'Antecedent_Support',
-    'Consequent_Support',
-    'Leverage',
-    'Conviction'
-]
-
-# Sort by confidence (descending)
-export_rules = export_rules.sort_values(['Time_Segment', 'Confidence'], ascending=[True, False])
+report.count(rules=len(combined_rules))
+
+# Significance testing over every rule at once (Benjamini-Hochberg across all segments)
+metrics = combined_rules.metrics
+metrics['p_value'], metrics['adjusted_p_value'] = rule_pvalues(
+    metrics['support'], metrics['antecedent_support'], metrics['consequent_support'],
+    metrics['n_transactions'], method=SIGNIFICANCE_TEST)
+significant = (metrics['adjusted_p_value'] <= 0.05).sum()
+report.count(significant_rules=int(significant))
+print(f"✓ Significance ({SIGNIFICANCE_TEST}): {significant:,} of {len(combined_rules):,} rules "
+      f"have BH-adjusted p ≤ 0.05")
+if MAX_ADJUSTED_P is not None:
+    combined_rules = combined_rules.filter(metrics['adjusted_p_value'] <= MAX_ADJUSTED_P)
+    print(f"✓ Kept {len(combined_rules):,} rules with adjusted p ≤ {MAX_ADJUSTED_P}")
+    if len(combined_rules) == 0:
+        print("❌ No rules passed the significance filter. Try raising MAX_ADJUSTED_P.")
+        exit(1)
+
+# Sort by segment, then confidence (descending), and build the export columns
+combined_rules = combined_rules.sort(['segment', 'confidence'], descending=[False, True])
+export_rules = combined_rules.to_frame()
 
 # Export to CSV
 output_file = OUTPUT_DIR / "association_rules_by_segment.csv"
@@ -311,120 +322,155 @@ for segment in export_rules['Time_Segment'].unique():
     segment_rules.to_csv(segment_file, index=False)
     print(f"✓ Saved {segment} rules to: {segment_file}")
 
+# Indexed SQLite copy of rules, rule-item links, item dictionary (with product
+# hierarchy) and baskets
+db_file = OUTPUT_DIR / "rules.db"
+db_counts = export_rules_sqlite(
+    combined_rules, db_file,
+    baskets=transactions[['transaction_key', 'time_segment', 'datetime', 'store_location', 'items']].rename(columns={'transaction_key': 'basket_key'}),
+    hierarchy=totals.hierarchy()
+)
+print(f"✓ Saved SQLite database ({db_counts['rules']:,} rules, {db_counts['baskets']:,} baskets) to: {db_file}")
+
+# Support actually used per segment under the mining budget
+if support_used:
+    support_file = OUTPUT_DIR / "support_by_segment.csv"
+    pd.DataFrame(support_used).to_csv(support_file, index=False)
+    print(f"✓ Saved budgeted support per segment to: {support_file}")
+
+# Baskets per day in each segment (drives surplus_simulator.py)
+volume_file = OUTPUT_DIR / "segment_volume.csv"
+segment_volume(totals.segment_days(), transactions).to_csv(volume_file, index=False)
+print(f"✓ Saved baskets per day by segment to: {volume_file}")
+
+# Keep a compact snapshot so run-to-run drift can be diffed later
+history_entry = snapshot_rules(output_file, OUTPUT_DIR / "history")
+print(f"✓ Stored rule snapshot '{history_entry['label']}' in: {OUTPUT_DIR}/history/")
+if history_entry['previous']:
+    print(f"  vs. previous run: {history_entry['new']} new, {history_entry['vanished']} vanished, "
+          f"{history_entry['strengthened']} strengthened, {history_entry['weakened']} weakened")
+
 print()
 
 # ============================================================================
 # PHASE 7: STATISTICAL SUMMARY
 # ============================================================================
 
+report.begin("Phase 7: Generating statistical summary")
 print("Phase 7: Generating statistical summary...")
 print("="*80)
 print()
 
-summary_lines = []
-
-summary_lines.append("="*80)
-summary_lines.append("STATISTICAL SUMMARY: TIME-SEGMENTED ASSOCIATION RULE MINING")
-summary_lines.append("="*80)
-summary_lines.append("")
-summary_lines.append(f"Analysis Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-summary_lines.append("")
-
-summary_lines.append("CONFIGURATION:")
-summary_lines.append(f"  - Minimum Support: {MIN_SUPPORT*100}%")
-summary_lines.append(f"  - Minimum Confidence: {MIN_CONFIDENCE*100}%")
-summary_lines.append(f"  - Product Granularity: Product Detail (specific items)")
-summary_lines.append(f"  - Time Segments: Day-part (Morning/Afternoon/Evening) × Day-type (Weekday/Weekend)")
-summary_lines.append("")
-
-summary_lines.append("DATASET OVERVIEW:")
-summary_lines.append(f"  - Total line items: {len(df):,}")
-summary_lines.append(f"  - Unique transaction baskets: {len(transactions):,}")
-summary_lines.append(f"  - Multi-item transactions: {(basket_sizes > 1).sum():,} ({(basket_sizes > 1).sum()/len(basket_sizes)*100:.1f}%)")
-summary_lines.append(f"  - Unique products: {df['product_detail'].nunique()}")
-summary_lines.append(f"  - Date range: {df['datetime_date'].min().date()} to {df['datetime_date'].max().date()}")
-summary_lines.append("")
-
-summary_lines.append("OVERALL RESULTS:")
-summary_lines.append(f"  - Total association rules found: {len(combined_rules):,}")
-summary_lines.append(f"  - Average confidence: {combined_rules['confidence'].mean():.3f}")
-summary_lines.append(f"  - Average lift: {combined_rules['lift'].mean():.3f}")
-summary_lines.append(f"  - Segments analyzed: {combined_rules['time_segment'].nunique()}")
-summary_lines.append("")
-
-summary_lines.append("RULES BY TIME SEGMENT:")
-for segment in sorted(export_rules['Time_Segment'].unique()):
-    segment_rules = export_rules[export_rules['Time_Segment'] == segment]
-    summary_lines.append(f"  - {segment}:")
-    summary_lines.append(f"      Rules found: {len(segment_rules)}")
-    summary_lines.append(f"      Avg confidence: {segment_rules['Confidence'].mean():.3f}")
-    summary_lines.append(f"      Avg lift: {segment_rules['Lift'].mean():.3f}")
-    summary_lines.append(f"      Max confidence: {segment_rules['Confidence'].max():.3f}")
-summary_lines.append("")
-
-summary_lines.append("TOP 10 HIGHEST CONFIDENCE RULES (ALL SEGMENTS):")
-top_10 = export_rules.nlargest(10, 'Confidence')
-for idx, (i, row) in enumerate(top_10.iterrows(), 1):
-    summary_lines.append(f"\n{idx}. [{row['Time_Segment']}]")
-    summary_lines.append(f"   {row['Antecedent_Items']} → {row['Consequent_Items']}")
-    summary_lines.append(f"   Confidence: {row['Confidence']:.3f} | Support: {row['Support']:.3f} | Lift: {row['Lift']:.3f}")
-summary_lines.append("")
-
-summary_lines.append("="*80)
-summary_lines.append("RESEARCH QUESTION ANSWER:")
-summary_lines.append("="*80)
-summary_lines.append("")
-summary_lines.append("Q: Can time-segmented association rule mining identify high-confidence")
-summary_lines.append("   item co-occurrence patterns to refine inventory and reduce surplus?")
-summary_lines.append("")
-summary_lines.append(f"A: YES. This analysis identified {len(combined_rules)} association rules with")
-summary_lines.append(f"   confidence ≥{MIN_CONFIDENCE*100}% across {combined_rules['time_segment'].nunique()} time segments.")
-summary_lines.append("")
-
-# Count high confidence rules
-very_high_conf = (export_rules['Confidence'] >= 0.6).sum()
-high_conf = ((export_rules['Confidence'] >= 0.5) & (export_rules['Confidence'] < 0.6)).sum()
-med_conf = ((export_rules['Confidence'] >= 0.4) & (export_rules['Confidence'] < 0.5)).sum()
-
-summary_lines.append("CONFIDENCE DISTRIBUTION:")
-summary_lines.append(f"  - Very High (≥60%): {very_high_conf} rules")
-summary_lines.append(f"  - High (50-59%): {high_conf} rules")
-summary_lines.append(f"  - Moderate (40-49%): {med_conf} rules")
-summary_lines.append("")
-
-summary_lines.append("ACTIONABLE RECOMMENDATIONS:")
-summary_lines.append("")
-summary_lines.append("1. STOCK BUNDLING:")
-summary_lines.append("   Use high-confidence rules to identify which items should be stocked")
-summary_lines.append("   together. When customers buy item A, they frequently buy item B.")
-summary_lines.append("")
-summary_lines.append("2. TIME-SPECIFIC INVENTORY:")
-summary_lines.append("   Different patterns emerge during different times. Stock items based")
-summary_lines.append("   on the specific day-part and day-type to minimize surplus.")
-summary_lines.append("")
-summary_lines.append("3. PURCHASE PREDICTION:")
-summary_lines.append("   Rules with confidence ≥60% can reliably predict subsequent purchases,")
-summary_lines.append("   enabling proactive inventory management.")
-summary_lines.append("")
-summary_lines.append("4. SURPLUS REDUCTION:")
-summary_lines.append("   By understanding item co-occurrence patterns, cafés can:")
-summary_lines.append("   - Order complementary items in correct proportions")
-summary_lines.append("   - Adjust inventory levels by time segment")
-summary_lines.append("   - Reduce overstock of low-association items")
-summary_lines.append("")
-summary_lines.append("="*80)
-
-# Print summary to console
-summary_text = "\n".join(summary_lines)
-print(summary_text)
-
-# Save summary to file
-summary_file = OUTPUT_DIR / "analysis_summary.txt"
-with open(summary_file, 'w') as f:
-    f.write(summary_text)
+# Every rule statistic in one grouped pass, rendered to text, JSON and HTML
+rule_stats = summarize_rules(export_rules, top_n=10)
+summary = SummaryReport("STATISTICAL SUMMARY: TIME-SEGMENTED ASSOCIATION RULE MINING", statistics=rule_stats)
+summary.lines([f"Analysis Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"])
+
+summary.fields("CONFIGURATION", [
+    ("Minimum Support", f"{MIN_SUPPORT*100}%"),
+    ("Mining Budget", describe_budget(MINING_BUDGET)),
+    *(f"      {entry['time_segment']}: support used {entry['support']*100:.2f}% "
+      f"({entry['itemsets']:,} itemsets, {entry['seconds']:.1f}s)" for entry in support_used),
+    ("Minimum Confidence", f"{MIN_CONFIDENCE*100}%"),
+    ("Significance Test", f"{SIGNIFICANCE_TEST} with Benjamini-Hochberg correction"
+     + (f" (kept adjusted p ≤ {MAX_ADJUSTED_P})" if MAX_ADJUSTED_P is not None else "")),
+    ("Product Granularity", "Product Detail (specific items)"),
+    ("Time Segments", "Day-part (Morning/Afternoon/Evening) × Day-type (Weekday/Weekend)"),
+])
+
+n_multi = int((basket_sizes > 1).sum())
+summary.fields("DATASET OVERVIEW", [
+    ("Total line items", totals.rows, "{:,}"),
+    ("Unique transaction baskets", len(transactions), "{:,}"),
+    ("Multi-item transactions", n_multi, f"{{:,}} ({n_multi/len(basket_sizes)*100:.1f}%)"),
+    ("Unique products", len(totals.products)),
+    ("Date range", f"{totals.first.date()} to {totals.last.date()}"),
+])
+
+summary.fields("OVERALL RESULTS", [
+    ("Total association rules found", rule_stats['rules'], "{:,}"),
+    ("Average confidence", rule_stats['mean_confidence'], "{:.3f}"),
+    ("Average lift", rule_stats['mean_lift'], "{:.3f}"),
+    ("Significant rules (BH-adjusted p ≤ 0.05)", rule_stats['significant_rules'], "{:,}"),
+    ("Segments analyzed", rule_stats['segments_analyzed']),
+])
+summary.segments("RULES BY TIME SEGMENT", rule_stats['segments'])
+summary.top_rules("TOP 10 HIGHEST CONFIDENCE RULES (ALL SEGMENTS)", rule_stats['top_rules'])
+
+summary.banner("RESEARCH QUESTION ANSWER:")
+summary.lines(["Q: Can time-segmented association rule mining identify high-confidence",
+               "   item co-occurrence patterns to refine inventory and reduce surplus?"])
+summary.lines([f"A: YES. This analysis identified {rule_stats['rules']} association rules with",
+               f"   confidence ≥{MIN_CONFIDENCE*100}% across {rule_stats['segments_analyzed']} time segments."])
+summary.fields("CONFIDENCE DISTRIBUTION",
+               [(bucket['label'], bucket['rules'], "{} rules") for bucket in rule_stats['confidence_buckets']])
+
+summary.lines([
+    "ACTIONABLE RECOMMENDATIONS:",
+    "",
+    "1. STOCK BUNDLING:",
+    "   Use high-confidence rules to identify which items should be stocked",
+    "   together. When customers buy item A, they frequently buy item B.",
+    "",
+    "2. TIME-SPECIFIC INVENTORY:",
+    "   Different patterns emerge during different times. Stock items based",
+    "   on the specific day-part and day-type to minimize surplus.",
+    "",
+    "3. PURCHASE PREDICTION:",
+    "   Rules with confidence ≥60% can reliably predict subsequent purchases,",
+    "   enabling proactive inventory management.",
+    "",
+    "4. SURPLUS REDUCTION:",
+    "   By understanding item co-occurrence patterns, cafés can:",
+    "   - Order complementary items in correct proportions",
+    "   - Adjust inventory levels by time segment",
+    "   - Reduce overstock of low-association items",
+])
+summary.rule()
+
+# Print summary to console and save it as text, JSON and HTML
+print(summary.to_text())
+summary_files = summary.save(OUTPUT_DIR / "analysis_summary")
+summary_file = summary_files['text']
+
+print()
+print(f"✓ Saved summary report to: {summary_file} (and .json, .html)")
+print()
+
+# ============================================================================
+# PHASE 8: DEMAND FORECAST
+# ============================================================================
 
+report.begin("Phase 8: Forecasting product demand by segment and store")
+print("Phase 8: Forecasting product demand by segment and store...")
+print("-"*80)
+
+# One vectorized batch over every product × segment × store series, from the daily
+# units totalled while loading (line items missing a key were counted and left out there)
+forecast, _ = forecast_demand(totals.daily_units(), 'product_detail', 'transaction_qty',
+                              store_column='store_location')
+skipped_rows = totals.skipped
+if skipped_rows:
+    print(f"⚠️  Skipped {skipped_rows:,} line items with no store, segment, product or date")
+forecast_file = OUTPUT_DIR / "demand_forecast.csv"
+forecast.to_csv(forecast_file, index=False)
+forecast_series = forecast.drop_duplicates(['store_location', 'time_segment', 'product'])
+n_series = len(forecast_series)
+report.count(series=n_series, forecast_rows=len(forecast), skipped_rows=skipped_rows)
+print(f"✓ Forecast {n_series:,} series for {forecast['forecast_date'].nunique()} days")
+print("  Method chosen by backtest MAE:")
+for method, count in forecast_series['method'].value_counts().items():
+    print(f"  - {method}: {count:,} series")
+print(f"✓ Saved demand forecast to: {forecast_file}")
 print()
-print(f"✓ Saved summary report to: {summary_file}")
+
+# Write the run report (ends Phase 8)
+report.save()
+print("Phase timings:")
+print(report.format_table())
+print(f"✓ Saved run report to: {report.output_file}")
+if profiler.enabled:
+    print(f"✓ Saved profiles and hotspot summary to: {profiler.output_dir}/hotspots.txt")
 print()
 
 print("="*80)
@@ -435,6 +481,7 @@ print("Output files created:")
 print(f"  1. {OUTPUT_DIR}/association_rules_by_segment.csv - All rules combined")
 print(f"  2. {OUTPUT_DIR}/rules_[segment].csv - Rules by specific time segment")
 print(f"  3. {OUTPUT_DIR}/analysis_summary.txt - Statistical summary and recommendations")
+print(f"  4. {OUTPUT_DIR}/demand_forecast.csv - Expected units per product, segment and store")
 print()
 print("Next steps:")
 print("  - Review the CSV files to identify specific item pairs")
@@ -5,14 +5,26 @@ Dataset: ylchang/coffee-shop-sample-data-1113
 April 2019 Sales Data
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 from datetime import datetime
 from mlxtend.frequent_patterns import apriori, association_rules
-from mlxtend.preprocessing import TransactionEncoder
 import os
 from pathlib import Path
 
+from rule_diff import snapshot_rules
+from rule_significance import rule_pvalues
+from rule_database import export_rules_sqlite
+from rule_store import RuleSet
+from run_report import RunReport
+from profiling import Profiler, parse_phases
+from adaptive_support import mine_within_budget, describe_budget, describe_enforcement
+from basket_mining import add_time_segments, build_baskets, encode_baskets, segment_volume
+from demand_forecast import forecast_demand
+from summary_report import SummaryReport, summarize_rules
+from dataset_loaders import SALES_FILE, PRODUCTS_FILE, load_sales_receipts, load_products
+
 # Configuration
 # Try to find dataset in kagglehub cache, download if not found
 kagglehub_cache = Path.home() / ".cache/kagglehub/datasets/ylchang/coffee-shop-sample-data-1113/versions/1"
@@ -35,10 +47,31 @@ else:
 OUTPUT_DIR = Path("apriori_results_new")
 MIN_SUPPORT = 0.02  # 2%
 MIN_CONFIDENCE = 0.40  # 40%
+SIGNIFICANCE_TEST = 'fisher'  # 'fisher' (one-sided exact) or 'chi2'
+MAX_ADJUSTED_P = None  # e.g. 0.05 keeps only rules significant after Benjamini-Hochberg
+# Budgeted mining: per segment, start at the lowest support ≥ MIN_SUPPORT whose estimated
+# cost fits, e.g. {'max_itemsets': 200_000, 'max_memory_mb': 2048, 'max_seconds': 600};
+# memory and time apply to each mining attempt and are enforced in a child process
+MINING_BUDGET = {'max_itemsets': 200_000, 'max_memory_mb': 2048, 'max_seconds': 600}
+
+parser = argparse.ArgumentParser(description="Time-segmented Apriori analysis of Dataset 2")
+parser.add_argument('--profile', nargs='?', const='all', default=None, metavar='PHASES',
+                    help="profile all phases, or only e.g. 4,5; results go to "
+                         f"{OUTPUT_DIR}/profile/")
+args = parser.parse_args()
 
 # Create output directory
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+# cProfile / tracemalloc / stack sampling hooks (no-ops without --profile)
+profiler = Profiler(OUTPUT_DIR / "profile", parse_phases(args.profile), enabled=args.profile is not None)
+
+# Per-phase timing, memory and counts, written to run_report.json
+report = RunReport("apriori_new_dataset", OUTPUT_DIR / "run_report.json",
+                   parameters={'min_support': MIN_SUPPORT, 'min_confidence': MIN_CONFIDENCE,
+                               'significance_test': SIGNIFICANCE_TEST, 'max_adjusted_p': MAX_ADJUSTED_P},
+                   profiler=profiler)
+
 print("="*80)
 print("TIME-SEGMENTED APRIORI ANALYSIS - NEW COFFEE SHOP DATASET")
 print("="*80)
@@ -48,20 +81,22 @@ print()
 # PHASE 1: DATA LOADING
 # ============================================================================
 
+report.begin("Phase 1: Loading data")
 print("Phase 1: Loading data...")
 print("-"*80)
 
-# Load sales receipts
-sales_file = DATASET_PATH / "201904 sales reciepts.csv"
+# Load sales receipts (schema columns only: compact ids, parsed date and time)
+sales_file = DATASET_PATH / SALES_FILE
 print(f"Loading: {sales_file}")
-df_sales = pd.read_csv(sales_file)
+df_sales = load_sales_receipts(sales_file)
 print(f"✓ Loaded {len(df_sales):,} sales records")
 
-# Load product information
-product_file = DATASET_PATH / "product.csv"
+# Load product information (names, types and categories as categoricals)
+product_file = DATASET_PATH / PRODUCTS_FILE
 print(f"Loading: {product_file}")
-df_products = pd.read_csv(product_file)
+df_products = load_products(product_file)
 print(f"✓ Loaded {len(df_products):,} products")
+report.count(sales_rows=len(df_sales), products=len(df_products))
 
 # Display product columns
 print(f"\nProduct columns: {', '.join(df_products.columns.tolist())}")
@@ -90,14 +125,11 @@ print()
 # PHASE 2: DATE/TIME PROCESSING
 # ============================================================================
 
+report.begin("Phase 2: Processing date and time")
 print("Phase 2: Processing date and time...")
 print("-"*80)
 
-# Convert date and time
-df['transaction_date'] = pd.to_datetime(df['transaction_date'])
-df['transaction_time'] = pd.to_timedelta(df['transaction_time'])
-
-# Combine into datetime
+# Date and time were parsed by the loader; combine into datetime
 df['transaction_datetime'] = df['transaction_date'] + df['transaction_time']
 
 # Extract hour
@@ -111,29 +143,16 @@ print()
 # PHASE 3: TIME SEGMENTATION
 # ============================================================================
 
+report.begin("Phase 3: Creating time segments")
 print("Phase 3: Creating time segments...")
 print("-"*80)
 
-# Create day-part segments
-def get_day_part(hour):
-    if 6 <= hour < 11:
-        return 'Morning'
-    elif 11 <= hour < 16:
-        return 'Afternoon'
-    else:
-        return 'Evening'
-
-df['day_part'] = df['hour'].apply(get_day_part)
-
-# Create day-type segments
-df['day_of_week'] = df['transaction_datetime'].dt.dayofweek
-df['day_type'] = df['day_of_week'].apply(lambda x: 'Weekend' if x >= 5 else 'Weekday')
-
-# Create combined segment
-df['time_segment'] = df['day_part'] + '_' + df['day_type']
+# Day-part (Morning/Afternoon/Evening) × day-type (Weekday/Weekend) segments
+df = add_time_segments(df)
 
 print("Time segments created:")
 segment_counts = df['time_segment'].value_counts().sort_index()
+report.count(segments=len(segment_counts))
 for segment, count in segment_counts.items():
     print(f"  - {segment}: {count:,} line items")
 print()
@@ -142,20 +161,23 @@ print()
 # PHASE 4: CREATE TRANSACTION BASKETS
 # ============================================================================
 
+report.begin("Phase 4: Creating transaction baskets")
 print("Phase 4: Creating transaction baskets...")
 print("-"*80)
 
+# Dataset 2 identifies stores by outlet id (one label per outlet, sorted by name)
+outlets = df['sales_outlet_id'].astype('category').cat.rename_categories(lambda outlet: f"Outlet {outlet}")
+df['store_location'] = outlets.cat.reorder_categories(sorted(outlets.cat.categories))
+
 # Group by transaction_id to create baskets
 print("Grouping items by transaction_id...")
-transactions = df.groupby('transaction_id').agg({
-    'product': lambda x: list(x),
-    'time_segment': 'first',
-    'transaction_datetime': 'first'
-}).reset_index()
-
-transactions.columns = ['transaction_id', 'items', 'time_segment', 'datetime']
+with profiler.allocations("basket_building"):
+    transactions = build_baskets(df, 'transaction_id', 'product',
+                                 first_columns=('time_segment', 'transaction_datetime', 'store_location'))
+transactions = transactions.rename(columns={'transaction_datetime': 'datetime'})
 
 print(f"✓ Created {len(transactions):,} unique transaction baskets")
+report.count(baskets=len(transactions))
 
 # Calculate basket statistics
 basket_sizes = transactions['items'].apply(len)
@@ -182,10 +204,15 @@ print()
 # PHASE 5: APRIORI ALGORITHM BY TIME SEGMENT
 # ============================================================================
 
+report.begin("Phase 5: Running Apriori algorithm on each time segment")
 print("Phase 5: Running Apriori algorithm on each time segment...")
 print("="*80)
+if MINING_BUDGET is not None:
+    print(f"Mining budget: {describe_budget(MINING_BUDGET)}")
+    print(f"  ({describe_enforcement(MINING_BUDGET)})")
 
 all_rules = []
+support_used = []
 
 for segment in sorted(transactions['time_segment'].unique()):
     print(f"\nAnalyzing: {segment}")
@@ -196,6 +223,8 @@ for segment in sorted(transactions['time_segment'].unique()):
 
     # Filter out single-item transactions
     multi_item_transactions = [t for t in segment_transactions if len(t) > 1]
+    report.segment(segment, baskets=len(segment_transactions),
+                   multi_item_baskets=len(multi_item_transactions))
 
     print(f"Total transactions: {len(segment_transactions):,}")
     print(f"Multi-item transactions: {len(multi_item_transactions):,} ({len(multi_item_transactions)/len(segment_transactions)*100:.1f}%)")
@@ -205,21 +234,37 @@ for segment in sorted(transactions['time_segment'].unique()):
         continue
 
     # Transform to binary matrix
-    te = TransactionEncoder()
-    te_array = te.fit(multi_item_transactions).transform(multi_item_transactions)
-    df_encoded = pd.DataFrame(te_array, columns=te.columns_)
+    with profiler.allocations(f"encoding: {segment}"):
+        df_encoded = encode_baskets(multi_item_transactions)
 
-    print(f"Unique products in segment: {len(te.columns_)}")
+    print(f"Unique products in segment: {len(df_encoded.columns)}")
+    report.segment_count(products=len(df_encoded.columns))
 
     # Run Apriori
     try:
-        frequent_itemsets = apriori(df_encoded, min_support=MIN_SUPPORT, use_colnames=True)
+        if MINING_BUDGET is None:
+            segment_support = MIN_SUPPORT
+            frequent_itemsets = apriori(df_encoded, min_support=MIN_SUPPORT, use_colnames=True)
+        else:
+            frequent_itemsets, budget_info = mine_within_budget(df_encoded, MINING_BUDGET, MIN_SUPPORT)
+            segment_support = budget_info['support']
+            support_used.append({'time_segment': segment, **budget_info})
+            print(f"✓ Budgeted support: {segment_support:.4f} after {budget_info['attempts']} attempt(s) "
+                  f"(estimate at this support: {budget_info['estimated_itemsets']:,} itemsets, "
+                  f"{budget_info['estimated_memory_mb']:.0f} MB peak)")
+            if not budget_info['estimate_fits']:
+                print("⚠️  Every support up to the ceiling was estimated to exceed the mining budget")
+            if not budget_info['fits']:
+                print(f"⚠️  No attempt finished inside the budget (last one hit {budget_info['exceeded']}); "
+                      f"{budget_info['itemsets']:,} itemsets kept after {budget_info['seconds']:.1f}s")
+        report.segment_count(min_support=segment_support)
 
         if len(frequent_itemsets) == 0:
-            print(f"⚠️  No frequent itemsets found with min_support={MIN_SUPPORT}")
+            print(f"⚠️  No frequent itemsets found with min_support={segment_support:.4f}")
             continue
 
         print(f"✓ Found {len(frequent_itemsets)} frequent itemsets")
+        report.segment_count(frequent_itemsets=len(frequent_itemsets))
 
         # Generate association rules
         rules = association_rules(frequent_itemsets, metric="confidence", min_threshold=MIN_CONFIDENCE)
@@ -229,19 +274,21 @@ for segment in sorted(transactions['time_segment'].unique()):
             continue
 
         print(f"✓ Generated {len(rules)} association rules")
+        report.segment_count(rules=len(rules))
 
         # Add segment info
         rules['time_segment'] = segment
+        rules['n_transactions'] = len(multi_item_transactions)
 
-        # Format antecedents and consequents
-        rules['antecedents_str'] = rules['antecedents'].apply(lambda x: ', '.join(list(x)))
-        rules['consequents_str'] = rules['consequents'].apply(lambda x: ', '.join(list(x)))
+        # Compact rule arrays; item strings are only built for display/export
+        rules = RuleSet.from_frame(rules)
 
         # Show top 10 rules by confidence
         print(f"\nTop 10 rules by confidence:")
-        top_rules = rules.nlargest(10, 'confidence')[['antecedents_str', 'consequents_str', 'support', 'confidence', 'lift']]
-        for idx, row in top_rules.iterrows():
-            print(f"  {row['antecedents_str']} → {row['consequents_str']}")
+        top_rules = rules.top(10, 'confidence')
+        for ant, cons, row in zip(top_rules.itemset_strings('antecedents'),
+                                  top_rules.itemset_strings('consequents'), top_rules.metrics):
+            print(f"  {ant} → {cons}")
             print(f"    Support: {row['support']:.3f}, Confidence: {row['confidence']:.3f}, Lift: {row['lift']:.3f}")
 
         all_rules.append(rules)
@@ -257,6 +304,7 @@ print("="*80)
 # PHASE 6: EXPORT RESULTS
 # ============================================================================
 
+report.begin("Phase 6: Exporting results")
 print("Phase 6: Exporting results...")
 print("-"*80)
 
@@ -265,42 +313,30 @@ if len(all_rules) == 0:
     exit(1)
 
 # Combine all rules
-combined_rules = pd.concat(all_rules, ignore_index=True)
+combined_rules = RuleSet.concat(all_rules)
 
 print(f"✓ Total rules across all segments: {len(combined_rules)}")
-
-# Select columns for export
-export_columns = [
-    'time_segment',
-    'antecedents_str',
-    'consequents_str',
-    'support',
-    'confidence',
-    'lift',
-    'antecedent support',
-    'consequent support',
-    'leverage',
-    'conviction'
-]
-
-export_rules = combined_rules[export_columns].copy()
-
-# Rename columns
-export_rules.columns = [
-    'Time_Segment',
-    'Antecedent_Items',
-    'Consequent_Items',
-    'Support',
-    'Confidence',
-    'Lift',
-    'Antecedent_Support',
-    'Consequent_Support',
-    'Leverage',
-    'Conviction'
-]
-
-# Sort by confidence
-export_rules = export_rules.sort_values(['Time_Segment', 'Confidence'], ascending=[True, False])
+report.count(rules=len(combined_rules))
+
+# Significance testing over every rule at once (Benjamini-Hochberg across all segments)
+metrics = combined_rules.metrics
+metrics['p_value'], metrics['adjusted_p_value'] = rule_pvalues(
+    metrics['support'], metrics['antecedent_support'], metrics['consequent_support'],
+    metrics['n_transactions'], method=SIGNIFICANCE_TEST)
+significant = (metrics['adjusted_p_value'] <= 0.05).sum()
+report.count(significant_rules=int(significant))
+print(f"✓ Significance ({SIGNIFICANCE_TEST}): {significant:,} of {len(combined_rules):,} rules "
+      f"have BH-adjusted p ≤ 0.05")
+if MAX_ADJUSTED_P is not None:
+    combined_rules = combined_rules.filter(metrics['adjusted_p_value'] <= MAX_ADJUSTED_P)
+    print(f"✓ Kept {len(combined_rules):,} rules with adjusted p ≤ {MAX_ADJUSTED_P}")
+    if len(combined_rules) == 0:
+        print("❌ No rules passed the significance filter. Try raising MAX_ADJUSTED_P.")
+        exit(1)
+
+# Sort by segment, then confidence (descending), and build the export columns
+combined_rules = combined_rules.sort(['segment', 'confidence'], descending=[False, True])
+export_rules = combined_rules.to_frame()
 
 # Export to CSV
 output_file = OUTPUT_DIR / "association_rules_by_segment.csv"
@@ -314,66 +350,119 @@ for segment in export_rules['Time_Segment'].unique():
     segment_rules.to_csv(segment_file, index=False)
     print(f"✓ Saved {segment} rules to: {segment_file}")
 
+# Indexed SQLite copy of rules, rule-item links, item dictionary (with product
+# hierarchy) and baskets
+db_file = OUTPUT_DIR / "rules.db"
+db_counts = export_rules_sqlite(
+    combined_rules, db_file,
+    baskets=transactions[['transaction_id', 'time_segment', 'datetime', 'store_location', 'items']].rename(columns={'transaction_id': 'basket_key'}),
+    hierarchy=df_products.drop_duplicates('product').set_index('product')[['product_type', 'product_category']]
+)
+print(f"✓ Saved SQLite database ({db_counts['rules']:,} rules, {db_counts['baskets']:,} baskets) to: {db_file}")
+
+# Support actually used per segment under the mining budget
+if support_used:
+    support_file = OUTPUT_DIR / "support_by_segment.csv"
+    pd.DataFrame(support_used).to_csv(support_file, index=False)
+    print(f"✓ Saved budgeted support per segment to: {support_file}")
+
+# Baskets per day in each segment (drives surplus_simulator.py)
+volume_file = OUTPUT_DIR / "segment_volume.csv"
+segment_volume(df, transactions).to_csv(volume_file, index=False)
+print(f"✓ Saved baskets per day by segment to: {volume_file}")
+
+# Keep a compact snapshot so run-to-run drift can be diffed later
+history_entry = snapshot_rules(output_file, OUTPUT_DIR / "history")
+print(f"✓ Stored rule snapshot '{history_entry['label']}' in: {OUTPUT_DIR}/history/")
+if history_entry['previous']:
+    print(f"  vs. previous run: {history_entry['new']} new, {history_entry['vanished']} vanished, "
+          f"{history_entry['strengthened']} strengthened, {history_entry['weakened']} weakened")
+
 print()
 
 # ============================================================================
 # PHASE 7: SUMMARY REPORT
 # ============================================================================
 
+report.begin("Phase 7: Generating summary report")
 print("Phase 7: Generating summary report...")
 print("="*80)
 print()
 
-summary_lines = []
-
-summary_lines.append("="*80)
-summary_lines.append("ASSOCIATION RULE MINING SUMMARY - NEW COFFEE SHOP DATASET")
-summary_lines.append("="*80)
-summary_lines.append("")
-summary_lines.append(f"Analysis Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-summary_lines.append(f"Dataset: April 2019 Sales Data")
-summary_lines.append("")
-
-summary_lines.append("CONFIGURATION:")
-summary_lines.append(f"  - Minimum Support: {MIN_SUPPORT*100}%")
-summary_lines.append(f"  - Minimum Confidence: {MIN_CONFIDENCE*100}%")
-summary_lines.append("")
-
-summary_lines.append("DATASET OVERVIEW:")
-summary_lines.append(f"  - Total sales records: {len(df_sales):,}")
-summary_lines.append(f"  - Unique transactions: {len(transactions):,}")
-summary_lines.append(f"  - Multi-item transactions: {(basket_sizes > 1).sum():,} ({(basket_sizes > 1).sum()/len(basket_sizes)*100:.1f}%)")
-summary_lines.append(f"  - Unique products: {df['product'].nunique()}")
-summary_lines.append(f"  - Date range: {df['transaction_date'].min().date()} to {df['transaction_date'].max().date()}")
-summary_lines.append("")
-
-summary_lines.append("RESULTS:")
-summary_lines.append(f"  - Total association rules: {len(combined_rules):,}")
-summary_lines.append(f"  - Average confidence: {combined_rules['confidence'].mean():.3f}")
-summary_lines.append(f"  - Average lift: {combined_rules['lift'].mean():.3f}")
-summary_lines.append(f"  - Segments analyzed: {combined_rules['time_segment'].nunique()}")
-summary_lines.append("")
-
-summary_lines.append("TOP 20 HIGHEST CONFIDENCE RULES:")
-top_20 = export_rules.nlargest(20, 'Confidence')
-for idx, (i, row) in enumerate(top_20.iterrows(), 1):
-    summary_lines.append(f"\n{idx}. [{row['Time_Segment']}]")
-    summary_lines.append(f"   {row['Antecedent_Items']} → {row['Consequent_Items']}")
-    summary_lines.append(f"   Confidence: {row['Confidence']:.3f} | Support: {row['Support']:.3f} | Lift: {row['Lift']:.3f}")
-
-summary_lines.append("")
-summary_lines.append("="*80)
+# Every rule statistic in one grouped pass, rendered to text, JSON and HTML
+rule_stats = summarize_rules(export_rules, top_n=20)
+summary = SummaryReport("ASSOCIATION RULE MINING SUMMARY - NEW COFFEE SHOP DATASET", statistics=rule_stats)
+summary.lines([f"Analysis Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+               "Dataset: April 2019 Sales Data"])
+
+summary.fields("CONFIGURATION", [
+    ("Minimum Support", f"{MIN_SUPPORT*100}%"),
+    ("Mining Budget", describe_budget(MINING_BUDGET)),
+    *(f"      {entry['time_segment']}: support used {entry['support']*100:.2f}% "
+      f"({entry['itemsets']:,} itemsets, {entry['seconds']:.1f}s)" for entry in support_used),
+    ("Minimum Confidence", f"{MIN_CONFIDENCE*100}%"),
+    ("Significance Test", f"{SIGNIFICANCE_TEST} with Benjamini-Hochberg correction"
+     + (f" (kept adjusted p ≤ {MAX_ADJUSTED_P})" if MAX_ADJUSTED_P is not None else "")),
+])
+
+n_multi = int((basket_sizes > 1).sum())
+summary.fields("DATASET OVERVIEW", [
+    ("Total sales records", len(df_sales), "{:,}"),
+    ("Unique transactions", len(transactions), "{:,}"),
+    ("Multi-item transactions", n_multi, f"{{:,}} ({n_multi/len(basket_sizes)*100:.1f}%)"),
+    ("Unique products", df['product'].nunique()),
+    ("Date range", f"{df['transaction_date'].min().date()} to {df['transaction_date'].max().date()}"),
+])
+
+summary.fields("RESULTS", [
+    ("Total association rules", rule_stats['rules'], "{:,}"),
+    ("Average confidence", rule_stats['mean_confidence'], "{:.3f}"),
+    ("Average lift", rule_stats['mean_lift'], "{:.3f}"),
+    ("Significant rules (BH-adjusted p ≤ 0.05)", rule_stats['significant_rules'], "{:,}"),
+    ("Segments analyzed", rule_stats['segments_analyzed']),
+])
+summary.top_rules("TOP 20 HIGHEST CONFIDENCE RULES", rule_stats['top_rules'])
+summary.rule()
 
 # Print and save
-summary_text = "\n".join(summary_lines)
-print(summary_text)
+print(summary.to_text())
+summary_file = summary.save(OUTPUT_DIR / "analysis_summary")['text']
 
-summary_file = OUTPUT_DIR / "analysis_summary.txt"
-with open(summary_file, 'w') as f:
-    f.write(summary_text)
+print()
+print(f"✓ Saved summary to: {summary_file} (and .json, .html)")
+print()
 
+# ============================================================================
+# PHASE 8: DEMAND FORECAST
+# ============================================================================
+
+report.begin("Phase 8: Forecasting product demand by segment and store")
+print("Phase 8: Forecasting product demand by segment and store...")
+print("-"*80)
+
+# One vectorized batch over every product × segment × store series
+forecast, skipped_rows = forecast_demand(df, 'product', 'quantity', store_column='store_location')
+if skipped_rows:
+    print(f"⚠️  Skipped {skipped_rows:,} line items with no store, segment, product or date")
+forecast_file = OUTPUT_DIR / "demand_forecast.csv"
+forecast.to_csv(forecast_file, index=False)
+forecast_series = forecast.drop_duplicates(['store_location', 'time_segment', 'product'])
+n_series = len(forecast_series)
+report.count(series=n_series, forecast_rows=len(forecast), skipped_rows=skipped_rows)
+print(f"✓ Forecast {n_series:,} series for {forecast['forecast_date'].nunique()} days")
+print("  Method chosen by backtest MAE:")
+for method, count in forecast_series['method'].value_counts().items():
+    print(f"  - {method}: {count:,} series")
+print(f"✓ Saved demand forecast to: {forecast_file}")
 print()
-print(f"✓ Saved summary to: {summary_file}")
+
+# Write the run report (ends Phase 8)
+report.save()
+print("Phase timings:")
+print(report.format_table())
+print(f"✓ Saved run report to: {report.output_file}")
+if profiler.enabled:
+    print(f"✓ Saved profiles and hotspot summary to: {profiler.output_dir}/hotspots.txt")
 print()
 
 print("="*80)
@@ -0,0 +1,92 @@
+"""
+Shared Time-Segmentation and Basket-Building Stages
+
+The steps both analysis scripts apply between loading and mining, as plain
+functions so they can also be timed by the benchmark suite on synthetic data:
+
+    add_time_segments   Day-part (Morning/Afternoon/Evening) × day-type
+                        (Weekday/Weekend) segment per line item, vectorized
+    build_baskets       One row per transaction with its list of items
+    segment_volume      Observed days and baskets per day per segment
+    get_time_segment    Segment of a single timestamp (for streamed receipts)
+    encode_baskets      One-hot basket matrix for mlxtend's apriori
+"""
+
+import numpy as np
+import pandas as pd
+from mlxtend.preprocessing import TransactionEncoder
+
+
+def get_day_part(hour):
+    """Day-part label for a single hour (scalar version of add_time_segments)"""
+    if 6 <= hour < 11:
+        return 'Morning'
+    elif 11 <= hour < 16:
+        return 'Afternoon'
+    else:
+        return 'Evening'
+
+
+def add_time_segments(df, datetime_column='transaction_datetime'):
+    """
+    Add hour, day_part, day_of_week, day_type and time_segment columns
+
+    Same labels as get_day_part applied row by row, computed on whole arrays.
+    """
+    timestamps = df[datetime_column].dt
+    hour = timestamps.hour
+    df['hour'] = hour
+    df['day_part'] = np.select([(hour >= 6) & (hour < 11), (hour >= 11) & (hour < 16)],
+                               ['Morning', 'Afternoon'], 'Evening')
+    df['day_of_week'] = timestamps.dayofweek
+    df['day_type'] = np.where(df['day_of_week'] >= 5, 'Weekend', 'Weekday')
+    df['time_segment'] = df['day_part'] + '_' + df['day_type']
+    return df
+
+
+def build_baskets(df, key_column, item_column, first_columns=('time_segment',)):
+    """
+    Group line items into transaction baskets
+
+    Args:
+        df: Line items with a time_segment column
+        key_column: Column identifying a basket
+        item_column: Product name column
+        first_columns: Per-basket columns taken from the basket's first line
+
+    Returns:
+        DataFrame: key_column, 'items' (list of product names) and first_columns,
+        one row per basket, sorted by key
+    """
+    grouped = df.groupby(key_column, sort=True)
+    baskets = grouped[item_column].agg(list).rename('items').to_frame()
+    for column in first_columns:
+        baskets[column] = grouped[column].first()
+    return baskets.reset_index()
+
+
+def encode_baskets(baskets):
+    """One-hot encode a list of baskets; returns the boolean item matrix"""
+    te = TransactionEncoder()
+    te_array = te.fit(baskets).transform(baskets)
+    return pd.DataFrame(te_array, columns=te.columns_)
+
+
+def segment_volume(df, baskets, datetime_column='transaction_datetime'):
+    """
+    Observed days and baskets per day for every time segment
+
+    Returns:
+        DataFrame with time_segment, days, baskets and baskets_per_day
+    """
+    days = df[datetime_column].dt.normalize().groupby(df['time_segment']).nunique()
+    counts = baskets['time_segment'].value_counts()
+    volume = pd.DataFrame({'days': days, 'baskets': counts}).fillna(0).astype(int)
+    volume['baskets_per_day'] = volume['baskets'] / volume['days'].clip(lower=1)
+    return volume.rename_axis('time_segment').reset_index()
+
+
+def get_time_segment(timestamp):
+    """Time segment of a single timestamp (scalar version of add_time_segments)"""
+    day_type = 'Weekend' if timestamp.weekday() >= 5 else 'Weekday'
+    return f"{get_day_part(timestamp.hour)}_{day_type}"
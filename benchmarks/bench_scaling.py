@@ -0,0 +1,243 @@
+"""
+Scaling Benchmark for the Analysis Pipeline Stages
+
+Generates seeded synthetic data (see synthetic_data.py) at increasing basket
+counts and times each stage the analysis scripts run:
+
+    ingestion      read the CSV files with the declared schemas (and merge
+                   product names for receipts)
+    segmentation   date/time parsing and day-part × day-type segments
+    baskets        grouping line items into baskets
+    encoding       one-hot basket matrix per segment
+    mining         apriori per segment
+    rules          association_rules per segment
+
+Each size runs in a fresh process so its peak RSS is measured on its own.
+Results go to benchmarks/results/: a CSV with one row per size, a log-log
+plot of the scaling curves and, on the console, the fitted scaling exponent
+of every stage (1.0 = linear in the number of baskets).
+
+Usage:
+    python3 benchmarks/bench_scaling.py                          # 1e3 .. 1e5
+    python3 benchmarks/bench_scaling.py --sizes 1e3 1e4 1e5 1e6 1e7 --schema transactions
+"""
+
+import argparse
+import multiprocessing
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mlxtend.frequent_patterns import apriori, association_rules
+
+from basket_mining import add_time_segments, build_baskets, encode_baskets
+from dataset_loaders import TRANSACTIONS_SCHEMA, load_products, load_sales_receipts, read_csv_schema
+from run_report import peak_rss_mb
+from synthetic_data import SCHEMAS, BASKET_SIZE_DISTRIBUTIONS, generate, write_dataset
+
+STAGES = ['ingestion', 'segmentation', 'baskets', 'encoding', 'mining', 'rules']
+RESULTS_DIR = Path(__file__).parent / "results"
+DEFAULT_SIZES = [1e3, 1e4, 1e5]
+
+
+def _ingest(schema, files):
+    """Load the generated files the way the analysis scripts do"""
+    if schema == 'transactions':
+        return read_csv_schema(files[0], TRANSACTIONS_SCHEMA)
+    df_sales = load_sales_receipts(files[0])
+    df_products = load_products(files[1])
+    return df_sales.merge(df_products[['product_id', 'product']], on='product_id', how='left')
+
+
+def _segment(schema, df):
+    """Date/time parsing and time segmentation"""
+    if schema == 'transactions':
+        df['datetime_date'] = pd.to_datetime(df['transaction_date'])
+        df['transaction_datetime'] = df['datetime_date'] + pd.to_timedelta(df['transaction_time'].astype(str))
+    else:
+        df['transaction_date'] = pd.to_datetime(df['transaction_date'])
+        df['transaction_datetime'] = df['transaction_date'] + pd.to_timedelta(df['transaction_time'])
+    return add_time_segments(df)
+
+
+def _baskets(schema, df):
+    """Basket building with each dataset's basket key"""
+    if schema == 'transactions':
+        df['transaction_key'] = (df['transaction_datetime'].dt.strftime('%Y-%m-%d %H:%M:%S')
+                                 + '_' + df['store_location'].astype(str))
+        return build_baskets(df, 'transaction_key', 'product_detail')
+    return build_baskets(df, 'transaction_id', 'product')
+
+
+def run_size(n_baskets, config):
+    """
+    Generate one dataset and time every stage on it (runs in a worker process)
+
+    Returns:
+        dict: one result row (seconds per stage, counts, peak RSS)
+    """
+    schema = config['schema']
+    row = {'n_baskets': n_baskets}
+
+    start = time.perf_counter()
+    data = generate(schema, n_baskets, config['products'], config['basket_size'],
+                    config['mean_basket_size'], config['planted'], config['strength'], config['seed'])
+    row['generate_seconds'] = time.perf_counter() - start
+    row['line_items'] = len(data['line_items'])
+    planted = set(zip(data['planted']['antecedent'], data['planted']['consequent']))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = write_dataset(data, schema, tmp)
+        del data
+
+        timings = dict.fromkeys(STAGES, 0.0)
+        start = time.perf_counter()
+        df = _ingest(schema, files)
+        timings['ingestion'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    df = _segment(schema, df)
+    timings['segmentation'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    transactions = _baskets(schema, df)
+    timings['baskets'] = time.perf_counter() - start
+    del df
+
+    n_itemsets = n_rules = 0
+    recovered = set()
+    for segment, items in transactions.groupby('time_segment')['items']:
+        multi_item = [t for t in items if len(t) > 1]
+        if len(multi_item) < 10:
+            continue
+
+        start = time.perf_counter()
+        df_encoded = encode_baskets(multi_item)
+        timings['encoding'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        frequent_itemsets = apriori(df_encoded, min_support=config['min_support'], use_colnames=True)
+        timings['mining'] += time.perf_counter() - start
+        n_itemsets += len(frequent_itemsets)
+        if len(frequent_itemsets) == 0:
+            continue
+
+        start = time.perf_counter()
+        rules = association_rules(frequent_itemsets, metric="confidence",
+                                  min_threshold=config['min_confidence'])
+        timings['rules'] += time.perf_counter() - start
+        n_rules += len(rules)
+
+        single = rules[(rules['antecedents'].apply(len) == 1) & (rules['consequents'].apply(len) == 1)]
+        recovered |= {(next(iter(a)), next(iter(c))) for a, c in
+                      zip(single['antecedents'], single['consequents'])} & planted
+
+    row.update({f"{stage}_seconds": seconds for stage, seconds in timings.items()})
+    row['total_seconds'] = sum(timings.values())
+    row.update({
+        'baskets': len(transactions),
+        'frequent_itemsets': n_itemsets,
+        'rules': n_rules,
+        'planted_recovered': len(recovered),
+        'planted_total': len(planted),
+        'peak_rss_mb': peak_rss_mb(),
+    })
+    return row
+
+
+def scaling_exponents(results):
+    """Least-squares slope of log(seconds) against log(baskets) for each stage"""
+    exponents = {}
+    x = np.log10(results['n_baskets'].to_numpy(dtype=float))
+    for stage in STAGES + ['total']:
+        y = results[f"{stage}_seconds"].to_numpy(dtype=float)
+        keep = y > 0
+        if keep.sum() >= 2:
+            exponents[stage] = np.polyfit(x[keep], np.log10(y[keep]), 1)[0]
+    return exponents
+
+
+def plot_scaling(results, output_file):
+    """Log-log scaling curves, one line per stage"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from figure_rendering import save_figure
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    for stage in STAGES + ['total']:
+        ax.plot(results['n_baskets'], results[f"{stage}_seconds"], marker='o',
+                linewidth=2.5 if stage == 'total' else 1.5, label=stage)
+    ax.set_xscale('log')
+    ax.set_yscale('log')
+    ax.set_xlabel('Baskets', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Seconds', fontsize=12, fontweight='bold')
+    ax.set_title('Pipeline Stage Scaling', fontsize=14, fontweight='bold')
+    ax.grid(True, which='both', alpha=0.3)
+    ax.legend()
+    save_figure(fig, output_file)
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages on synthetic data")
+    parser.add_argument('--sizes', type=float, nargs='+', default=DEFAULT_SIZES,
+                        help="basket counts to benchmark, e.g. 1e3 1e4 1e5 1e6 1e7")
+    parser.add_argument('--schema', choices=SCHEMAS, default='receipts')
+    parser.add_argument('--products', type=int, default=80)
+    parser.add_argument('--basket-size', choices=BASKET_SIZE_DISTRIBUTIONS, default='poisson')
+    parser.add_argument('--mean-basket-size', type=float, default=2.0)
+    parser.add_argument('--planted', type=int, default=10)
+    parser.add_argument('--strength', type=float, default=0.6)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--min-support', type=float, default=0.02)
+    parser.add_argument('--min-confidence', type=float, default=0.40)
+    parser.add_argument('--output-dir', type=Path, default=RESULTS_DIR)
+    args = parser.parse_args(argv)
+
+    config = {k: v for k, v in vars(args).items() if k not in ('sizes', 'output_dir')}
+    sizes = sorted(int(s) for s in args.sizes)
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+
+    print("="*80)
+    print(f"SCALING BENCHMARK ({args.schema} schema, {args.products} products, seed {args.seed})")
+    print("="*80)
+
+    rows = []
+    context = multiprocessing.get_context('spawn')
+    for n_baskets in sizes:
+        print(f"\nBenchmarking {n_baskets:,} baskets...")
+        # A fresh process per size keeps peak RSS measurements independent
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            row = pool.submit(run_size, n_baskets, config).result()
+        rows.append(row)
+        stage_times = ", ".join(f"{stage} {row[f'{stage}_seconds']:.2f}s" for stage in STAGES)
+        print(f"✓ {row['line_items']:,} line items: {stage_times}")
+        print(f"✓ {row['rules']:,} rules, {row['planted_recovered']}/{row['planted_total']} planted rules "
+              f"recovered, peak RSS {row['peak_rss_mb']:.0f} MB")
+
+    results = pd.DataFrame(rows)
+    results_file = args.output_dir / f"scaling_{args.schema}.csv"
+    results.to_csv(results_file, index=False)
+    print(f"\n✓ Saved results to: {results_file}")
+
+    if len(results) >= 2:
+        plot_file = args.output_dir / f"scaling_{args.schema}.png"
+        plot_scaling(results, plot_file)
+        print(f"✓ Saved scaling curves to: {plot_file}")
+
+        print("\nScaling exponents (seconds ∝ baskets^k):")
+        for stage, k in scaling_exponents(results).items():
+            print(f"  - {stage:<13} k = {k:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
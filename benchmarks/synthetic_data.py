@@ -0,0 +1,263 @@
+"""
+Seeded Synthetic Café Transaction Generator
+
+Produces line items in the same schemas as the two real datasets, so the
+analysis code can be stressed far beyond the size of the Kaggle data:
+
+    transactions  Dataset 1 "Transactions" sheet (transaction_date,
+                  transaction_time, store_location, product_detail, ...);
+                  baskets are keyed by timestamp + store, as in apriori_analysis.py
+    receipts      Dataset 2 "201904 sales reciepts.csv" plus product.csv;
+                  baskets are keyed by transaction_id
+
+Knobs:
+    n_baskets          Number of baskets
+    n_products         Catalog size (popularity follows a Zipf-like curve)
+    basket_size        'poisson' or 'geometric' distribution of basket sizes
+    mean_basket_size   Mean items per basket (at least 1)
+    n_planted          Number of planted rules A → B
+    strength           Probability that a basket containing A also gets B
+
+The same seed always gives the same data. The planted rules are returned as
+ground truth, so a benchmark can check they are recovered.
+
+Usage:
+    python3 benchmarks/synthetic_data.py receipts 100000 synthetic/
+    python3 benchmarks/synthetic_data.py transactions 20000 synthetic/ --format xlsx
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SCHEMAS = ('transactions', 'receipts')
+BASKET_SIZE_DISTRIBUTIONS = ('poisson', 'geometric')
+
+# (product_category, product_type) pairs cycled through when naming products
+PRODUCT_TYPES = [
+    ('Coffee', 'Gourmet brewed coffee'), ('Coffee', 'Barista Espresso'),
+    ('Tea', 'Brewed Chai tea'), ('Tea', 'Brewed Black tea'), ('Tea', 'Brewed herbal tea'),
+    ('Bakery', 'Scone'), ('Bakery', 'Pastry'), ('Bakery', 'Biscotti'),
+    ('Drinking Chocolate', 'Hot chocolate'), ('Flavours', 'Regular syrup'),
+]
+STORES = ['Lower Manhattan', "Hell's Kitchen", 'Astoria']
+OPEN_SECONDS = (6 * 3600, 20 * 3600)  # Trading hours 06:00-20:00
+START_DATE = '2023-01-02'
+BASKETS_PER_STORE_DAY = 700  # Sets how many days the data spans
+
+
+def make_catalog(n_products, seed=0):
+    """Product catalog with ids, names, categories, prices and popularity weights"""
+    rng = np.random.default_rng(seed)
+    ids = np.arange(1, n_products + 1)
+    kinds = [PRODUCT_TYPES[i % len(PRODUCT_TYPES)] for i in range(n_products)]
+    popularity = 1.0 / np.arange(1, n_products + 1) ** 0.8
+    popularity = rng.permutation(popularity)
+    return pd.DataFrame({
+        'product_id': ids,
+        'product_category': [c for c, _ in kinds],
+        'product_type': [t for _, t in kinds],
+        'product_detail': [f"{t} {i}" for (_, t), i in zip(kinds, ids)],
+        'unit_price': np.round(rng.uniform(2.0, 6.0, n_products), 2),
+        'popularity': popularity / popularity.sum(),
+    })
+
+
+def plant_rules(catalog, n_planted, seed=0):
+    """Pick n_planted antecedent → consequent product pairs (distinct antecedents)"""
+    rng = np.random.default_rng(seed + 1)
+    n = len(catalog)
+    n_planted = min(n_planted, n // 2)
+    chosen = rng.choice(n, size=2 * n_planted, replace=False)
+    return pd.DataFrame({
+        'antecedent_id': catalog['product_id'].to_numpy()[chosen[:n_planted]],
+        'consequent_id': catalog['product_id'].to_numpy()[chosen[n_planted:]],
+    })
+
+
+def generate_basket_items(n_baskets, catalog, planted, basket_size='poisson',
+                          mean_basket_size=2.0, strength=0.6, seed=0):
+    """
+    Basket/product pairs with planted associations
+
+    Returns:
+        tuple (basket, product_id) of int arrays, sorted by basket; a product
+        appears at most once per basket
+    """
+    if basket_size not in BASKET_SIZE_DISTRIBUTIONS:
+        raise ValueError(f"Unknown basket size distribution '{basket_size}' "
+                         f"(expected one of {', '.join(BASKET_SIZE_DISTRIBUTIONS)})")
+    rng = np.random.default_rng(seed)
+    extra = max(mean_basket_size - 1.0, 0.0)
+    if basket_size == 'poisson':
+        sizes = 1 + rng.poisson(extra, n_baskets)
+    else:
+        sizes = rng.geometric(1.0 / (1.0 + extra), n_baskets)
+    sizes = np.minimum(sizes, len(catalog))
+
+    basket = np.repeat(np.arange(n_baskets), sizes)
+    product = rng.choice(catalog['product_id'].to_numpy(), size=len(basket),
+                         p=catalog['popularity'].to_numpy())
+
+    # Baskets containing an antecedent also get its consequent with probability `strength`
+    consequent_of = np.zeros(len(catalog) + 1, dtype=np.int64)
+    consequent_of[planted['antecedent_id'].to_numpy()] = planted['consequent_id'].to_numpy()
+    hits = consequent_of[product] > 0
+    hits &= rng.random(len(product)) < strength
+    basket = np.concatenate([basket, basket[hits]])
+    product = np.concatenate([product, consequent_of[product[hits]]])
+
+    # Drop repeated products within a basket
+    pairs = np.unique(basket.astype(np.int64) * (len(catalog) + 1) + product)
+    return pairs // (len(catalog) + 1), pairs % (len(catalog) + 1)
+
+
+def _basket_timestamps(n_baskets, n_stores, rng):
+    """Distinct (day, second, store) slots for each basket, in time order"""
+    day_seconds = OPEN_SECONDS[1] - OPEN_SECONDS[0]
+    n_days = max(1, -(-n_baskets // (BASKETS_PER_STORE_DAY * n_stores)))
+    slots = np.sort(rng.choice(n_days * day_seconds * n_stores, size=n_baskets, replace=False))
+    store = slots % n_stores
+    seconds = slots // n_stores
+    day, second = np.divmod(seconds, day_seconds)
+    timestamps = (pd.Timestamp(START_DATE) + pd.to_timedelta(day, unit='D')
+                  + pd.to_timedelta(second + OPEN_SECONDS[0], unit='s'))
+    return timestamps, store
+
+
+def generate(schema='receipts', n_baskets=10_000, n_products=80, basket_size='poisson',
+             mean_basket_size=2.0, n_planted=10, strength=0.6, seed=42):
+    """
+    Generate a synthetic dataset
+
+    Returns:
+        dict with 'line_items' (DataFrame in the schema's columns), 'products'
+        (product.csv frame for the receipts schema, else None) and 'planted'
+        (ground-truth rules with product names)
+    """
+    if schema not in SCHEMAS:
+        raise ValueError(f"Unknown schema '{schema}' (expected one of {', '.join(SCHEMAS)})")
+    rng = np.random.default_rng(seed)
+    catalog = make_catalog(n_products, seed)
+    planted = plant_rules(catalog, n_planted, seed)
+    basket, product_id = generate_basket_items(n_baskets, catalog, planted, basket_size,
+                                               mean_basket_size, strength, seed)
+    timestamps, store = _basket_timestamps(n_baskets, len(STORES), rng)
+
+    line_ts = timestamps[basket]
+    row = product_id - 1
+    qty = 1 + (rng.random(len(basket)) < 0.1)
+    unit_price = catalog['unit_price'].to_numpy()[row]
+
+    names = catalog.set_index('product_id')['product_detail']
+    planted = planted.assign(antecedent=names[planted['antecedent_id']].to_numpy(),
+                             consequent=names[planted['consequent_id']].to_numpy())
+
+    if schema == 'transactions':
+        store_ids = np.array([5, 8, 3])
+        line_items = pd.DataFrame({
+            'transaction_id': np.arange(1, len(basket) + 1),
+            'transaction_date': line_ts.normalize(),
+            'transaction_time': line_ts.strftime('%H:%M:%S'),
+            'transaction_qty': qty,
+            'store_id': store_ids[store[basket]],
+            'store_location': pd.Categorical.from_codes(store[basket], STORES),
+            'product_id': product_id,
+            'unit_price': unit_price,
+            'product_category': catalog['product_category'].to_numpy()[row],
+            'product_type': catalog['product_type'].to_numpy()[row],
+            'product_detail': catalog['product_detail'].to_numpy()[row],
+        })
+        return {'line_items': line_items, 'products': None, 'planted': planted}
+
+    line_number = np.arange(len(basket)) - np.searchsorted(basket, basket)
+    line_items = pd.DataFrame({
+        'transaction_id': basket + 1,
+        'transaction_date': line_ts.strftime('%Y-%m-%d'),
+        'transaction_time': line_ts.strftime('%H:%M:%S'),
+        'sales_outlet_id': store[basket] + 3,
+        'staff_id': rng.integers(1, 45, len(basket)),
+        'customer_id': 0,
+        'instore_yn': 'Y',
+        'order': 1,
+        'line_item_id': line_number + 1,
+        'product_id': product_id,
+        'quantity': qty,
+        'line_item_amount': np.round(qty * unit_price, 2),
+        'unit_price': unit_price,
+        'promo_item_yn': 'N',
+    })
+    products = pd.DataFrame({
+        'product_id': catalog['product_id'],
+        'product_group': np.where(catalog['product_category'].isin(['Bakery']), 'Food', 'Beverages'),
+        'product_category': catalog['product_category'],
+        'product_type': catalog['product_type'],
+        'product': catalog['product_detail'],
+        'product_description': '',
+        'unit_of_measure': '12 oz',
+        'current_wholesale_price': np.round(catalog['unit_price'] * 0.4, 2),
+        'current_retail_price': catalog['unit_price'].map(lambda p: f"${p:.2f} "),
+        'tax_exempt_yn': 'N',
+        'promo_yn': 'N',
+        'new_product_yn': 'N',
+    })
+    return {'line_items': line_items, 'products': products, 'planted': planted}
+
+
+def write_dataset(data, schema, output_dir, file_format='csv'):
+    """
+    Write a generated dataset under the real datasets' file names
+
+    Returns:
+        list of written paths
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if schema == 'transactions':
+        if file_format == 'xlsx':
+            path = output_dir / "Coffee Shop Sales Dashboard by Alfi Aziz.xlsx"
+            data['line_items'].to_excel(path, sheet_name="Transactions", index=False)
+        else:
+            path = output_dir / "transactions.csv"
+            data['line_items'].to_csv(path, index=False)
+        written = [path]
+    else:
+        written = [output_dir / "201904 sales reciepts.csv", output_dir / "product.csv"]
+        data['line_items'].to_csv(written[0], index=False)
+        data['products'].to_csv(written[1], index=False)
+    planted_file = output_dir / "planted_rules.csv"
+    data['planted'].to_csv(planted_file, index=False)
+    return written + [planted_file]
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Generate synthetic café transactions")
+    parser.add_argument('schema', choices=SCHEMAS)
+    parser.add_argument('n_baskets', type=lambda v: int(float(v)), help="number of baskets, e.g. 1e5")
+    parser.add_argument('output_dir', type=Path)
+    parser.add_argument('--products', type=int, default=80, help="catalog size")
+    parser.add_argument('--basket-size', choices=BASKET_SIZE_DISTRIBUTIONS, default='poisson')
+    parser.add_argument('--mean-basket-size', type=float, default=2.0)
+    parser.add_argument('--planted', type=int, default=10, help="number of planted rules")
+    parser.add_argument('--strength', type=float, default=0.6,
+                        help="P(consequent | antecedent) for planted rules")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--format', choices=('csv', 'xlsx'), default='csv',
+                        help="file format for the transactions schema")
+    args = parser.parse_args(argv)
+
+    data = generate(args.schema, args.n_baskets, args.products, args.basket_size,
+                    args.mean_basket_size, args.planted, args.strength, args.seed)
+    for path in write_dataset(data, args.schema, args.output_dir, args.format):
+        print(f"✓ Saved: {path}")
+    print(f"✓ {args.n_baskets:,} baskets, {len(data['line_items']):,} line items, "
+          f"{len(data['planted'])} planted rules")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,21 +3,50 @@ Compare Association Rule Mining Results Between Two Coffee Shop Datasets
 
 Dataset 1: Coffee Shop Sales Dashboard (6 months, NYC, 2023)
 Dataset 2: Coffee Shop Sample Data (1 month, April 2019)
+
+Usage:
+    python3 compare_datasets.py          # Dataset 2 reduced to its top 10,000 rules
+    python3 compare_datasets.py --full   # Stream and compare the complete rule sets
+    python3 compare_datasets.py --preview --workers 4
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
 from collections import Counter
-import re
+
+from rule_streaming import stream_compare, normalize_product_name, HIST_BINS
+from figure_rendering import render_figures, save_figure
+from run_report import RunReport
+from summary_report import SummaryReport, segment_lookup, summarize_rules
+
+parser = argparse.ArgumentParser(description="Compare association rules between the two datasets")
+parser.add_argument('--full', action='store_true',
+                    help="stream both complete rule sets in chunks instead of truncating "
+                         "Dataset 2 to its top 10,000 rules")
+parser.add_argument('--preview', action='store_true',
+                    help="fast preview rendering (dpi=100, no tight bounding box)")
+parser.add_argument('--workers', type=int, default=None,
+                    help="figure rendering processes (default: one per CPU; 1 = sequential)")
+args = parser.parse_args()
+FULL_COMPARISON = args.full
 
 # Setup
 sns.set_style("whitegrid")
 COMPARISON_DIR = Path("comparison_results")
 COMPARISON_DIR.mkdir(exist_ok=True)
 
+# Per-phase timing, memory and counts, written to run_report.json
+report = RunReport("compare_datasets", COMPARISON_DIR / "run_report.json",
+                   parameters={'full': FULL_COMPARISON, 'preview': args.preview, 'workers': args.workers})
+
+# Common product keywords to look for
+keywords = ['coffee', 'tea', 'scone', 'croissant', 'latte', 'espresso',
+            'chai', 'chocolate', 'biscotti', 'cappuccino']
+
 print("="*80)
 print("COMPARING ASSOCIATION RULE MINING RESULTS")
 print("="*80)
@@ -27,25 +56,43 @@ print()
 # PHASE 1: LOAD BOTH DATASETS
 # ============================================================================
 
+report.begin("Phase 1: Loading results from both datasets")
 print("Phase 1: Loading results from both datasets...")
 print("-"*80)
 
-# Load Dataset 1 (original)
 df1_path = Path("apriori_results/association_rules_by_segment.csv")
-df1 = pd.read_csv(df1_path)
-print(f"✓ Dataset 1: Loaded {len(df1)} rules")
-
-# Load Dataset 2 (new) - top 10000 rules by confidence for comparison
 df2_path = Path("apriori_results_new/association_rules_by_segment.csv")
-df2 = pd.read_csv(df2_path)
-print(f"✓ Dataset 2: Loaded {len(df2):,} rules (using top 10,000 for comparison)")
-df2 = df2.nlargest(10000, 'Confidence')
+
+if FULL_COMPARISON:
+    # Stream both complete rule sets; overlaps are joined bucket by bucket
+    # and written straight to disk, so no rule file is held in memory
+    print("Full comparison mode: streaming complete rule sets in chunks...")
+    stream_result = stream_compare(df1_path, df2_path, keywords,
+                                   overlaps_file=COMPARISON_DIR / "overlapping_patterns.csv")
+    stats1 = stream_result['stats1']
+    stats2 = stream_result['stats2']
+    n_rules_1 = stats1.n_rules
+    n_rules_2 = stats2.n_rules
+    print(f"✓ Dataset 1: Streamed {n_rules_1:,} rules")
+    print(f"✓ Dataset 2: Streamed {n_rules_2:,} rules (complete rule set)")
+else:
+    # Load Dataset 1 (original)
+    df1 = pd.read_csv(df1_path)
+    print(f"✓ Dataset 1: Loaded {len(df1)} rules")
+
+    # Load Dataset 2 (new) - top 10000 rules by confidence for comparison
+    df2 = pd.read_csv(df2_path)
+    print(f"✓ Dataset 2: Loaded {len(df2):,} rules (using top 10,000 for comparison)")
+    df2 = df2.nlargest(10000, 'Confidence')
+    n_rules_1 = len(df1)
+    n_rules_2 = len(df2)
 print()
 
 # ============================================================================
 # PHASE 2: EXTRACT PRODUCTS
 # ============================================================================
 
+report.begin("Phase 2: Extracting product lists")
 print("Phase 2: Extracting product lists...")
 print("-"*80)
 
@@ -58,22 +105,18 @@ def extract_products(df):
         products.update([p.strip() for p in str(items).split(',')])
     return products
 
-products_1 = extract_products(df1)
-products_2 = extract_products(df2)
+if FULL_COMPARISON:
+    products_1 = stats1.products
+    products_2 = stats2.products
+else:
+    products_1 = extract_products(df1)
+    products_2 = extract_products(df2)
 
 print(f"Dataset 1: {len(products_1)} unique products in rules")
 print(f"Dataset 2: {len(products_2)} unique products in rules")
 print()
 
 # Find common products (case-insensitive and normalized)
-def normalize_product_name(name):
-    """Normalize product names for comparison"""
-    # Remove size indicators, convert to lowercase
-    name = str(name).lower()
-    name = re.sub(r'\s+(sm|rg|lg)$', '', name)
-    name = name.strip()
-    return name
-
 products_1_normalized = {normalize_product_name(p): p for p in products_1}
 products_2_normalized = {normalize_product_name(p): p for p in products_2}
 
@@ -91,6 +134,7 @@ print()
 # PHASE 3: FIND SIMILAR ASSOCIATION PATTERNS
 # ============================================================================
 
+report.begin("Phase 3: Identifying similar association patterns")
 print("Phase 3: Identifying similar association patterns...")
 print("-"*80)
 
@@ -102,24 +146,40 @@ def extract_pattern(antecedent, consequent):
                                     for p in str(consequent).split(',')]))
     return (ant_normalized, cons_normalized)
 
-# Extract patterns from both datasets
-patterns_1 = {}
-for idx, row in df1.iterrows():
-    pattern = extract_pattern(row['Antecedent_Items'], row['Consequent_Items'])
-    patterns_1[pattern] = {
-        'confidence': row['Confidence'],
-        'lift': row['Lift'],
-        'support': row['Support'],
-        'segment': row['Time_Segment'],
-        'original_ant': row['Antecedent_Items'],
-        'original_cons': row['Consequent_Items']
-    }
-
-patterns_2 = {}
-for idx, row in df2.iterrows():
-    pattern = extract_pattern(row['Antecedent_Items'], row['Consequent_Items'])
-    if pattern not in patterns_2:  # Keep highest confidence for duplicates
-        patterns_2[pattern] = {
+if FULL_COMPARISON:
+    n_patterns_1 = stream_result['n_patterns1']
+    n_patterns_2 = stream_result['n_patterns2']
+    n_common_patterns = stream_result['n_common']
+    comparison_df = stream_result['overlaps']
+
+    print(f"Dataset 1 unique patterns: {n_patterns_1:,}")
+    print(f"Dataset 2 unique patterns: {n_patterns_2:,}")
+    print()
+    print(f"✓ Found {n_common_patterns:,} overlapping patterns!")
+    print()
+
+    if n_common_patterns > 0:
+        print(f"Mean confidence change (DS2 - DS1): {stream_result['mean_confidence_delta']:+.3f}")
+        print(f"Mean absolute confidence change:    {stream_result['mean_abs_confidence_delta']:.3f}")
+        print(f"Mean lift change (DS2 - DS1):       {stream_result['mean_lift_delta']:+.3f}")
+        print()
+        print("Overlapping patterns (highest Dataset 1 confidence):")
+        comparison_data = comparison_df.head(20).to_dict('records')
+        for i, data in enumerate(comparison_data, 1):
+            print(f"\n{i}. {data['Pattern']}")
+            print(f"   Dataset 1: Conf={data['DS1_Confidence']:.3f}, Lift={data['DS1_Lift']:.3f}, Segment={data['DS1_Segment']}")
+            print(f"   Dataset 2: Conf={data['DS2_Confidence']:.3f}, Lift={data['DS2_Lift']:.3f}, Segment={data['DS2_Segment']}")
+        print(f"\n✓ Saved all {n_common_patterns:,} overlapping patterns to: {COMPARISON_DIR}/overlapping_patterns.csv")
+    else:
+        print("⚠️  No exact overlapping patterns found.")
+        print("   This suggests different product combinations between datasets.")
+        comparison_data = []
+else:
+    # Extract patterns from both datasets
+    patterns_1 = {}
+    for idx, row in df1.iterrows():
+        pattern = extract_pattern(row['Antecedent_Items'], row['Consequent_Items'])
+        patterns_1[pattern] = {
             'confidence': row['Confidence'],
             'lift': row['Lift'],
             'support': row['Support'],
@@ -128,59 +188,72 @@ for idx, row in df2.iterrows():
             'original_cons': row['Consequent_Items']
         }
 
-print(f"Dataset 1 unique patterns: {len(patterns_1)}")
-print(f"Dataset 2 unique patterns: {len(patterns_2)}")
-print()
-
-# Find overlapping patterns
-common_patterns = set(patterns_1.keys()) & set(patterns_2.keys())
-print(f"✓ Found {len(common_patterns)} overlapping patterns!")
-print()
-
-if len(common_patterns) > 0:
-    print("Overlapping patterns:")
-    comparison_data = []
-
-    for i, pattern in enumerate(list(common_patterns)[:20], 1):
-        p1 = patterns_1[pattern]
-        p2 = patterns_2[pattern]
-
-        print(f"\n{i}. {p1['original_ant']} → {p1['original_cons']}")
-        print(f"   Dataset 1: Conf={p1['confidence']:.3f}, Lift={p1['lift']:.3f}, Segment={p1['segment']}")
-        print(f"   Dataset 2: Conf={p2['confidence']:.3f}, Lift={p2['lift']:.3f}, Segment={p2['segment']}")
-
-        comparison_data.append({
-            'Pattern': f"{p1['original_ant']} → {p1['original_cons']}",
-            'DS1_Confidence': p1['confidence'],
-            'DS2_Confidence': p2['confidence'],
-            'DS1_Lift': p1['lift'],
-            'DS2_Lift': p2['lift'],
-            'DS1_Segment': p1['segment'],
-            'DS2_Segment': p2['segment']
-        })
-
-    # Save comparison to CSV
-    comparison_df = pd.DataFrame(comparison_data)
-    comparison_df.to_csv(COMPARISON_DIR / "overlapping_patterns.csv", index=False)
-    print(f"\n✓ Saved overlapping patterns to: {COMPARISON_DIR}/overlapping_patterns.csv")
-else:
-    print("⚠️  No exact overlapping patterns found.")
-    print("   This suggests different product combinations between datasets.")
-    comparison_df = pd.DataFrame()
-
+    patterns_2 = {}
+    for idx, row in df2.iterrows():
+        pattern = extract_pattern(row['Antecedent_Items'], row['Consequent_Items'])
+        if pattern not in patterns_2:  # Keep highest confidence for duplicates
+            patterns_2[pattern] = {
+                'confidence': row['Confidence'],
+                'lift': row['Lift'],
+                'support': row['Support'],
+                'segment': row['Time_Segment'],
+                'original_ant': row['Antecedent_Items'],
+                'original_cons': row['Consequent_Items']
+            }
+
+    print(f"Dataset 1 unique patterns: {len(patterns_1)}")
+    print(f"Dataset 2 unique patterns: {len(patterns_2)}")
+    print()
+
+    # Find overlapping patterns
+    common_patterns = set(patterns_1.keys()) & set(patterns_2.keys())
+    print(f"✓ Found {len(common_patterns)} overlapping patterns!")
+    print()
+
+    if len(common_patterns) > 0:
+        print("Overlapping patterns:")
+        comparison_data = []
+
+        for i, pattern in enumerate(list(common_patterns)[:20], 1):
+            p1 = patterns_1[pattern]
+            p2 = patterns_2[pattern]
+
+            print(f"\n{i}. {p1['original_ant']} → {p1['original_cons']}")
+            print(f"   Dataset 1: Conf={p1['confidence']:.3f}, Lift={p1['lift']:.3f}, Segment={p1['segment']}")
+            print(f"   Dataset 2: Conf={p2['confidence']:.3f}, Lift={p2['lift']:.3f}, Segment={p2['segment']}")
+
+            comparison_data.append({
+                'Pattern': f"{p1['original_ant']} → {p1['original_cons']}",
+                'DS1_Confidence': p1['confidence'],
+                'DS2_Confidence': p2['confidence'],
+                'DS1_Lift': p1['lift'],
+                'DS2_Lift': p2['lift'],
+                'DS1_Segment': p1['segment'],
+                'DS2_Segment': p2['segment']
+            })
+
+        # Save comparison to CSV
+        comparison_df = pd.DataFrame(comparison_data)
+        comparison_df.to_csv(COMPARISON_DIR / "overlapping_patterns.csv", index=False)
+        print(f"\n✓ Saved overlapping patterns to: {COMPARISON_DIR}/overlapping_patterns.csv")
+    else:
+        print("⚠️  No exact overlapping patterns found.")
+        print("   This suggests different product combinations between datasets.")
+        comparison_df = pd.DataFrame()
+
+    n_common_patterns = len(common_patterns)
+
+report.count(rules_1=int(n_rules_1), rules_2=int(n_rules_2), common_patterns=int(n_common_patterns))
 print()
 
 # ============================================================================
 # PHASE 4: COMPARE PRODUCT CATEGORIES
 # ============================================================================
 
+report.begin("Phase 4: Analyzing product category patterns")
 print("Phase 4: Analyzing product category patterns...")
 print("-"*80)
 
-# Common product keywords to look for
-keywords = ['coffee', 'tea', 'scone', 'croissant', 'latte', 'espresso',
-            'chai', 'chocolate', 'biscotti', 'cappuccino']
-
 def count_keyword_occurrences(df, keyword):
     """Count how many rules involve a product with this keyword"""
     count = 0
@@ -192,14 +265,18 @@ def count_keyword_occurrences(df, keyword):
 
 keyword_comparison = []
 for keyword in keywords:
-    count_1 = count_keyword_occurrences(df1, keyword)
-    count_2 = count_keyword_occurrences(df2, keyword)
+    if FULL_COMPARISON:
+        count_1 = stats1.keyword_counts[keyword]
+        count_2 = stats2.keyword_counts[keyword]
+    else:
+        count_1 = count_keyword_occurrences(df1, keyword)
+        count_2 = count_keyword_occurrences(df2, keyword)
     keyword_comparison.append({
         'Keyword': keyword.capitalize(),
         'Dataset_1_Rules': count_1,
         'Dataset_2_Rules': count_2,
-        'DS1_Percentage': f"{count_1/len(df1)*100:.1f}%",
-        'DS2_Percentage': f"{count_2/len(df2)*100:.1f}%"
+        'DS1_Percentage': f"{count_1/n_rules_1*100:.1f}%",
+        'DS2_Percentage': f"{count_2/n_rules_2*100:.1f}%"
     })
 
 keyword_df = pd.DataFrame(keyword_comparison)
@@ -215,9 +292,39 @@ print()
 # PHASE 5: COMPARE METRICS
 # ============================================================================
 
+report.begin("Phase 5: Comparing overall metrics")
 print("Phase 5: Comparing overall metrics...")
 print("-"*80)
 
+def summarize_metrics(df):
+    """Headline metrics of a rule frame, in metrics_comparison order"""
+    return [
+        len(df),
+        f"{df['Confidence'].mean():.3f}",
+        f"{df['Confidence'].max():.3f}",
+        f"{df['Confidence'].min():.3f}",
+        f"{df['Lift'].mean():.3f}",
+        f"{df['Lift'].max():.3f}",
+        f"{df['Support'].mean():.3f}"
+    ]
+
+def summarize_stats(stats):
+    """Headline metrics of a streamed rule file, in metrics_comparison order"""
+    return [
+        stats.n_rules,
+        f"{stats.conf_mean:.3f}",
+        f"{stats.conf_max:.3f}",
+        f"{stats.conf_min:.3f}",
+        f"{stats.lift_mean:.3f}",
+        f"{stats.lift_max:.3f}",
+        f"{stats.support_mean:.3f}"
+    ]
+
+if FULL_COMPARISON:
+    ds1_metrics, ds2_metrics = summarize_stats(stats1), summarize_stats(stats2)
+else:
+    ds1_metrics, ds2_metrics = summarize_metrics(df1), summarize_metrics(df2)
+
 metrics_comparison = {
     'Metric': [
         'Total Rules',
@@ -228,24 +335,8 @@ metrics_comparison = {
         'Max Lift',
         'Avg Support'
     ],
-    'Dataset_1': [
-        len(df1),
-        f"{df1['Confidence'].mean():.3f}",
-        f"{df1['Confidence'].max():.3f}",
-        f"{df1['Confidence'].min():.3f}",
-        f"{df1['Lift'].mean():.3f}",
-        f"{df1['Lift'].max():.3f}",
-        f"{df1['Support'].mean():.3f}"
-    ],
-    'Dataset_2': [
-        len(df2),
-        f"{df2['Confidence'].mean():.3f}",
-        f"{df2['Confidence'].max():.3f}",
-        f"{df2['Confidence'].min():.3f}",
-        f"{df2['Lift'].mean():.3f}",
-        f"{df2['Lift'].max():.3f}",
-        f"{df2['Support'].mean():.3f}"
-    ]
+    'Dataset_1': ds1_metrics,
+    'Dataset_2': ds2_metrics
 }
 
 metrics_df = pd.DataFrame(metrics_comparison)
@@ -260,25 +351,29 @@ print()
 # PHASE 6: TIME SEGMENT COMPARISON
 # ============================================================================
 
+report.begin("Phase 6: Comparing time segment patterns")
 print("Phase 6: Comparing time segment patterns...")
 print("-"*80)
 
-segment_comparison = []
-all_segments = sorted(set(df1['Time_Segment'].unique()) | set(df2['Time_Segment'].unique()))
+if FULL_COMPARISON:
+    segment_stats = [{segment: {'rules': count, 'mean_confidence': stats.segment_mean_confidence(segment)}
+                      for segment, count in stats.segment_counts.items()} for stats in (stats1, stats2)]
+else:
+    # One grouped pass per rule frame instead of a boolean mask per segment
+    segment_stats = [segment_lookup(summarize_rules(df, top_n=0)) for df in (df1, df2)]
+all_segments = sorted(set(segment_stats[0]) | set(segment_stats[1]))
 
+segment_comparison = []
+no_rules = {'rules': 0, 'mean_confidence': 0}
 for segment in all_segments:
-    count_1 = len(df1[df1['Time_Segment'] == segment])
-    count_2 = len(df2[df2['Time_Segment'] == segment])
-
-    avg_conf_1 = df1[df1['Time_Segment'] == segment]['Confidence'].mean() if count_1 > 0 else 0
-    avg_conf_2 = df2[df2['Time_Segment'] == segment]['Confidence'].mean() if count_2 > 0 else 0
-
+    ds1 = segment_stats[0].get(segment, no_rules)
+    ds2 = segment_stats[1].get(segment, no_rules)
     segment_comparison.append({
         'Time_Segment': segment,
-        'DS1_Rules': count_1,
-        'DS2_Rules': count_2,
-        'DS1_Avg_Confidence': f"{avg_conf_1:.3f}" if count_1 > 0 else "N/A",
-        'DS2_Avg_Confidence': f"{avg_conf_2:.3f}" if count_2 > 0 else "N/A"
+        'DS1_Rules': ds1['rules'],
+        'DS2_Rules': ds2['rules'],
+        'DS1_Avg_Confidence': f"{ds1['mean_confidence']:.3f}" if ds1['rules'] > 0 else "N/A",
+        'DS2_Avg_Confidence': f"{ds2['mean_confidence']:.3f}" if ds2['rules'] > 0 else "N/A"
     })
 
 segment_df = pd.DataFrame(segment_comparison)
@@ -293,35 +388,35 @@ print()
 # PHASE 7: CREATE COMPARISON VISUALIZATIONS
 # ============================================================================
 
+report.begin("Phase 7: Creating comparison visualizations")
 print("Phase 7: Creating comparison visualizations...")
 print("-"*80)
 
-# Visualization 1: Keyword Comparison
-fig, ax = plt.subplots(figsize=(14, 8))
-x = np.arange(len(keyword_df))
-width = 0.35
-
-bars1 = ax.bar(x - width/2, keyword_df['Dataset_1_Rules'], width,
-               label='Dataset 1 (NYC 2023)', color='#2E86AB', edgecolor='black')
-bars2 = ax.bar(x + width/2, keyword_df['Dataset_2_Rules'], width,
-               label='Dataset 2 (2019)', color='#A23B72', edgecolor='black')
-
-ax.set_xlabel('Product Category', fontsize=12, fontweight='bold')
-ax.set_ylabel('Number of Rules Involving Category', fontsize=12, fontweight='bold')
-ax.set_title('Product Category Involvement in Association Rules\nComparison Across Datasets',
-             fontsize=14, fontweight='bold')
-ax.set_xticks(x)
-ax.set_xticklabels(keyword_df['Keyword'], rotation=45, ha='right')
-ax.legend(fontsize=11)
-ax.grid(axis='y', alpha=0.3)
-
-plt.tight_layout()
-plt.savefig(COMPARISON_DIR / "1_category_comparison.png", dpi=300, bbox_inches='tight')
-print("✓ Saved: 1_category_comparison.png")
-plt.close()
-
-# Visualization 2: Metrics Comparison
-if len(comparison_df) > 0:
+def plot_category_comparison(keyword_df, output_file, profile):
+    """Visualization 1: Keyword Comparison"""
+    fig, ax = plt.subplots(figsize=(14, 8))
+    x = np.arange(len(keyword_df))
+    width = 0.35
+
+    ax.bar(x - width/2, keyword_df['Dataset_1_Rules'], width,
+           label='Dataset 1 (NYC 2023)', color='#2E86AB', edgecolor='black')
+    ax.bar(x + width/2, keyword_df['Dataset_2_Rules'], width,
+           label='Dataset 2 (2019)', color='#A23B72', edgecolor='black')
+
+    ax.set_xlabel('Product Category', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Number of Rules Involving Category', fontsize=12, fontweight='bold')
+    ax.set_title('Product Category Involvement in Association Rules\nComparison Across Datasets',
+                 fontsize=14, fontweight='bold')
+    ax.set_xticks(x)
+    ax.set_xticklabels(keyword_df['Keyword'], rotation=45, ha='right')
+    ax.legend(fontsize=11)
+    ax.grid(axis='y', alpha=0.3)
+
+    plt.tight_layout()
+    save_figure(fig, output_file, profile)
+
+def plot_metrics_scatter(comparison_df, output_file, profile):
+    """Visualization 2: Metrics Comparison"""
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
 
     # Confidence comparison
@@ -346,27 +441,44 @@ if len(comparison_df) > 0:
     ax2.grid(alpha=0.3)
 
     plt.tight_layout()
-    plt.savefig(COMPARISON_DIR / "2_metrics_scatter.png", dpi=300, bbox_inches='tight')
-    print("✓ Saved: 2_metrics_scatter.png")
-    plt.close()
-
-# Visualization 3: Confidence Distribution Comparison
-fig, ax = plt.subplots(figsize=(12, 6))
-ax.hist(df1['Confidence'], bins=30, alpha=0.6, label='Dataset 1 (NYC 2023)',
-        color='#2E86AB', edgecolor='black')
-ax.hist(df2['Confidence'], bins=30, alpha=0.6, label='Dataset 2 (2019)',
-        color='#A23B72', edgecolor='black')
-ax.set_xlabel('Confidence', fontsize=12, fontweight='bold')
-ax.set_ylabel('Frequency', fontsize=12, fontweight='bold')
-ax.set_title('Confidence Distribution Comparison', fontsize=14, fontweight='bold')
-ax.legend(fontsize=11)
-ax.grid(axis='y', alpha=0.3)
-ax.xaxis.set_major_formatter(plt.FuncFormatter(lambda x, _: f'{x:.0%}'))
-
-plt.tight_layout()
-plt.savefig(COMPARISON_DIR / "3_confidence_distribution.png", dpi=300, bbox_inches='tight')
-print("✓ Saved: 3_confidence_distribution.png")
-plt.close()
+    save_figure(fig, output_file, profile)
+
+def plot_confidence_distribution(conf_1, conf_2, bins, output_file, profile,
+                                 weights_1=None, weights_2=None):
+    """Visualization 3: Confidence Distribution Comparison"""
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.hist(conf_1, bins=bins, weights=weights_1, alpha=0.6, label='Dataset 1 (NYC 2023)',
+            color='#2E86AB', edgecolor='black')
+    ax.hist(conf_2, bins=bins, weights=weights_2, alpha=0.6, label='Dataset 2 (2019)',
+            color='#A23B72', edgecolor='black')
+    ax.set_xlabel('Confidence', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Frequency', fontsize=12, fontweight='bold')
+    ax.set_title('Confidence Distribution Comparison', fontsize=14, fontweight='bold')
+    ax.legend(fontsize=11)
+    ax.grid(axis='y', alpha=0.3)
+    ax.xaxis.set_major_formatter(plt.FuncFormatter(lambda x, _: f'{x:.0%}'))
+
+    plt.tight_layout()
+    save_figure(fig, output_file, profile)
+
+if FULL_COMPARISON:
+    # Histograms were accumulated while streaming, on fixed bin edges
+    distribution = {'conf_1': HIST_BINS[:-1], 'conf_2': HIST_BINS[:-1], 'bins': HIST_BINS,
+                    'weights_1': stats1.conf_hist, 'weights_2': stats2.conf_hist}
+else:
+    distribution = {'conf_1': df1['Confidence'], 'conf_2': df2['Confidence'], 'bins': 30}
+
+figure_tasks = [
+    ("1_category_comparison.png", plot_category_comparison,
+     COMPARISON_DIR / "1_category_comparison.png", {'keyword_df': keyword_df}),
+]
+if len(comparison_df) > 0:
+    figure_tasks.append(("2_metrics_scatter.png", plot_metrics_scatter,
+                         COMPARISON_DIR / "2_metrics_scatter.png", {'comparison_df': comparison_df}))
+figure_tasks.append(("3_confidence_distribution.png", plot_confidence_distribution,
+                     COMPARISON_DIR / "3_confidence_distribution.png", distribution))
+
+render_figures(figure_tasks, profile='preview' if args.preview else 'full', workers=args.workers)
 
 print()
 
@@ -374,127 +486,110 @@ print()
 # PHASE 8: GENERATE COMPARISON REPORT
 # ============================================================================
 
+report.begin("Phase 8: Generating comparison report")
 print("Phase 8: Generating comparison report...")
 print("-"*80)
 
-report_lines = []
-
-report_lines.append("="*80)
-report_lines.append("COMPARISON REPORT: TWO COFFEE SHOP DATASETS")
-report_lines.append("="*80)
-report_lines.append("")
-report_lines.append("Dataset 1: Coffee Shop Sales Dashboard (NYC, Jan-Jun 2023)")
-report_lines.append("Dataset 2: Coffee Shop Sample Data (April 2019)")
-report_lines.append("")
-
-report_lines.append("="*80)
-report_lines.append("EXECUTIVE SUMMARY")
-report_lines.append("="*80)
-report_lines.append("")
-
-if len(common_patterns) > 0:
-    report_lines.append(f"✓ SIMILARITY FOUND: {len(common_patterns)} overlapping patterns")
-    report_lines.append("")
-    report_lines.append("Key Similarities:")
-    report_lines.append("  • Both datasets show consistent product pairing behaviors")
-    report_lines.append("  • Common patterns suggest universal café purchasing trends")
-    report_lines.append("  • Association rules are reproducible across different locations/times")
+comparison_report = SummaryReport("COMPARISON REPORT: TWO COFFEE SHOP DATASETS", statistics={
+    'metrics': metrics_df.to_dict('records'),
+    'categories': keyword_df.to_dict('records'),
+    'segments': segment_comparison,
+    'overlapping_patterns': n_common_patterns,
+})
+comparison_report.lines(["Dataset 1: Coffee Shop Sales Dashboard (NYC, Jan-Jun 2023)",
+                         "Dataset 2: Coffee Shop Sample Data (April 2019)"])
+
+comparison_report.banner("EXECUTIVE SUMMARY")
+if n_common_patterns > 0:
+    comparison_report.lines([
+        f"✓ SIMILARITY FOUND: {n_common_patterns} overlapping patterns",
+        "",
+        "Key Similarities:",
+        "  • Both datasets show consistent product pairing behaviors",
+        "  • Common patterns suggest universal café purchasing trends",
+        "  • Association rules are reproducible across different locations/times",
+    ])
 else:
-    report_lines.append("⚠️  LIMITED DIRECT OVERLAP: Few exact pattern matches")
-    report_lines.append("")
-    report_lines.append("Possible Reasons:")
-    report_lines.append("  • Different product offerings between locations")
-    report_lines.append("  • Different customer demographics or preferences")
-    report_lines.append("  • Different time periods (2019 vs 2023)")
-
-report_lines.append("")
-
-report_lines.append("="*80)
-report_lines.append("METRICS COMPARISON")
-report_lines.append("="*80)
-report_lines.append("")
-for _, row in metrics_df.iterrows():
-    report_lines.append(f"{row['Metric']:<20} | DS1: {row['Dataset_1']:<12} | DS2: {row['Dataset_2']}")
-report_lines.append("")
-
-report_lines.append("="*80)
-report_lines.append("COMMON PRODUCT CATEGORIES")
-report_lines.append("="*80)
-report_lines.append("")
-report_lines.append(f"Total common products (normalized): {len(common_products)}")
-report_lines.append("")
-report_lines.append("Category involvement in rules:")
-for _, row in keyword_df.iterrows():
-    report_lines.append(f"  {row['Keyword']:<15} | DS1: {row['Dataset_1_Rules']:>4} ({row['DS1_Percentage']:>6}) | "
-                       f"DS2: {row['Dataset_2_Rules']:>4} ({row['DS2_Percentage']:>6})")
-report_lines.append("")
-
-if len(common_patterns) > 0:
-    report_lines.append("="*80)
-    report_lines.append("OVERLAPPING PATTERNS (Top 10)")
-    report_lines.append("="*80)
-    report_lines.append("")
-
-    for i, (pattern, data) in enumerate(list(zip(common_patterns, comparison_data))[:10], 1):
-        report_lines.append(f"{i}. {data['Pattern']}")
-        report_lines.append(f"   DS1: Conf={data['DS1_Confidence']:.3f}, Lift={data['DS1_Lift']:.3f}, [{data['DS1_Segment']}]")
-        report_lines.append(f"   DS2: Conf={data['DS2_Confidence']:.3f}, Lift={data['DS2_Lift']:.3f}, [{data['DS2_Segment']}]")
-        report_lines.append("")
-
-report_lines.append("="*80)
-report_lines.append("TIME SEGMENT ANALYSIS")
-report_lines.append("="*80)
-report_lines.append("")
-for _, row in segment_df.iterrows():
-    report_lines.append(f"{row['Time_Segment']:<20} | DS1: {row['DS1_Rules']:>6} rules (avg conf: {row['DS1_Avg_Confidence']}) | "
-                       f"DS2: {row['DS2_Rules']:>6} rules (avg conf: {row['DS2_Avg_Confidence']})")
-report_lines.append("")
-
-report_lines.append("="*80)
-report_lines.append("INSIGHTS & CONCLUSIONS")
-report_lines.append("="*80)
-report_lines.append("")
-
-report_lines.append("SIMILARITIES:")
-report_lines.append("  • Both datasets show strong coffee + pastry associations")
-report_lines.append("  • Tea and chai products frequently appear in rules")
-report_lines.append("  • Scones, croissants, and biscotti are popular pairings")
-report_lines.append("  • Espresso-based drinks have high association potential")
-report_lines.append("")
-
-report_lines.append("DIFFERENCES:")
-report_lines.append("  • Dataset 1: Fewer rules (4) but based on single product pairs")
-report_lines.append("  • Dataset 2: Millions of rules due to larger basket sizes (11.87 avg items)")
-report_lines.append("  • Dataset 2 shows more complex multi-item associations")
-report_lines.append("  • Dataset 1 focused on specific strong patterns")
-report_lines.append("")
-
-report_lines.append("UNIVERSAL TRENDS:")
-report_lines.append("  ✓ Coffee + Pastry pairings are consistent across datasets")
-report_lines.append("  ✓ Tea varieties show strong association patterns")
-report_lines.append("  ✓ Time-of-day affects purchasing behavior (both datasets)")
-report_lines.append("  ✓ Weekday vs Weekend patterns differ (both datasets)")
-report_lines.append("")
-
-report_lines.append("RECOMMENDATION:")
-report_lines.append("  The analysis confirms that association rule mining is effective")
-report_lines.append("  for café inventory management. While specific product pairs may")
-report_lines.append("  differ, the overall pattern of complementary food and beverage")
-report_lines.append("  purchases is consistent across different café locations and times.")
-report_lines.append("")
-
-report_lines.append("="*80)
-
-# Save report
-report_text = "\n".join(report_lines)
-print(report_text)
-
-report_file = COMPARISON_DIR / "comparison_report.txt"
-with open(report_file, 'w') as f:
-    f.write(report_text)
+    comparison_report.lines([
+        "⚠️  LIMITED DIRECT OVERLAP: Few exact pattern matches",
+        "",
+        "Possible Reasons:",
+        "  • Different product offerings between locations",
+        "  • Different customer demographics or preferences",
+        "  • Different time periods (2019 vs 2023)",
+    ])
+
+comparison_report.banner("METRICS COMPARISON")
+comparison_report.lines([f"{metric:<20} | DS1: {ds1:<12} | DS2: {ds2}" for metric, ds1, ds2
+                         in zip(metrics_df['Metric'], metrics_df['Dataset_1'], metrics_df['Dataset_2'])])
+
+comparison_report.banner("COMMON PRODUCT CATEGORIES")
+comparison_report.lines([f"Total common products (normalized): {len(common_products)}"])
+comparison_report.lines(["Category involvement in rules:"] + [
+    f"  {row['Keyword']:<15} | DS1: {row['Dataset_1_Rules']:>4} ({row['DS1_Percentage']:>6}) | "
+    f"DS2: {row['Dataset_2_Rules']:>4} ({row['DS2_Percentage']:>6})"
+    for row in keyword_df.to_dict('records')])
+
+if n_common_patterns > 0:
+    comparison_report.banner("OVERLAPPING PATTERNS (Top 10)")
+    pattern_lines = []
+    for i, data in enumerate(comparison_data[:10], 1):
+        pattern_lines += [f"{i}. {data['Pattern']}",
+                          f"   DS1: Conf={data['DS1_Confidence']:.3f}, Lift={data['DS1_Lift']:.3f}, [{data['DS1_Segment']}]",
+                          f"   DS2: Conf={data['DS2_Confidence']:.3f}, Lift={data['DS2_Lift']:.3f}, [{data['DS2_Segment']}]",
+                          ""]
+    comparison_report.lines(pattern_lines[:-1])
+
+comparison_report.banner("TIME SEGMENT ANALYSIS")
+comparison_report.lines([
+    f"{row['Time_Segment']:<20} | DS1: {row['DS1_Rules']:>6} rules (avg conf: {row['DS1_Avg_Confidence']}) | "
+    f"DS2: {row['DS2_Rules']:>6} rules (avg conf: {row['DS2_Avg_Confidence']})"
+    for row in segment_comparison])
+
+comparison_report.banner("INSIGHTS & CONCLUSIONS")
+comparison_report.lines([
+    "SIMILARITIES:",
+    "  • Both datasets show strong coffee + pastry associations",
+    "  • Tea and chai products frequently appear in rules",
+    "  • Scones, croissants, and biscotti are popular pairings",
+    "  • Espresso-based drinks have high association potential",
+])
+comparison_report.lines([
+    "DIFFERENCES:",
+    "  • Dataset 1: Fewer rules (4) but based on single product pairs",
+    "  • Dataset 2: Millions of rules due to larger basket sizes (11.87 avg items)",
+    "  • Dataset 2 shows more complex multi-item associations",
+    "  • Dataset 1 focused on specific strong patterns",
+])
+comparison_report.lines([
+    "UNIVERSAL TRENDS:",
+    "  ✓ Coffee + Pastry pairings are consistent across datasets",
+    "  ✓ Tea varieties show strong association patterns",
+    "  ✓ Time-of-day affects purchasing behavior (both datasets)",
+    "  ✓ Weekday vs Weekend patterns differ (both datasets)",
+])
+comparison_report.lines([
+    "RECOMMENDATION:",
+    "  The analysis confirms that association rule mining is effective",
+    "  for café inventory management. While specific product pairs may",
+    "  differ, the overall pattern of complementary food and beverage",
+    "  purchases is consistent across different café locations and times.",
+])
+comparison_report.rule()
+
+# Save report as text, JSON and HTML
+print(comparison_report.to_text())
+report_file = comparison_report.save(COMPARISON_DIR / "comparison_report")['text']
 
 print()
-print(f"✓ Saved comparison report to: {report_file}")
+print(f"✓ Saved comparison report to: {report_file} (and .json, .html)")
+print()
+
+# Write the run report (ends Phase 8)
+report.save()
+print("Phase timings:")
+print(report.format_table())
+print(f"✓ Saved run report to: {report.output_file}")
 print()
 
 print("="*80)
@@ -511,5 +606,5 @@ print("  4. segment_comparison.csv - Time segment analysis")
 print("  5. 1_category_comparison.png - Category visualization")
 print("  6. 2_metrics_scatter.png - Confidence/Lift comparison (if overlaps exist)")
 print("  7. 3_confidence_distribution.png - Distribution comparison")
-print("  8. comparison_report.txt - Full text report")
+print("  8. comparison_report.txt - Full text report (also .json and .html)")
 print()
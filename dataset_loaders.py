@@ -0,0 +1,213 @@
+"""
+Schema-Declared Loaders for Both Datasets
+
+With default inference every product and store name is a separate Python
+string, and every number is int64 or float64. Every column is also read,
+whether the analysis uses it or not. Each source here has a declared
+schema. Only the listed columns are read, and each one is stored as:
+
+    category              product names, product types and categories, store
+                          locations (one small integer code per row plus one
+                          copy of each name)
+    int8 / int16 / int32  ids and quantities, sized to the data (a value
+                          outside the type's range raises instead of wrapping)
+    datetime / timedelta  dates and times of day, parsed while loading
+
+Categories are sorted by name, so groupby, sort_values and drop_duplicates
+give the same order as on the string columns. Groupbys on the category
+codes and merges on the narrow integer keys need less time and memory.
+
+    df_sales = load_sales_receipts(DATASET_PATH / SALES_FILE)
+    df_products = load_products(DATASET_PATH / PRODUCTS_FILE)
+    df = load_transactions(DATASET_PATH, sheet="Transactions")   # Dataset 1 workbook
+
+Dataset 1 is cast one streamed chunk at a time (iter_transactions), so the
+uncast sheet never exists as a whole frame.
+
+Usage:
+    python3 dataset_loaders.py              # memory of both datasets, inferred vs declared
+    python3 dataset_loaders.py --dataset 2
+"""
+
+import argparse
+import sys
+import time
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from xlsx_stream import CHUNK_ROWS, iter_transaction_chunks, read_transactions
+
+SALES_FILE = "201904 sales reciepts.csv"
+PRODUCTS_FILE = "product.csv"
+
+# Dataset 2: sales receipts (one row per line item)
+RECEIPTS_SCHEMA = {
+    'transaction_id': 'int32',
+    'transaction_date': 'datetime',
+    'transaction_time': 'timedelta',
+    'sales_outlet_id': 'int16',
+    'product_id': 'int16',
+    'quantity': 'int16',
+}
+
+# Dataset 2: product catalog
+PRODUCTS_SCHEMA = {
+    'product_id': 'int16',
+    'product_category': 'category',
+    'product_type': 'category',
+    'product': 'category',
+}
+
+# Dataset 1: Transactions sheet (dates and times are converted by xlsx_stream)
+TRANSACTIONS_SCHEMA = {
+    'transaction_date': 'datetime',
+    'transaction_time': 'timedelta',
+    'store_location': 'category',
+    'product_detail': 'category',
+    'transaction_qty': 'int16',
+    'product_type': 'category',
+    'product_category': 'category',
+}
+
+
+def _cast_integer(values, dtype, column):
+    """Integer column in a narrower type, refusing values that do not fit"""
+    limits = np.iinfo(dtype)
+    if len(values) and (values.min() < limits.min or values.max() > limits.max):
+        raise ValueError(f"Column '{column}' has values outside the {dtype} range "
+                         f"[{limits.min}, {limits.max}]; widen its schema entry")
+    return values.astype(dtype)
+
+
+def apply_schema(df, schema):
+    """
+    Cast the schema's columns of df in place
+
+    Args:
+        df: Frame with (at least) the schema's columns
+        schema: column → 'category', 'datetime', 'timedelta' or an integer dtype name
+
+    Returns:
+        df
+    """
+    for column, dtype in schema.items():
+        values = df[column]
+        if dtype == 'category':
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                df[column] = values.astype('category')
+        elif dtype == 'datetime':
+            if not pd.api.types.is_datetime64_any_dtype(values):
+                df[column] = pd.to_datetime(values)
+        elif dtype == 'timedelta':
+            if not pd.api.types.is_timedelta64_dtype(values):
+                df[column] = pd.to_timedelta(values.astype(str))
+        else:
+            df[column] = _cast_integer(values, dtype, column)
+    return df
+
+
+def read_csv_schema(path, schema):
+    """Read only the schema's columns of a CSV file, in the declared types"""
+    categories = {c: 'category' for c, t in schema.items() if t == 'category'}
+    dates = [c for c, t in schema.items() if t == 'datetime']
+    df = pd.read_csv(path, usecols=list(schema), dtype=categories, parse_dates=dates)
+    return apply_schema(df[list(schema)], schema)
+
+
+def load_sales_receipts(path):
+    """Dataset 2 line items (RECEIPTS_SCHEMA)"""
+    return read_csv_schema(path, RECEIPTS_SCHEMA)
+
+
+def load_products(path):
+    """Dataset 2 product catalog (PRODUCTS_SCHEMA)"""
+    return read_csv_schema(path, PRODUCTS_SCHEMA)
+
+
+def iter_transactions(path, sheet="Transactions", schema=TRANSACTIONS_SCHEMA, chunk_rows=CHUNK_ROWS):
+    """Dataset 1 line items streamed from the workbook, each chunk cast to the schema"""
+    return iter_transaction_chunks(path, sheet, tuple(schema), chunk_rows,
+                                   convert=partial(apply_schema, schema=schema))
+
+
+def load_transactions(path, sheet="Transactions", schema=TRANSACTIONS_SCHEMA, chunk_rows=CHUNK_ROWS):
+    """Dataset 1 line items, cast chunk by chunk while streaming and then joined"""
+    return read_transactions(path, sheet, tuple(schema), chunk_rows,
+                             convert=partial(apply_schema, schema=schema))
+
+
+def frame_memory_mb(df):
+    """Memory of a frame including string contents, in MB"""
+    return df.memory_usage(deep=True).sum() / 1024**2
+
+
+def _default_paths():
+    here = Path(__file__).parent
+    cache = Path.home() / ".cache/kagglehub/datasets"
+    workbook = "Coffee Shop Sales Dashboard by Alfi Aziz.xlsx"
+    dataset1 = here / workbook
+    if not dataset1.exists():
+        dataset1 = cache / "alfiaziz003/coffee-shop-sales-dashboard-by-alfi-aziz/versions/1" / workbook
+    return dataset1, cache / "ylchang/coffee-shop-sample-data-1113/versions/1"
+
+
+def _time_groupby(df, keys):
+    start = time.perf_counter()
+    df.groupby(keys, sort=True, observed=True).size()
+    return time.perf_counter() - start
+
+
+def _compare(name, inferred, declared, keys):
+    """Print memory and groupby time of the inferred and declared frames"""
+    before, after = frame_memory_mb(inferred), frame_memory_mb(declared)
+    print(f"{name}: {len(declared):,} rows")
+    print(f"  - Inferred types: {len(inferred.columns)} columns, {before:.1f} MB")
+    print(f"  - Declared schema: {len(declared.columns)} columns, {after:.1f} MB "
+          f"({before / after:.1f}x smaller)")
+    print(f"  - groupby {keys}: {_time_groupby(inferred, keys) * 1000:.1f} ms → "
+          f"{_time_groupby(declared, keys) * 1000:.1f} ms")
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Compare inferred and schema-declared dataset loading")
+    parser.add_argument('--dataset', choices=['1', '2', 'both'], default='both')
+    parser.add_argument('--dataset1', type=Path, default=None, help="Dataset 1 workbook path")
+    parser.add_argument('--dataset2', type=Path, default=None, help="Dataset 2 directory")
+    args = parser.parse_args(argv)
+
+    default1, default2 = _default_paths()
+    dataset1, dataset2 = args.dataset1 or default1, args.dataset2 or default2
+
+    print("="*80)
+    print("SCHEMA-DECLARED DATASET LOADING")
+    print("="*80)
+
+    if args.dataset in ('1', 'both'):
+        if not dataset1.exists():
+            print(f"❌ ERROR: {dataset1} not found.")
+            return 1
+        inferred = read_transactions(dataset1, columns=tuple(TRANSACTIONS_SCHEMA))
+        declared = load_transactions(dataset1)
+        _compare("Dataset 1 (Transactions sheet)", inferred, declared, ['store_location', 'product_detail'])
+        print()
+
+    if args.dataset in ('2', 'both'):
+        sales_file, products_file = dataset2 / SALES_FILE, dataset2 / PRODUCTS_FILE
+        if not sales_file.exists() or not products_file.exists():
+            print(f"❌ ERROR: {dataset2} does not contain {SALES_FILE} and {PRODUCTS_FILE}.")
+            return 1
+        inferred = pd.read_csv(sales_file).merge(pd.read_csv(products_file)[['product_id', 'product']],
+                                                 on='product_id', how='left')
+        declared = load_sales_receipts(sales_file).merge(load_products(products_file)[['product_id', 'product']],
+                                                         on='product_id', how='left')
+        _compare("Dataset 2 (sales receipts + products)", inferred, declared, ['sales_outlet_id', 'product'])
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
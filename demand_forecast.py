@@ -0,0 +1,196 @@
+"""
+Vectorized Demand Forecasting per Product × Time Segment × Store
+
+Builds on the segmented line items of Phase 3. Units sold are aggregated into
+one daily series per (store_location, time_segment, product). The series are
+stacked into a single 2-D NumPy array, so every forecasting method runs on
+all series at once instead of looping over products:
+
+    seasonal   day-of-week mean (the segment's weekday or weekend days)
+    moving     mean of the last MOVING_WINDOW observed days
+    smoothing  simple exponential smoothing, alpha picked per series from a
+               grid by one-step-ahead squared error
+
+A Weekday segment can only sell on weekdays, so each series is only observed
+on the days of its own day type. Each method is backtested on the last
+BACKTEST_DAYS observations of every series. The method with the lowest
+backtest MAE is used for that series' forecast over the next HORIZON_DAYS
+calendar days.
+
+Line items with a missing store, segment, product or date (e.g. a sale whose
+product_id is not in the product catalog) cannot be placed in a series; they
+are skipped and counted.
+"""
+
+import numpy as np
+import pandas as pd
+
+HORIZON_DAYS = 7
+MOVING_WINDOW = 4
+BACKTEST_DAYS = 4
+SMOOTHING_ALPHAS = np.array([0.1, 0.2, 0.3, 0.5, 0.7, 0.9])
+METHODS = ('seasonal', 'moving', 'smoothing')
+FORECAST_COLUMNS = ['store_location', 'time_segment', 'product', 'forecast_date',
+                    'expected_units', 'method', 'backtest_mae']
+
+
+def demand_matrix(df, item_column, qty_column, store_column='store_location',
+                  datetime_column='transaction_datetime'):
+    """
+    Daily units per (store, segment, product) series as a dense array
+
+    Returns:
+        tuple (series, dates, Y, skipped): series is a DataFrame of series
+        keys, dates the calendar days, Y an n_series × n_days float array and
+        skipped the number of line items left out for a missing key or date
+    """
+    valid = df[[store_column, 'time_segment', item_column, datetime_column]].notna().all(axis=1)
+    skipped = int((~valid).sum())
+    if skipped:
+        df = df[valid]
+    if len(df) == 0:
+        series = pd.DataFrame(columns=['store_location', 'time_segment', 'product'])
+        return series, pd.DatetimeIndex([]), np.zeros((0, 0)), skipped
+
+    grouped = df.groupby([store_column, 'time_segment', item_column], sort=True, observed=True)
+    series_id = grouped.ngroup().to_numpy()
+    series = grouped.size().index.to_frame(index=False)
+    series.columns = ['store_location', 'time_segment', 'product']
+
+    days = df[datetime_column].dt.normalize()
+    start = days.min()
+    dates = pd.date_range(start, days.max(), freq='D')
+    day_id = ((days - start) // pd.Timedelta(days=1)).to_numpy()
+
+    flat = np.bincount(series_id * len(dates) + day_id,
+                       weights=df[qty_column].to_numpy(dtype=float),
+                       minlength=len(series) * len(dates))
+    return series, dates, flat.reshape(len(series), len(dates)), skipped
+
+
+def seasonal_forecast(Y, dow, target_dow):
+    """Per-series mean of each day of week, evaluated at target_dow"""
+    onehot = (dow[:, None] == np.arange(7)).astype(float)
+    counts = onehot.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = (Y @ onehot) / counts
+    # A day of week never observed falls back to the overall mean
+    means = np.where(counts > 0, means, Y.mean(axis=1, keepdims=True))
+    return means[:, target_dow]
+
+
+def moving_average_forecast(Y, n_steps, window=MOVING_WINDOW):
+    """Mean of the last `window` observations, repeated n_steps ahead"""
+    level = Y[:, -window:].mean(axis=1)
+    return np.repeat(level[:, None], n_steps, axis=1)
+
+
+def exponential_smoothing_forecast(Y, n_steps, alphas=SMOOTHING_ALPHAS):
+    """
+    Simple exponential smoothing with the best alpha per series
+
+    Loops over time only; every alpha and series is updated in one array op.
+
+    Returns:
+        tuple (forecast, best_alpha)
+    """
+    level = np.repeat(Y[None, :, 0], len(alphas), axis=0)
+    sse = np.zeros_like(level)
+    a = alphas[:, None]
+    for t in range(1, Y.shape[1]):
+        error = Y[None, :, t] - level
+        sse += error ** 2
+        level += a * error
+    best = np.argmin(sse, axis=0)
+    final = level[best, np.arange(Y.shape[0])]
+    return np.repeat(final[:, None], n_steps, axis=1), alphas[best]
+
+
+def _forecast_all(Y, dow, target_dow):
+    """Forecasts of every method for the target days, shape (method, series, step)"""
+    n_steps = len(target_dow)
+    smoothing, alpha = exponential_smoothing_forecast(Y, n_steps)
+    return np.stack([seasonal_forecast(Y, dow, target_dow),
+                     moving_average_forecast(Y, n_steps),
+                     smoothing]), alpha
+
+
+def forecast_series(Y, dow, future_dow, backtest_days=BACKTEST_DAYS):
+    """
+    Backtest every method, then forecast with the best one per series
+
+    Args:
+        Y: n_series × n_obs units on the observed days
+        dow: Day of week of each observed day
+        future_dow: Day of week of each day to forecast
+
+    Returns:
+        dict with 'forecast' (n_series × n_future), 'method' (index into
+        METHODS per series), 'mae' (backtest MAE of the chosen method) and
+        'alpha' (smoothing alpha per series)
+    """
+    n_series, n_obs = Y.shape
+    holdout = min(backtest_days, n_obs // 4)
+    if holdout >= 1:
+        backtest, _ = _forecast_all(Y[:, :-holdout], dow[:-holdout], dow[-holdout:])
+        mae = np.abs(backtest - Y[None, :, -holdout:]).mean(axis=2)
+    else:
+        mae = np.zeros((len(METHODS), n_series))
+    method = np.argmin(mae, axis=0)
+
+    forecasts, alpha = _forecast_all(Y, dow, future_dow)
+    forecast = forecasts[method, np.arange(n_series)]
+    return {'forecast': forecast, 'method': method,
+            'mae': mae[method, np.arange(n_series)], 'alpha': alpha}
+
+
+def forecast_demand(df, item_column, qty_column, store_column='store_location',
+                    datetime_column='transaction_datetime', horizon=HORIZON_DAYS):
+    """
+    Expected unit demand per store, time segment and product for the next days
+
+    Args:
+        df: Segmented line items (Phase 3 output) with a time_segment column
+        item_column: Product name column
+        qty_column: Units sold per line item
+        store_column: Store identifier column
+        horizon: Calendar days to forecast after the last observed day
+
+    Returns:
+        tuple (forecast, skipped): forecast is a DataFrame with FORECAST_COLUMNS,
+        skipped the number of line items without a store, segment, product or date
+    """
+    series, dates, Y, skipped = demand_matrix(df, item_column, qty_column, store_column, datetime_column)
+    if len(dates) == 0:
+        return pd.DataFrame(columns=FORECAST_COLUMNS), skipped
+    date_weekend = dates.dayofweek.to_numpy() >= 5
+    future = pd.date_range(dates[-1] + pd.Timedelta(days=1), periods=horizon, freq='D')
+    future_weekend = future.dayofweek.to_numpy() >= 5
+    series_weekend = series['time_segment'].str.endswith('_Weekend').to_numpy()
+
+    frames = []
+    for weekend in (False, True):
+        rows = np.flatnonzero(series_weekend == weekend)
+        cols = np.flatnonzero(date_weekend == weekend)
+        future_cols = np.flatnonzero(future_weekend == weekend)
+        if len(rows) == 0 or len(cols) == 0 or len(future_cols) == 0:
+            continue
+
+        # Only the days of the segment's own day type are observations
+        result = forecast_series(Y[np.ix_(rows, cols)], dates.dayofweek.to_numpy()[cols],
+                                 future.dayofweek.to_numpy()[future_cols])
+
+        n_future = len(future_cols)
+        keys = series.iloc[rows].reset_index(drop=True)
+        frame = keys.loc[keys.index.repeat(n_future)].reset_index(drop=True)
+        frame['forecast_date'] = np.tile(future[future_cols].to_numpy(), len(rows))
+        frame['expected_units'] = np.round(np.maximum(result['forecast'], 0).ravel(), 2)
+        frame['method'] = np.repeat(np.array(METHODS)[result['method']], n_future)
+        frame['backtest_mae'] = np.repeat(np.round(result['mae'], 3), n_future)
+        frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame(columns=FORECAST_COLUMNS), skipped
+    forecast = pd.concat(frames, ignore_index=True).sort_values(
+        ['forecast_date', 'store_location', 'time_segment', 'product'], ignore_index=True)
+    return forecast, skipped
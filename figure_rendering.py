@@ -0,0 +1,84 @@
+"""
+Parallel Figure Rendering
+
+Renders independent matplotlib figures in a process pool using the headless
+Agg backend. Each figure is a plain function taking (data..., output_file,
+profile) that draws one figure and saves it with save_figure.
+
+Profiles:
+    full     dpi=300 with a tight bounding-box pass (the published output)
+    preview  dpi=100 and no tight-bbox pass, for quick iteration
+
+Worker processes are forked so they share the calling script's state without
+re-importing it. On platforms without fork, figures render sequentially in
+the calling process.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib.pyplot as plt
+
+PROFILES = {
+    'full': {'dpi': 300, 'bbox_inches': 'tight'},
+    'preview': {'dpi': 100, 'bbox_inches': None},
+}
+
+
+def save_figure(fig, output_file, profile='full'):
+    """Save a figure with the settings of the given profile and close it"""
+    fig.savefig(output_file, **PROFILES[profile])
+    plt.close(fig)
+
+
+def _init_worker():
+    """Make sure workers never touch a GUI backend"""
+    plt.switch_backend('Agg')
+
+
+def _render(func, output_file, profile, kwargs):
+    func(output_file=output_file, profile=profile, **kwargs)
+    return output_file
+
+
+def render_figures(tasks, profile='full', workers=None):
+    """
+    Render independent figures, in parallel where possible
+
+    Args:
+        tasks: List of (description, func, output_file, kwargs) tuples; each
+               func is called as func(output_file=..., profile=..., **kwargs)
+        profile: 'full' or 'preview'
+        workers: Worker processes (default: one per CPU, capped at the number
+                 of figures); 1 renders sequentially in this process
+
+    Returns:
+        list: Output files in task order
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown render profile '{profile}' (expected one of {', '.join(PROFILES)})")
+
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+        plt.switch_backend('Agg')
+        for description, func, output_file, kwargs in tasks:
+            print(f"Creating {description}...")
+            _render(func, output_file, profile, kwargs)
+            print(f"✓ Saved: {output_file}")
+        return [task[2] for task in tasks]
+
+    print(f"Rendering {len(tasks)} figures with {workers} worker processes ({profile} profile)...")
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker) as pool:
+        futures = {}
+        for description, func, output_file, kwargs in tasks:
+            print(f"Creating {description}...")
+            futures[pool.submit(_render, func, output_file, profile, kwargs)] = output_file
+
+        # Surface the first failure instead of waiting on the rest
+        for future in as_completed(futures):
+            print(f"✓ Saved: {future.result()}")
+
+    return [task[2] for task in tasks]
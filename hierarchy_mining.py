@@ -0,0 +1,259 @@
+"""
+Multi-Level Mining over the Product Hierarchy
+
+Rules are normally mined at product_detail level, where sizes and variants
+split the demand for one product across several SKUs. This script also mines
+the two parent levels of the hierarchy stored with the items in rules.db:
+
+    product_detail  →  product_type  →  product_category
+    Latte Rg            Latte [type]      Coffee [category]
+
+Each basket's detail item codes are projected through code → parent lookup
+arrays, so parent baskets come from the ID arrays alone and the raw line
+items are never grouped again. A basket holds an item and its ancestors
+together, which gives cross-level rules such as "Croissant → Coffee
+[category]". Itemsets that contain an item together with one of its own
+ancestors are never generated as candidates, since such rules are true by
+construction; only level-wise Apriori candidates are counted
+(itemset_counts.py), so the wider baskets do not multiply the work. As in the
+analysis scripts, single-item baskets are left out, so the detail → detail
+rules are the ones in association_rules_by_segment.csv.
+
+It works from the baskets and hierarchy saved in <results>/rules.db, so run
+the analysis script once first.
+
+Outputs (in the results directory):
+    hierarchy_rules.csv     rules with the level of each side and a
+                            Cross_Level flag
+    hierarchy_summary.csv   items, frequent items and rules per segment and
+                            level, with the best single-item support
+
+Usage:
+    python3 hierarchy_mining.py apriori_results
+    python3 hierarchy_mining.py apriori_results_new --min-support 0.05
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from itemset_counts import (MAX_LEN, basket_matrix, encode_items, export_rules, levelwise_counts,
+                            rules_from_counts)
+from rule_database import load_baskets, load_hierarchy
+
+MIN_SUPPORT = 0.02
+MIN_CONFIDENCE = 0.40
+MIN_SEGMENT_BASKETS = 10  # Same cut-off as the analysis scripts
+LEVELS = ('detail', 'type', 'category')
+PARENT_COLUMNS = {'type': 'product_type', 'category': 'product_category'}
+
+
+def level_vocabulary(vocabulary, hierarchy):
+    """
+    One code space for all three levels
+
+    Returns:
+        tuple (names, levels, parents): names and levels per code (detail
+        codes first, then types, then categories), and parents[level] maps a
+        detail code to its ancestor's code at that level (-1 when unknown)
+    """
+    detail = pd.Index(vocabulary)
+    parents_frame = hierarchy.reindex(detail)
+    names, levels, parents = list(detail), ['detail'] * len(detail), {}
+    for level in LEVELS[1:]:
+        column = parents_frame[PARENT_COLUMNS[level]]
+        codes, uniques = pd.factorize(column, sort=True)
+        parents[level] = np.where(codes >= 0, codes + len(names), -1)
+        names.extend(f"{name} [{level}]" for name in uniques)
+        levels.extend([level] * len(uniques))
+    return np.asarray(names, dtype=object), np.asarray(levels, dtype=object), parents
+
+
+def project_baskets(codes, parents):
+    """
+    Add every item's ancestors to its basket, working on flat code arrays
+
+    Args:
+        codes: List of sorted detail code tuples (encode_items)
+        parents: Detail code → ancestor code arrays per level
+
+    Returns:
+        List of sorted code tuples with detail, type and category items
+    """
+    sizes = np.fromiter((len(b) for b in codes), dtype=np.int64, count=len(codes))
+    flat = np.fromiter((c for b in codes for c in b), dtype=np.int64, count=int(sizes.sum()))
+    owner = np.repeat(np.arange(len(codes)), sizes)
+
+    all_owner, all_codes = [owner], [flat]
+    for level in LEVELS[1:]:
+        projected = parents[level][flat]
+        known = projected >= 0
+        all_owner.append(owner[known])
+        all_codes.append(projected[known])
+    owner = np.concatenate(all_owner)
+    flat = np.concatenate(all_codes)
+
+    # One copy of each ancestor per basket, sorted by basket then code
+    width = int(flat.max()) + 1 if len(flat) else 1
+    keys = np.unique(owner * width + flat)
+    owner, flat = keys // width, keys % width
+    bounds = np.searchsorted(owner, np.arange(len(codes) + 1))
+    return [tuple(flat[bounds[i]:bounds[i + 1]].tolist()) for i in range(len(codes))]
+
+
+def without_ancestors(parents, n_detail):
+    """
+    Candidate filter rejecting itemsets with an item and one of its own ancestors
+
+    Subsets of an accepted itemset are accepted too, so Apriori generation
+    with this filter finds every frequent itemset without such a pair.
+    """
+    ancestors = [set(int(parents[level][c]) for level in LEVELS[1:]) - {-1} for c in range(n_detail)]
+    type_parent = {}
+    for c in range(n_detail):
+        if parents['type'][c] >= 0 and parents['category'][c] >= 0:
+            type_parent.setdefault(int(parents['type'][c]), set()).add(int(parents['category'][c]))
+
+    def keep(itemset):
+        members = set(itemset)
+        for item in itemset:
+            related = ancestors[item] if item < n_detail else type_parent.get(item, ())
+            if members.intersection(related):
+                return False
+        return True
+    return keep
+
+
+def side_level(itemsets, level_of):
+    """Level name of each rule side, or 'mixed' when its items span levels"""
+    result = []
+    for itemset in itemsets:
+        found = {level_of[name] for name in itemset}
+        result.append(found.pop() if len(found) == 1 else 'mixed')
+    return result
+
+
+def mine_hierarchy(baskets, hierarchy, min_support=MIN_SUPPORT, min_confidence=MIN_CONFIDENCE,
+                   max_len=MAX_LEN):
+    """
+    Mine detail, type and category items together per time segment
+
+    Returns:
+        tuple (rules, summary): mlxtend-style rules with time_segment,
+        antecedent_level, consequent_level and cross_level columns, and one
+        summary row per segment and level
+    """
+    # Like the analysis scripts, only multi-item baskets are mined
+    baskets = baskets[baskets['items'].apply(len) > 1].reset_index(drop=True)
+    codes, vocabulary = encode_items(baskets['items'])
+    names, levels, parents = level_vocabulary(vocabulary, hierarchy)
+    extended = project_baskets(codes, parents)
+    level_of = dict(zip(names, levels))
+    keep = without_ancestors(parents, len(vocabulary))
+
+    all_rules, summary = [], []
+    for segment, rows in baskets.groupby('time_segment', sort=True).groups.items():
+        segment_baskets = [extended[i] for i in rows]
+        n_baskets = len(segment_baskets)
+        if n_baskets < MIN_SEGMENT_BASKETS:
+            continue
+        itemsets, part_counts, _ = levelwise_counts(basket_matrix(segment_baskets, len(names)),
+                                                    [min_support * n_baskets], max_len=max_len, keep=keep)
+        counts = dict(zip(itemsets, part_counts[0].tolist()))
+        _, rules = rules_from_counts(counts, n_baskets, min_support, min_confidence, names)
+
+        single_counts = np.zeros(len(names))
+        for itemset, n in counts.items():
+            if len(itemset) == 1:
+                single_counts[itemset[0]] = n
+        if len(rules):
+            rules['time_segment'] = segment
+            rules['antecedent_level'] = side_level(rules['antecedents'], level_of)
+            rules['consequent_level'] = side_level(rules['consequents'], level_of)
+            rules['cross_level'] = ((rules['antecedent_level'] != rules['consequent_level'])
+                                    | (rules['antecedent_level'] == 'mixed'))
+            all_rules.append(rules)
+        for level in LEVELS:
+            seen = single_counts[(levels == level) & (single_counts > 0)]
+            sides = (rules['antecedent_level'], rules['consequent_level']) if len(rules) else None
+            summary.append({
+                'time_segment': segment,
+                'level': level,
+                'baskets': n_baskets,
+                'items': len(seen),
+                'frequent_items': int((seen >= min_support * n_baskets).sum()),
+                'max_item_support': seen.max() / n_baskets if len(seen) else 0.0,
+                'rules': 0 if sides is None else int(((sides[0] == level) & (sides[1] == level)).sum()),
+                'cross_level_rules': 0 if sides is None else int(
+                    (rules['cross_level'] & ((sides[0] == level) | (sides[1] == level))).sum()),
+            })
+
+    columns = ['antecedents', 'consequents', 'support', 'confidence', 'lift', 'time_segment',
+               'antecedent_level', 'consequent_level', 'cross_level']
+    rules = pd.concat(all_rules, ignore_index=True) if all_rules else pd.DataFrame(columns=columns)
+    return rules, pd.DataFrame(summary)
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Mine rules across the product hierarchy")
+    parser.add_argument('results_dir', type=Path, help="analysis output directory containing rules.db")
+    parser.add_argument('--min-support', type=float, default=MIN_SUPPORT)
+    parser.add_argument('--min-confidence', type=float, default=MIN_CONFIDENCE)
+    parser.add_argument('--max-len', type=int, default=MAX_LEN,
+                        help="largest itemset size counted (default: every size that can be frequent)")
+    args = parser.parse_args(argv)
+
+    db_file = args.results_dir / "rules.db"
+    if not db_file.exists():
+        print(f"❌ ERROR: {db_file} not found. Run the analysis script for this dataset first.")
+        return 1
+    hierarchy = load_hierarchy(db_file)
+    if hierarchy['product_type'].isna().all():
+        print(f"❌ ERROR: {db_file} has no product hierarchy. Re-run the analysis script to store it.")
+        return 1
+    baskets = load_baskets(db_file)
+
+    print("="*80)
+    print(f"MULTI-LEVEL MINING: {hierarchy['product_type'].nunique()} types, "
+          f"{hierarchy['product_category'].nunique()} categories")
+    print("="*80)
+
+    start = time.perf_counter()
+    rules, summary = mine_hierarchy(baskets, hierarchy, args.min_support, args.min_confidence, args.max_len)
+    elapsed = time.perf_counter() - start
+    print(f"✓ Mined {summary['time_segment'].nunique()} segments across {len(LEVELS)} levels in {elapsed:.2f}s")
+    print()
+
+    print("Frequent items per level and segment:")
+    print(summary.pivot(index='time_segment', columns='level', values='frequent_items')[list(LEVELS)].to_string())
+    print()
+    if len(rules):
+        kinds = rules['antecedent_level'] + ' → ' + rules['consequent_level']
+        print("Rules by level:")
+        for kind, count in kinds.value_counts().items():
+            print(f"  - {kind}: {count:,}")
+        print(f"✓ {int(rules['cross_level'].sum()):,} cross-level rules out of {len(rules):,}")
+    else:
+        print("⚠️  No rules at any level")
+    print()
+
+    rules_file = args.results_dir / "hierarchy_rules.csv"
+    export = export_rules(rules)
+    export['Antecedent_Level'] = rules['antecedent_level'].to_numpy()
+    export['Consequent_Level'] = rules['consequent_level'].to_numpy()
+    export['Cross_Level'] = rules['cross_level'].to_numpy()
+    export.to_csv(rules_file, index=False)
+    summary_file = args.results_dir / "hierarchy_summary.csv"
+    summary.to_csv(summary_file, index=False)
+    print(f"✓ Saved multi-level rules to: {rules_file}")
+    print(f"✓ Saved level summary to: {summary_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""
+Exact Itemset Counts for Groups of Baskets that Can Be Added and Subtracted
+
+Apriori recounts everything on every call. When the same baskets are mined
+in overlapping groups (sliding time windows, store shards, chain totals),
+it is cheaper to count the baskets once per part and combine the counts:
+
+    window   = sum of its weeks' counts      (add entering, subtract leaving)
+    chain    = sum of every store's counts
+
+Only Apriori candidates are counted, never every subset of every basket.
+levelwise_counts() works one itemset size at a time: size-k candidates are
+the union, over all groups, of apriori-gen applied to the group's frequent
+(k-1)-itemsets, and each candidate is counted in every part. An itemset that
+is frequent in any group is therefore counted exactly in every part, and
+counting stops when no group has a candidate left. Frequent itemsets and
+rules are then read off the combined counts and are the same as mlxtend's
+apriori on the group (no size limit unless max_len is given).
+
+Counting runs on a basket × item boolean matrix, a block of candidates at a
+time (count_candidates, shared with son_mining.py).
+"""
+
+import numpy as np
+import pandas as pd
+from mlxtend.frequent_patterns import association_rules
+
+MAX_LEN = None  # No cap: count until no candidates remain
+COUNT_CHUNK_CELLS = 50_000_000  # Boolean cells per candidate-counting block
+
+
+def encode_items(items):
+    """
+    Integer-code a Series of baskets with one shared vocabulary
+
+    Returns:
+        tuple (codes, vocabulary): codes is a list of sorted, de-duplicated
+        tuples of item codes; vocabulary maps code → item name
+    """
+    exploded = items.explode()
+    codes, vocabulary = pd.factorize(exploded, sort=True)
+    owner = exploded.index.to_numpy()
+    frame = pd.DataFrame({'owner': owner, 'code': codes})
+    frame = frame[frame['code'] >= 0].drop_duplicates().sort_values(['owner', 'code'])
+    grouped = frame.groupby('owner', sort=False)['code'].agg(tuple)
+    basket_codes = grouped.reindex(items.index).tolist()
+    return [b if isinstance(b, tuple) else () for b in basket_codes], vocabulary
+
+
+def basket_matrix(baskets, n_items):
+    """Boolean basket × item matrix of baskets given as code tuples"""
+    X = np.zeros((len(baskets), n_items), dtype=bool)
+    lengths = [len(b) for b in baskets]
+    if sum(lengths):
+        X[np.repeat(np.arange(len(baskets)), lengths), np.concatenate(baskets)] = True
+    return X
+
+
+def count_candidates(X, candidates, parts=None, n_parts=1):
+    """
+    Number of baskets containing each candidate itemset
+
+    Args:
+        X: Boolean basket × item matrix
+        candidates: List of code tuples
+        parts: Optional part index of every basket (e.g. its week)
+
+    Returns:
+        int64 array with one count per candidate, or an n_parts × candidates
+        array when parts is given
+    """
+    if parts is not None:
+        order = np.argsort(parts, kind='stable')
+        X = X[order]
+        present, starts = np.unique(np.asarray(parts)[order], return_index=True)
+    counts = np.zeros((n_parts if parts is not None else 1, len(candidates)), dtype=np.int64)
+    by_size = {}
+    for index, itemset in enumerate(candidates):
+        by_size.setdefault(len(itemset), []).append(index)
+    for k, indices in by_size.items():
+        columns = np.array([candidates[i] for i in indices], dtype=np.int64)
+        step = max(1, COUNT_CHUNK_CELLS // max(X.shape[0] * k, 1))
+        for start in range(0, len(indices), step):
+            contained = np.all(X[:, columns[start:start + step]], axis=2)
+            block = indices[start:start + step]
+            if parts is None:
+                counts[0, block] = contained.sum(axis=0)
+            elif len(present):
+                counts[np.ix_(present, block)] = np.add.reduceat(contained, starts, axis=0, dtype=np.int64)
+    return counts if parts is not None else counts[0]
+
+
+def apriori_gen(frequent, keep=None):
+    """
+    (k+1)-item candidates from sorted frequent k-item tuples
+
+    Two itemsets sharing their first k-1 items are joined, and the result is
+    kept only if every k-item subset is frequent (and keep(candidate) holds).
+    """
+    frequent = sorted(frequent)
+    known = set(frequent)
+    by_prefix = {}
+    for itemset in frequent:
+        by_prefix.setdefault(itemset[:-1], []).append(itemset[-1])
+    candidates = []
+    for prefix, lasts in by_prefix.items():
+        for i, a in enumerate(lasts):
+            for b in lasts[i + 1:]:
+                candidate = prefix + (a, b)
+                if all(candidate[:j] + candidate[j + 1:] in known for j in range(len(prefix))) and (
+                        keep is None or keep(candidate)):
+                    candidates.append(candidate)
+    return candidates
+
+
+def levelwise_counts(X, min_counts, parts=None, groups=None, max_len=MAX_LEN, keep=None):
+    """
+    Counts of every Apriori candidate of any group, per part
+
+    Args:
+        X: Boolean basket × item matrix
+        min_counts: Minimum basket count of each group (inf: not mined)
+        parts: Part index of every basket (None: one part)
+        groups: n_groups × n_parts 0/1 matrix of the parts summed into each
+                group (None: one group of all parts)
+        max_len: Largest itemset size counted (None: until no candidates remain)
+        keep: Optional predicate that rejects candidates of two or more items
+
+    Returns:
+        tuple (itemsets, part_counts, capped): itemsets are code tuples by
+        size then code, part_counts is n_parts × itemsets, and capped is True
+        when max_len stopped candidates that some group would have counted
+    """
+    if groups is not None:
+        groups = np.asarray(groups, dtype=np.int64)
+        n_parts = groups.shape[1]
+    else:
+        n_parts = 1 if parts is None else int(np.max(parts, initial=-1)) + 1
+        groups = np.ones((1, n_parts), dtype=np.int64)
+    if parts is None:
+        parts = np.zeros(X.shape[0], dtype=np.int64)
+    min_counts = np.asarray(min_counts, dtype=np.float64).reshape(-1, 1)
+
+    candidates = [(int(i),) for i in np.flatnonzero(X.any(axis=0))]
+    itemsets, blocks, k, capped = [], [], 1, False
+    while candidates:
+        if max_len is not None and k > max_len:
+            capped = True
+            break
+        part_counts = count_candidates(X, candidates, parts, n_parts)
+        itemsets.extend(candidates)
+        blocks.append(part_counts)
+        frequent = (groups @ part_counts) >= min_counts
+        next_candidates = set()
+        seen = set()
+        for row in frequent:
+            members = tuple(np.flatnonzero(row).tolist())
+            if len(members) > 1 and members not in seen:
+                seen.add(members)
+                next_candidates.update(apriori_gen([candidates[i] for i in members], keep))
+        candidates = sorted(next_candidates)
+        k += 1
+    part_counts = np.hstack(blocks) if blocks else np.zeros((n_parts, 0), dtype=np.int64)
+    return itemsets, part_counts, capped
+
+
+def largest_frequent(itemsets, counts, min_count):
+    """Size of the largest itemset whose count reaches min_count (0 if none)"""
+    sizes = [len(i) for i, c in zip(itemsets, counts) if c >= min_count]
+    return max(sizes, default=0)
+
+
+def frequent_from_counts(counts, n_baskets, min_support, vocabulary):
+    """
+    Frequent itemsets in mlxtend's apriori format
+
+    Args:
+        counts: Mapping of itemset code tuple → basket count
+
+    Returns:
+        DataFrame with 'support' and 'itemsets' (frozensets of item names)
+    """
+    if n_baskets == 0:
+        return pd.DataFrame(columns=['support', 'itemsets'])
+    min_count = min_support * n_baskets
+    frequent = [(count / n_baskets, itemset) for itemset, count in counts.items() if count >= min_count]
+    names = np.asarray(vocabulary, dtype=object)
+    frame = pd.DataFrame({
+        'support': [s for s, _ in frequent],
+        'itemsets': [frozenset(names[list(itemset)]) for _, itemset in frequent],
+    })
+    # Same ordering as apriori: by itemset size, then first appearance
+    order = np.argsort([len(i) for i in frame['itemsets']], kind='stable')
+    return frame.iloc[order].reset_index(drop=True)
+
+
+def rules_from_counts(counts, n_baskets, min_support, min_confidence, vocabulary):
+    """
+    Frequent itemsets and association rules from combined counts
+
+    Returns:
+        tuple (frequent_itemsets, rules); rules is empty when no itemset of
+        two or more items is frequent
+    """
+    itemsets = frequent_from_counts(counts, n_baskets, min_support, vocabulary)
+    if len(itemsets) == 0 or itemsets['itemsets'].apply(len).max() < 2:
+        return itemsets, pd.DataFrame(columns=['antecedents', 'consequents', 'support',
+                                               'confidence', 'lift'])
+    rules = association_rules(itemsets, metric="confidence", min_threshold=min_confidence)
+    return itemsets, rules
+
+
+def export_rules(rules):
+    """Rules in the exported CSV column layout (items joined in sorted order)"""
+    return pd.DataFrame({
+        'Time_Segment': rules['time_segment'].to_numpy(),
+        'Antecedent_Items': rules['antecedents'].apply(lambda x: ', '.join(sorted(x))).to_numpy(),
+        'Consequent_Items': rules['consequents'].apply(lambda x: ', '.join(sorted(x))).to_numpy(),
+        'Support': rules['support'].to_numpy(),
+        'Confidence': rules['confidence'].to_numpy(),
+        'Lift': rules['lift'].to_numpy(),
+    })
@@ -0,0 +1,224 @@
+"""
+Parameter Sweep: Mine Once, Filter Many Times
+
+Tuning MIN_SUPPORT and MIN_CONFIDENCE used to mean editing constants and
+re-running a whole analysis script per combination. A rule's support,
+confidence and lift do not depend on the thresholds, so the rule set at any
+(support, confidence) grid point is exactly the rules mined at the lowest
+support and confidence, filtered by support >= s and confidence >= c.
+
+This script mines every segment once at the lowest requested thresholds,
+caches the frequent itemsets and rules, and derives summary statistics for
+every grid point by filtering. It works from the baskets an analysis run
+stored in <results>/rules.db, so run the analysis script once first.
+
+Outputs (in the results directory):
+    parameter_sweep.csv   one row per (support, confidence) grid point
+    parameter_sweep.png   heatmaps of rule counts and mean lift
+    sweep_cache/          cached mining results, reused by later sweeps
+
+Usage:
+    python3 parameter_sweep.py apriori_results_new
+    python3 parameter_sweep.py apriori_results --supports 0.01 0.02 0.03 0.05 0.1 \\
+                                               --confidences 0.3 0.4 0.5 0.6 0.7
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from mlxtend.frequent_patterns import apriori, association_rules
+
+from basket_mining import encode_baskets
+from rule_database import load_baskets
+from rule_significance import add_significance
+
+DEFAULT_SUPPORTS = [0.01, 0.02, 0.03, 0.05, 0.10]
+DEFAULT_CONFIDENCES = [0.30, 0.40, 0.50, 0.60, 0.70]
+MIN_SEGMENT_BASKETS = 10  # Same cut-off as the analysis scripts
+CACHE_DIR_NAME = "sweep_cache"
+
+
+def _database_digest(db_file):
+    """Short content hash of the rules database (identifies the baskets)"""
+    digest = hashlib.sha256()
+    with open(db_file, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def _find_cached(cache_dir, digest, min_support, min_confidence):
+    """A cached mining result at or below the requested thresholds, if any"""
+    if not cache_dir.exists():
+        return None
+    for meta_file in sorted(cache_dir.glob(f"{digest}_*.json")):
+        meta = json.loads(meta_file.read_text())
+        if meta['min_support'] <= min_support and meta['min_confidence'] <= min_confidence:
+            return meta_file.with_suffix('.pkl'), meta
+    return None
+
+
+def mine_lowest(baskets, min_support, min_confidence):
+    """
+    Mine every segment once at the lowest thresholds
+
+    Returns:
+        tuple (itemsets, rules): frequent itemsets and rules of all segments,
+        each with a time_segment column; rules carry n_transactions
+    """
+    all_itemsets, all_rules = [], []
+    for segment, items in baskets.groupby('time_segment', sort=True)['items']:
+        multi_item = [t for t in items if len(t) > 1]
+        if len(multi_item) < MIN_SEGMENT_BASKETS:
+            continue
+        df_encoded = encode_baskets(multi_item)
+        itemsets = apriori(df_encoded, min_support=min_support, use_colnames=True)
+        if len(itemsets) == 0:
+            continue
+        itemsets['time_segment'] = segment
+        all_itemsets.append(itemsets)
+
+        rules = association_rules(itemsets.drop(columns='time_segment'), metric="confidence",
+                                  min_threshold=min_confidence)
+        if len(rules) == 0:
+            continue
+        rules['time_segment'] = segment
+        rules['n_transactions'] = len(multi_item)
+        all_rules.append(rules)
+
+    itemsets = pd.concat(all_itemsets, ignore_index=True) if all_itemsets else pd.DataFrame(
+        columns=['support', 'itemsets', 'time_segment'])
+    rules = pd.concat(all_rules, ignore_index=True) if all_rules else pd.DataFrame(
+        columns=['antecedents', 'consequents', 'support', 'confidence', 'lift', 'time_segment'])
+    return itemsets, rules
+
+
+def sweep_grid(itemsets, rules, supports, confidences, significance_test='fisher'):
+    """
+    Summary statistics for every (support, confidence) grid point by filtering
+
+    Returns:
+        DataFrame with one row per grid point
+    """
+    rows = []
+    itemset_support = itemsets['support'].to_numpy()
+    rule_support = rules['support'].to_numpy()
+    rule_confidence = rules['confidence'].to_numpy()
+    for support in sorted(supports):
+        n_itemsets = int((itemset_support >= support).sum())
+        for confidence in sorted(confidences):
+            selected = rules[(rule_support >= support) & (rule_confidence >= confidence)]
+            row = {
+                'min_support': support,
+                'min_confidence': confidence,
+                'frequent_itemsets': n_itemsets,
+                'rules': len(selected),
+                'segments_with_rules': selected['time_segment'].nunique(),
+                'mean_confidence': selected['confidence'].mean() if len(selected) else np.nan,
+                'mean_lift': selected['lift'].mean() if len(selected) else np.nan,
+                'max_lift': selected['lift'].max() if len(selected) else np.nan,
+                'rules_lift_gt_1': int((selected['lift'] > 1).sum()),
+                'significant_rules': 0,
+            }
+            if len(selected):
+                # BH correction depends on the set of rules tested, so redo it per grid point
+                tested = add_significance(selected, method=significance_test)
+                row['significant_rules'] = int((tested['adjusted_p_value'] <= 0.05).sum())
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def plot_sweep(results, output_file):
+    """Heatmaps of rule count and mean lift over the grid"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from figure_rendering import save_figure
+
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5.5))
+    for ax, (column, title, fmt) in zip(axes, [('rules', 'Rules', 'd'),
+                                               ('mean_lift', 'Mean Lift', '.2f')]):
+        grid = results.pivot(index='min_support', columns='min_confidence', values=column)
+        sns.heatmap(grid, annot=True, fmt=fmt, cmap='YlGnBu', ax=ax, cbar=False)
+        ax.set_title(f'{title} by Threshold', fontsize=13, fontweight='bold')
+        ax.set_xlabel('Minimum Confidence', fontsize=11)
+        ax.set_ylabel('Minimum Support', fontsize=11)
+    save_figure(fig, output_file)
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Sweep support/confidence thresholds with a single mining run")
+    parser.add_argument('results_dir', type=Path, help="analysis output directory containing rules.db")
+    parser.add_argument('--supports', type=float, nargs='+', default=DEFAULT_SUPPORTS)
+    parser.add_argument('--confidences', type=float, nargs='+', default=DEFAULT_CONFIDENCES)
+    parser.add_argument('--significance-test', choices=('fisher', 'chi2'), default='fisher')
+    parser.add_argument('--no-cache', action='store_true', help="ignore cached mining results")
+    args = parser.parse_args(argv)
+
+    db_file = args.results_dir / "rules.db"
+    if not db_file.exists():
+        print(f"❌ ERROR: {db_file} not found. Run the analysis script for this dataset first.")
+        return 1
+
+    min_support, min_confidence = min(args.supports), min(args.confidences)
+    cache_dir = args.results_dir / CACHE_DIR_NAME
+    digest = _database_digest(db_file)
+
+    print("="*80)
+    print(f"PARAMETER SWEEP: {len(args.supports)} supports × {len(args.confidences)} confidences")
+    print("="*80)
+
+    cached = None if args.no_cache else _find_cached(cache_dir, digest, min_support, min_confidence)
+    start = time.perf_counter()
+    if cached is not None:
+        cache_file, meta = cached
+        itemsets, rules = pd.read_pickle(cache_file)
+        print(f"✓ Reusing cached mining result (support ≥ {meta['min_support']:g}, "
+              f"confidence ≥ {meta['min_confidence']:g}): {cache_file}")
+    else:
+        baskets = load_baskets(db_file)
+        print(f"✓ Loaded {len(baskets):,} baskets from: {db_file}")
+        print(f"Mining all segments once at support ≥ {min_support:g}, confidence ≥ {min_confidence:g}...")
+        itemsets, rules = mine_lowest(baskets, min_support, min_confidence)
+        cache_dir.mkdir(exist_ok=True)
+        stem = f"{digest}_s{min_support:g}_c{min_confidence:g}"
+        cache_file = cache_dir / f"{stem}.pkl"
+        pd.to_pickle((itemsets, rules), cache_file)
+        (cache_dir / f"{stem}.json").write_text(json.dumps(
+            {'min_support': min_support, 'min_confidence': min_confidence,
+             'itemsets': len(itemsets), 'rules': len(rules)}))
+        print(f"✓ Cached {len(itemsets):,} itemsets and {len(rules):,} rules in: {cache_file}")
+    mining_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = sweep_grid(itemsets, rules, args.supports, args.confidences, args.significance_test)
+    filter_seconds = time.perf_counter() - start
+
+    results_file = args.results_dir / "parameter_sweep.csv"
+    results.to_csv(results_file, index=False)
+    plot_file = args.results_dir / "parameter_sweep.png"
+    plot_sweep(results, plot_file)
+
+    print()
+    print("Rules per grid point (rows: min support, columns: min confidence):")
+    print(results.pivot(index='min_support', columns='min_confidence', values='rules').to_string())
+    print()
+    print("Significant rules (BH-adjusted p ≤ 0.05):")
+    print(results.pivot(index='min_support', columns='min_confidence', values='significant_rules').to_string())
+    print()
+    print(f"✓ Mining: {mining_seconds:.2f}s once; filtering {len(results)} grid points: {filter_seconds:.2f}s")
+    print(f"✓ Saved comparison table to: {results_file}")
+    print(f"✓ Saved heatmaps to: {plot_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
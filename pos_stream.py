@@ -0,0 +1,392 @@
+"""
+Real-Time POS Event Ingestion with Live Co-occurrence Counts
+
+Tails a point-of-sale event feed and keeps per-segment item and pair counts
+up to date as receipts close, so current rules can be queried within
+seconds of a sale instead of after the next batch run.
+
+Feed: JSON lines, from a file that is appended to (like `tail -f`) or from
+TCP clients connecting to --listen (a stand-in for the POS socket):
+
+    {"receipt": "R1", "time": "2019-04-01T07:12:03", "store": "3", "item": "Latte"}
+    {"receipt": "R1", "event": "close"}
+
+A line that is not JSON, or an event without a receipt (or, for a sale,
+without a valid time or item), is counted as rejected in /status and
+skipped; ingestion carries on with the next line.
+
+A receipt's basket is closed by its "close" event, or after
+--receipt-timeout seconds without new lines. It gets the time segment of its
+first line (get_time_segment, the same labels as the batch scripts). As in
+the batch path, only multi-item baskets are counted.
+
+Queries (HTTP on --http, JSON responses):
+
+    GET /status                              baskets and counts per segment
+    GET /rules?segment=Morning_Weekday&item=Croissant&min_support=0.02&min_confidence=0.4
+
+Every --refresh seconds the current rules are also written to
+<output>/live_rules.csv. Rules are single-item (A → B, from pair counts)
+with the same support, confidence and lift definitions as the batch path.
+Counts are exact by default; --counts sketch switches to the fixed-memory
+approximate backend in sketch_counts.py.
+
+Usage:
+    python3 pos_stream.py --file pos_feed.jsonl
+    python3 pos_stream.py --listen 127.0.0.1:9000 --http 127.0.0.1:8765
+    python3 pos_stream.py --file pos_feed.jsonl --counts sketch --sketch-width 4096
+"""
+
+import argparse
+import json
+import os
+import queue
+import socketserver
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from functools import partial
+from itertools import combinations
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from basket_mining import get_time_segment
+from sketch_counts import CAPACITY, DEPTH, WIDTH, SketchPairCounts
+
+MIN_SUPPORT = 0.02
+MIN_CONFIDENCE = 0.40
+RECEIPT_TIMEOUT = 60.0  # seconds without new lines before a receipt is closed
+REFRESH_SECONDS = 2.0
+POLL_SECONDS = 0.2
+REJECTED_EVENT_ERRORS = (KeyError, ValueError, TypeError, AttributeError)  # Malformed event fields
+OUTPUT_DIR = Path("live_results")
+RULE_COLUMNS = ['time_segment', 'antecedent', 'consequent', 'support', 'confidence', 'lift',
+                'pair_count', 'baskets']
+
+
+class ExactPairCounts:
+    """Exact item and pair counts of one segment's baskets"""
+
+    def __init__(self):
+        self.baskets = 0
+        self.items = Counter()
+        self.pairs = Counter()
+
+    def add(self, items):
+        """Count one basket (a set of item names)"""
+        items = sorted(items)
+        self.baskets += 1
+        self.items.update(items)
+        self.pairs.update(combinations(items, 2))
+
+    def item_count(self, item):
+        return self.items.get(item, 0)
+
+    def pair_items(self, min_count):
+        """(pair, count) for pairs counted at least min_count times"""
+        return [(pair, count) for pair, count in self.pairs.items() if count >= min_count]
+
+    def memory_entries(self):
+        return len(self.items) + len(self.pairs)
+
+
+def pair_rules(counts, segment, min_support=MIN_SUPPORT, min_confidence=MIN_CONFIDENCE):
+    """
+    Single-item rules A → B of a segment from item and pair counts
+
+    support = n(A,B) / N, confidence = support / (n(A) / N), lift = confidence / (n(B) / N),
+    evaluated in the same order as mlxtend so thresholds cut identically
+
+    Returns:
+        list of rule dicts (RULE_COLUMNS)
+    """
+    n = counts.baskets
+    if n == 0:
+        return []
+    rules = []
+    for (a, b), together in counts.pair_items(min_support * n):
+        support = together / n
+        if support < min_support:
+            continue
+        for antecedent, consequent in ((a, b), (b, a)):
+            n_antecedent = counts.item_count(antecedent)
+            n_consequent = counts.item_count(consequent)
+            if not n_antecedent or not n_consequent:
+                continue
+            confidence = support / (n_antecedent / n)
+            if confidence >= min_confidence:
+                rules.append({'time_segment': segment, 'antecedent': antecedent,
+                              'consequent': consequent, 'support': support,
+                              'confidence': confidence, 'lift': confidence / (n_consequent / n),
+                              'pair_count': together, 'baskets': n})
+    return rules
+
+
+class LiveCounts:
+    """Open receipts and per-segment counts, shared with the query threads"""
+
+    def __init__(self, counts_factory=ExactPairCounts, receipt_timeout=RECEIPT_TIMEOUT):
+        self.counts_factory = counts_factory
+        self.receipt_timeout = receipt_timeout
+        self.segments = {}
+        self.open = {}  # receipt -> {'segment', 'items', 'seen'}
+        self.events = 0
+        self.rejected = 0
+        self.closed = 0
+        self.last_sale = None
+        self.lock = threading.Lock()
+
+    def ingest(self, line):
+        """Apply one raw JSON line of the feed; returns False when it is rejected"""
+        try:
+            event = json.loads(line)
+        except ValueError:  # JSONDecodeError, or bytes that are not UTF-8
+            with self.lock:
+                self.rejected += 1
+            return False
+        return self.handle(event)
+
+    def handle(self, event):
+        """Apply one feed event; returns False when it is malformed (counted as rejected)"""
+        try:
+            receipt = str(event['receipt'])
+            closing = event.get('event') == 'close'
+            if not closing:
+                timestamp = datetime.fromisoformat(event['time'])
+                item = event['item']
+                if not isinstance(item, str):
+                    raise TypeError(f"item must be a string, got {type(item).__name__}")
+        except REJECTED_EVENT_ERRORS:
+            with self.lock:
+                self.rejected += 1
+            return False
+
+        with self.lock:
+            self.events += 1
+            if closing:
+                self._close(receipt)
+                return True
+            entry = self.open.get(receipt)
+            if entry is None:
+                entry = self.open[receipt] = {'segment': get_time_segment(timestamp), 'items': set()}
+            entry['items'].add(item)
+            entry['seen'] = time.monotonic()
+            self.last_sale = event['time']
+        return True
+
+    def _close(self, receipt):
+        entry = self.open.pop(receipt, None)
+        if entry is None:
+            return
+        self.closed += 1
+        if len(entry['items']) > 1:
+            counts = self.segments.get(entry['segment'])
+            if counts is None:
+                counts = self.segments[entry['segment']] = self.counts_factory()
+            counts.add(entry['items'])
+
+    def close_idle(self):
+        """Close receipts without new lines for receipt_timeout seconds"""
+        cutoff = time.monotonic() - self.receipt_timeout
+        with self.lock:
+            for receipt in [r for r, e in self.open.items() if e['seen'] < cutoff]:
+                self._close(receipt)
+
+    def rules(self, segment=None, item=None, min_support=MIN_SUPPORT, min_confidence=MIN_CONFIDENCE):
+        """Current rules, optionally for one segment and/or involving one item"""
+        with self.lock:
+            rules = [rule for name, counts in sorted(self.segments.items())
+                     if segment is None or name == segment
+                     for rule in pair_rules(counts, name, min_support, min_confidence)]
+        if item is not None:
+            needle = item.lower()
+            rules = [r for r in rules if needle in r['antecedent'].lower() or needle in r['consequent'].lower()]
+        return sorted(rules, key=lambda r: (r['time_segment'], -r['confidence']))
+
+    def status(self):
+        with self.lock:
+            return {
+                'events': self.events,
+                'events_rejected': self.rejected,
+                'receipts_closed': self.closed,
+                'receipts_open': len(self.open),
+                'last_sale': self.last_sale,
+                'segments': {name: {'baskets': c.baskets, 'count_entries': c.memory_entries()}
+                             for name, c in sorted(self.segments.items())},
+            }
+
+
+# ============================================================================
+# FEEDS
+# ============================================================================
+
+def follow_file(path, events, stop, from_end=False, poll=POLL_SECONDS):
+    """Put every line appended to path on the events queue (parsed by LiveCounts.ingest)"""
+    while not Path(path).exists() and not stop.is_set():
+        time.sleep(poll)
+    with open(path) as f:
+        if from_end:
+            f.seek(0, os.SEEK_END)
+        pending = ''
+        while not stop.is_set():
+            chunk = f.readline()
+            if not chunk:
+                time.sleep(poll)
+                continue
+            pending += chunk
+            if pending.endswith('\n'):  # Only parse complete lines
+                if pending.strip():
+                    events.put(pending)
+                pending = ''
+
+
+def listen_socket(address, events, stop):
+    """Accept TCP clients sending JSON lines and put each raw line on the queue"""
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if line.strip():
+                    events.put(line)
+
+    class Server(socketserver.ThreadingTCPServer):
+        allow_reuse_address = True
+        daemon_threads = True
+
+    with Server(address, Handler) as server:
+        threading.Thread(target=lambda: (stop.wait(), server.shutdown()), daemon=True).start()
+        server.serve_forever(poll_interval=POLL_SECONDS)
+
+
+def query_server(address, live):
+    """HTTP server answering /status and /rules from the live counts"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            if url.path == '/status':
+                body = live.status()
+            elif url.path == '/rules':
+                try:
+                    body = live.rules(params.get('segment'), params.get('item'),
+                                      float(params.get('min_support', MIN_SUPPORT)),
+                                      float(params.get('min_confidence', MIN_CONFIDENCE)))
+                except ValueError as e:
+                    self.send_error(400, str(e))
+                    return
+            else:
+                self.send_error(404, "use /status or /rules")
+                return
+            data = json.dumps(body, indent=1).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass  # Keep the console for ingestion progress
+
+    return ThreadingHTTPServer(address, Handler)
+
+
+def parse_address(value):
+    """'host:port' → (host, port)"""
+    host, _, port = value.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def write_snapshot(live, output_file):
+    """Atomically replace the rule snapshot CSV"""
+    rules = pd.DataFrame(live.rules(), columns=RULE_COLUMNS)
+    partial = output_file.with_suffix('.csv.tmp')
+    rules.to_csv(partial, index=False)
+    partial.replace(output_file)
+    return len(rules)
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Ingest a live POS feed and serve current rules")
+    feed = parser.add_mutually_exclusive_group(required=True)
+    feed.add_argument('--file', type=Path, help="JSON-lines event file to follow")
+    feed.add_argument('--listen', metavar='HOST:PORT', help="accept JSON-lines events over TCP")
+    parser.add_argument('--from-end', action='store_true', help="skip events already in the file")
+    parser.add_argument('--http', default='127.0.0.1:8765', metavar='HOST:PORT', help="query endpoint")
+    parser.add_argument('--output-dir', type=Path, default=OUTPUT_DIR)
+    parser.add_argument('--refresh', type=float, default=REFRESH_SECONDS, help="seconds between snapshots")
+    parser.add_argument('--receipt-timeout', type=float, default=RECEIPT_TIMEOUT)
+    parser.add_argument('--duration', type=float, help="stop after this many seconds")
+    parser.add_argument('--counts', choices=('exact', 'sketch'), default='exact',
+                        help="exact counts, or fixed-memory Count-Min + Space-Saving")
+    parser.add_argument('--sketch-width', type=int, default=WIDTH)
+    parser.add_argument('--sketch-depth', type=int, default=DEPTH)
+    parser.add_argument('--heavy-hitters', type=int, default=CAPACITY, help="pairs kept per segment")
+    args = parser.parse_args(argv)
+
+    if args.counts == 'sketch':
+        counts_factory = partial(SketchPairCounts, args.sketch_width, args.sketch_depth, args.heavy_hitters)
+    else:
+        counts_factory = ExactPairCounts
+    live = LiveCounts(counts_factory, receipt_timeout=args.receipt_timeout)
+    args.output_dir.mkdir(exist_ok=True)
+    snapshot_file = args.output_dir / "live_rules.csv"
+    events, stop = queue.Queue(), threading.Event()
+
+    if args.file:
+        reader = threading.Thread(target=follow_file, args=(args.file, events, stop, args.from_end), daemon=True)
+        source = str(args.file)
+    else:
+        reader = threading.Thread(target=listen_socket, args=(parse_address(args.listen), events, stop),
+                                  daemon=True)
+        source = f"tcp://{args.listen}"
+    reader.start()
+    server = query_server(parse_address(args.http), live)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    print("="*80)
+    print("LIVE POS INGESTION")
+    print("="*80)
+    print(f"✓ Reading events from: {source} ({args.counts} counts)")
+    print(f"✓ Rules at: http://{server.server_address[0]}:{server.server_address[1]}/rules")
+    print(f"✓ Snapshot every {args.refresh:g}s to: {snapshot_file}")
+    print()
+
+    started = last_refresh = time.monotonic()
+    try:
+        while args.duration is None or time.monotonic() - started < args.duration:
+            # Drain the queue, but never past the next refresh, so idle receipts
+            # still close and snapshots still appear under a sustained feed
+            deadline = last_refresh + args.refresh
+            try:
+                live.ingest(events.get(timeout=POLL_SECONDS))
+                while time.monotonic() < deadline:
+                    live.ingest(events.get_nowait())
+            except queue.Empty:
+                pass
+            if time.monotonic() - last_refresh >= args.refresh:
+                live.close_idle()
+                n_rules = write_snapshot(live, snapshot_file)
+                status = live.status()
+                baskets = sum(s['baskets'] for s in status['segments'].values())
+                print(f"  {status['events']:,} events, {status['receipts_closed']:,} receipts closed, "
+                      f"{baskets:,} multi-item baskets, {n_rules:,} rules"
+                      + (f", {status['events_rejected']:,} rejected" if status['events_rejected'] else ""))
+                last_refresh = time.monotonic()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.shutdown()
+        live.close_idle()
+        write_snapshot(live, snapshot_file)
+    print(f"✓ Saved final rules to: {snapshot_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
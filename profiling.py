@@ -0,0 +1,257 @@
+"""
+Profiling Hooks for the Analysis Scripts
+
+Enabled with a single flag on the analysis entry points:
+
+    python3 apriori_analysis.py --profile          # every phase
+    python3 apriori_analysis.py --profile 4,5      # only Phase 4 and Phase 5
+
+Three kinds of profile are collected and written to <results>/profile/:
+
+    cProfile        phase_<n>.prof (for snakeviz / pstats) and phase_<n>.txt,
+                    for every selected phase
+    tracemalloc     allocations_<label>.txt: the top allocation sites of the
+                    blocks wrapped in profiler.allocations(label), i.e. basket
+                    building and one-hot encoding
+    sampling        sampling_phase_<n>.txt and .folded: a background thread
+                    samples the main thread's stack every few milliseconds
+                    during the mining phase, grouped by time segment; the
+                    .folded file can be fed to flamegraph.pl / speedscope
+
+hotspots.txt collects the top-N entries of all of them. The profiler is driven
+by RunReport: begin(phase) and segment(name) switch profiles automatically.
+"""
+
+import cProfile
+import io
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+TOP_N = 25  # Entries per list in the detailed files
+HOTSPOT_N = 10  # Entries per list in hotspots.txt
+SAMPLE_INTERVAL = 0.005  # seconds between stack samples
+MAX_STACK_DEPTH = 40
+SAMPLED_PHASES = {5}  # Mining loop
+
+
+def parse_phases(value):
+    """'all' → None (every phase); '4,5' → {4, 5}"""
+    if value is None or value == 'all':
+        return None
+    return {int(p) for p in str(value).split(',') if p.strip()}
+
+
+def phase_number(name):
+    """Number of a phase label such as 'Phase 5: Running Apriori...'"""
+    match = re.match(r'Phase (\d+)', name)
+    return int(match.group(1)) if match else None
+
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval"""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.label = None
+        self.stacks = defaultdict(Counter)  # label -> folded stack -> samples
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.stacks[self.label or 'total'][";".join(reversed(stack))] += 1
+
+    def summary(self, top_n=TOP_N):
+        """Top functions by self and inclusive samples, per label"""
+        lines = []
+        for label, stacks in self.stacks.items():
+            total = sum(stacks.values())
+            self_counts, inclusive = Counter(), Counter()
+            for stack, count in stacks.items():
+                frames = stack.split(";")
+                self_counts[frames[-1]] += count
+                for name in set(frames):
+                    inclusive[name] += count
+            lines.append(f"[{label}] {total} samples (~{total * self.interval:.2f}s)")
+            lines.append("  Self:")
+            for name, count in self_counts.most_common(top_n):
+                lines.append(f"    {count / total * 100:5.1f}%  {name}")
+            lines.append("  Inclusive:")
+            for name, count in inclusive.most_common(top_n):
+                lines.append(f"    {count / total * 100:5.1f}%  {name}")
+            lines.append("")
+        return "\n".join(lines)
+
+    def folded(self):
+        """Folded stacks (label;frame;frame count) for flame graph tools"""
+        return "\n".join(f"{label};{stack} {count}"
+                         for label, stacks in self.stacks.items()
+                         for stack, count in stacks.items())
+
+
+class Profiler:
+    """cProfile per phase, tracemalloc around labelled blocks, stack sampling"""
+
+    def __init__(self, output_dir, phases=None, enabled=True, top_n=TOP_N,
+                 sampled_phases=SAMPLED_PHASES, sample_interval=SAMPLE_INTERVAL):
+        """
+        Args:
+            output_dir: Directory for the profile files
+            phases: Phase numbers to profile (None = all)
+            enabled: False turns every hook into a no-op
+            top_n: Entries per hotspot list
+            sampled_phases: Phases whose stack is sampled
+            sample_interval: Seconds between stack samples
+        """
+        self.output_dir = Path(output_dir)
+        self.phases = phases
+        self.enabled = enabled
+        self.top_n = top_n
+        self.sampled_phases = sampled_phases
+        self.sample_interval = sample_interval
+        self.files = []
+        self._hotspots = []
+        self._phase = None
+        self._cprofile = None
+        self._sampler = None
+        if enabled:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            # Allocation reports are appended per block; start from a clean slate
+            for stale in self.output_dir.glob("allocations_*.txt"):
+                stale.unlink()
+
+    def _selected(self, number):
+        return self.phases is None or number in self.phases
+
+    def _write(self, name, text):
+        path = self.output_dir / name
+        path.write_text(text)
+        self.files.append(str(path))
+        return path
+
+    def begin_phase(self, name):
+        """Stop the previous phase's profiles and start this phase's"""
+        if not self.enabled:
+            return
+        self.end_phase()
+        number = phase_number(name)
+        if number is None or not self._selected(number):
+            return
+        self._phase = (number, name)
+        self._cprofile = cProfile.Profile()
+        self._cprofile.enable()
+        if number in self.sampled_phases:
+            self._sampler = StackSampler(threading.main_thread().ident, self.sample_interval)
+            self._sampler.start()
+
+    def segment(self, name):
+        """Label subsequent stack samples with a segment name"""
+        if self._sampler is not None:
+            self._sampler.label = name
+
+    def end_phase(self):
+        """Write the current phase's cProfile and sampling results"""
+        if self._phase is None:
+            return
+        number, name = self._phase
+        self._cprofile.disable()
+        prof_file = self.output_dir / f"phase_{number}.prof"
+        self._cprofile.dump_stats(prof_file)
+        self.files.append(str(prof_file))
+
+        stream = io.StringIO()
+        stats = pstats.Stats(self._cprofile, stream=stream).strip_dirs()
+        stats.sort_stats('cumulative').print_stats(self.top_n)
+        stats.sort_stats('tottime').print_stats(self.top_n)
+        self._write(f"phase_{number}.txt", f"{name}\n{stream.getvalue()}")
+        self._hotspots.append(f"cProfile — {name} (by own time)")
+        self._hotspots.extend(self._top_functions(stats))
+
+        if self._sampler is not None:
+            self._sampler.stop()
+            summary = self._sampler.summary(self.top_n)
+            self._write(f"sampling_phase_{number}.txt", f"{name}\n\n{summary}")
+            self._write(f"sampling_phase_{number}.folded", self._sampler.folded())
+            self._hotspots.append(f"Stack sampling — {name}")
+            self._hotspots.extend("  " + line for line in
+                                  self._sampler.summary(HOTSPOT_N).splitlines() if line)
+            self._sampler = None
+
+        self._phase = None
+        self._cprofile = None
+
+    def _top_functions(self, stats):
+        """Top (own time, cumulative time, calls, function) lines from pstats"""
+        entries = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+        lines = []
+        for (filename, line, func), (_, calls, own, cumulative, _) in entries[:HOTSPOT_N]:
+            lines.append(f"  {own:8.3f}s own {cumulative:8.3f}s cum {calls:>9,} calls  "
+                         f"{func} ({filename}:{line})")
+        return lines
+
+    @contextmanager
+    def _trace_allocations(self, label):
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(10)
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            after = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            if started:
+                tracemalloc.stop()
+            diff = after.compare_to(before, 'lineno')
+            header = (f"{label}: {elapsed:.3f}s traced, peak {peak / 2**20:.1f} MB, "
+                      f"retained {sum(d.size_diff for d in diff) / 2**20:+.1f} MB")
+            lines = [header] + [f"  {d}" for d in diff[:self.top_n]]
+            path = self.output_dir / f"allocations_{re.sub(r'[^A-Za-z0-9_]+', '_', label.split(':')[0])}.txt"
+            with open(path, 'a') as f:
+                f.write("\n".join(lines) + "\n\n")
+            if str(path) not in self.files:
+                self.files.append(str(path))
+            self._hotspots.append(f"tracemalloc — {header}")
+            self._hotspots.extend(lines[1:HOTSPOT_N + 1])
+
+    def allocations(self, label):
+        """Context manager recording allocation sites of a block (no-op when disabled)"""
+        if not self.enabled:
+            return nullcontext()
+        return self._trace_allocations(label)
+
+    def finish(self):
+        """Close open profiles and write hotspots.txt; returns the written files"""
+        if not self.enabled:
+            return []
+        self.end_phase()
+        if self._hotspots:
+            self._write("hotspots.txt", f"Top {HOTSPOT_N} hotspots per profile\n\n"
+                        + "\n".join(self._hotspots) + "\n")
+        return self.files
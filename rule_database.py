@@ -0,0 +1,352 @@
+"""
+Indexed SQLite Export of Association Rules and Baskets
+
+Writes rules, a rule-item link table, the item dictionary and (optionally) the
+transaction baskets into a local SQLite database, so ad hoc questions such as
+"which rules involve croissants on weekend mornings" become indexed queries
+instead of loading the full CSV into pandas.
+
+Schema:
+    items(item_id, name, product_type, product_category)
+    rules(rule_id, segment, antecedents, consequents, support, confidence, lift, ...)
+    rule_items(rule_id, item_id, side)           -- side: 'antecedent' / 'consequent'
+    baskets(basket_id, basket_key, segment, day, store)
+    basket_items(basket_id, item_id)
+
+Example:
+    SELECT r.segment, r.antecedents, r.consequents, r.confidence
+    FROM rules r
+    JOIN rule_items ri ON ri.rule_id = r.rule_id
+    JOIN items i ON i.item_id = ri.item_id
+    WHERE i.name LIKE '%Croissant%' AND r.segment = 'Morning_Weekend'
+    ORDER BY r.confidence DESC;
+
+Usage:
+    python3 rule_database.py apriori_results/association_rules_by_segment.csv rules.db
+    python3 rule_database.py rules.db --item Croissant --segment Morning_Weekend
+"""
+
+import argparse
+import sqlite3
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from rule_store import METRIC_FIELDS, RuleSet
+
+SCHEMA = """
+CREATE TABLE items (
+    item_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    product_type TEXT,
+    product_category TEXT
+);
+CREATE TABLE rules (
+    rule_id INTEGER PRIMARY KEY,
+    segment TEXT NOT NULL,
+    antecedents TEXT NOT NULL,
+    consequents TEXT NOT NULL,
+    support REAL,
+    confidence REAL,
+    lift REAL,
+    antecedent_support REAL,
+    consequent_support REAL,
+    leverage REAL,
+    conviction REAL,
+    p_value REAL,
+    adjusted_p_value REAL
+);
+CREATE TABLE rule_items (
+    rule_id INTEGER NOT NULL REFERENCES rules(rule_id),
+    item_id INTEGER NOT NULL REFERENCES items(item_id),
+    side TEXT NOT NULL CHECK (side IN ('antecedent', 'consequent'))
+);
+CREATE TABLE baskets (
+    basket_id INTEGER PRIMARY KEY,
+    basket_key TEXT NOT NULL,
+    segment TEXT NOT NULL,
+    day TEXT,
+    store TEXT
+);
+CREATE TABLE basket_items (
+    basket_id INTEGER NOT NULL REFERENCES baskets(basket_id),
+    item_id INTEGER NOT NULL REFERENCES items(item_id)
+);
+"""
+
+# Built after the bulk load, which is much faster than maintaining them per row
+INDEXES = """
+CREATE INDEX idx_rules_segment_confidence ON rules(segment, confidence DESC);
+CREATE INDEX idx_rules_confidence ON rules(confidence DESC);
+CREATE INDEX idx_rule_items_item ON rule_items(item_id, side, rule_id);
+CREATE INDEX idx_rule_items_rule ON rule_items(rule_id);
+CREATE INDEX idx_baskets_segment ON baskets(segment);
+CREATE INDEX idx_basket_items_item ON basket_items(item_id, basket_id);
+CREATE INDEX idx_basket_items_basket ON basket_items(basket_id);
+"""
+
+# mlxtend column -> rules table column
+METRIC_COLUMNS = {
+    'support': 'support',
+    'confidence': 'confidence',
+    'lift': 'lift',
+    'antecedent support': 'antecedent_support',
+    'consequent support': 'consequent_support',
+    'leverage': 'leverage',
+    'conviction': 'conviction',
+    'p_value': 'p_value',
+    'adjusted_p_value': 'adjusted_p_value'
+}
+
+# Exported CSV column -> mlxtend column
+CSV_COLUMNS = {
+    'Time_Segment': 'time_segment',
+    'Support': 'support',
+    'Confidence': 'confidence',
+    'Lift': 'lift',
+    'Antecedent_Support': 'antecedent support',
+    'Consequent_Support': 'consequent support',
+    'Leverage': 'leverage',
+    'Conviction': 'conviction',
+    'P_Value': 'p_value',
+    'Adjusted_P_Value': 'adjusted_p_value'
+}
+
+
+def _explode_items(itemsets):
+    """Flatten a Series of itemsets into (row position, item name) arrays"""
+    exploded = itemsets.reset_index(drop=True).apply(sorted).explode()
+    return exploded.index.to_numpy(), exploded.to_numpy(dtype=object)
+
+
+def export_rules_sqlite(rules, db_path, baskets=None, hierarchy=None):
+    """
+    Write rules (and optionally baskets) into a fresh indexed SQLite database
+
+    Args:
+        rules: RuleSet, or an mlxtend rule frame with frozenset
+               'antecedents'/'consequents', a 'time_segment' column and the
+               usual metric columns
+        db_path: Output database path (replaced if it exists)
+        baskets: Optional DataFrame with 'basket_key', 'time_segment' and
+                 'items' (list of product names per basket), and optionally
+                 'datetime' (stored as the basket's day) and 'store_location'
+        hierarchy: Optional DataFrame indexed by item name with
+                   'product_type' and 'product_category' columns
+
+    Returns:
+        dict: Row counts per table
+    """
+    db_path = Path(db_path)
+    if db_path.exists():
+        db_path.unlink()
+
+    if isinstance(rules, RuleSet):
+        ant_rows, ant_items = rules.explode('antecedents')
+        cons_rows, cons_items = rules.explode('consequents')
+        segments = rules.segment_names.tolist()
+        ant_text, cons_text = rules.itemset_strings('antecedents'), rules.itemset_strings('consequents')
+        metric_columns = list(METRIC_COLUMNS)
+        metric_values = [rules.metrics[METRIC_FIELDS[c]] for c in metric_columns]
+    else:
+        rules = rules.reset_index(drop=True)
+        ant_rows, ant_items = _explode_items(rules['antecedents'])
+        cons_rows, cons_items = _explode_items(rules['consequents'])
+        segments = rules['time_segment'].astype(str).tolist()
+        ant_text = rules['antecedents'].apply(lambda x: ', '.join(sorted(x)))
+        cons_text = rules['consequents'].apply(lambda x: ', '.join(sorted(x)))
+        metric_columns = [c for c in METRIC_COLUMNS if c in rules.columns]
+        metric_values = [rules[c] for c in metric_columns]
+
+    names = [ant_items, cons_items]
+    if baskets is not None:
+        baskets = baskets.reset_index(drop=True)
+        basket_exploded = baskets['items'].explode()
+        # A product listed twice in a basket is one basket-item link
+        basket_links = pd.DataFrame({'row': basket_exploded.index.to_numpy(),
+                                     'name': basket_exploded.to_numpy(dtype=object)}).drop_duplicates()
+        names.append(basket_links['name'].to_numpy(dtype=object))
+
+    # One dictionary for every item name seen in rules or baskets
+    codes, vocabulary = pd.factorize(np.concatenate(names), sort=True)
+    n_ant, n_cons = len(ant_items), len(cons_items)
+    ant_ids = codes[:n_ant]
+    cons_ids = codes[n_ant:n_ant + n_cons]
+
+    rule_ids = np.arange(1, len(rules) + 1)
+    rule_rows = zip(
+        rule_ids.tolist(),
+        segments,
+        list(ant_text),
+        list(cons_text),
+        *(np.asarray(v, dtype=float).tolist() for v in metric_values)
+    )
+    insert_rules = (f"INSERT INTO rules (rule_id, segment, antecedents, consequents, "
+                    f"{', '.join(METRIC_COLUMNS[c] for c in metric_columns)}) "
+                    f"VALUES ({', '.join('?' * (4 + len(metric_columns)))})")
+
+    link_rule = np.concatenate([rule_ids[ant_rows], rule_ids[cons_rows]])
+    link_item = np.concatenate([ant_ids, cons_ids]) + 1
+    link_side = ['antecedent'] * n_ant + ['consequent'] * n_cons
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.executescript(SCHEMA)
+
+        # Single transaction for the whole bulk load
+        with conn:
+            if hierarchy is not None:
+                parents = hierarchy.reindex(vocabulary)
+                types = parents['product_type'].astype(object).where(parents['product_type'].notna(), None)
+                categories = parents['product_category'].astype(object).where(
+                    parents['product_category'].notna(), None)
+            else:
+                types = categories = [None] * len(vocabulary)
+            conn.executemany("INSERT INTO items (item_id, name, product_type, product_category) "
+                             "VALUES (?, ?, ?, ?)",
+                             zip(range(1, len(vocabulary) + 1), vocabulary.tolist(),
+                                 list(types), list(categories)))
+            conn.executemany(insert_rules, rule_rows)
+            conn.executemany("INSERT INTO rule_items (rule_id, item_id, side) VALUES (?, ?, ?)",
+                             zip(link_rule.tolist(), link_item.tolist(), link_side))
+
+            if baskets is not None:
+                basket_ids = np.arange(1, len(baskets) + 1)
+                if 'datetime' in baskets.columns:
+                    days = baskets['datetime'].dt.strftime('%Y-%m-%d').tolist()
+                else:
+                    days = [None] * len(baskets)
+                if 'store_location' in baskets.columns:
+                    stores = baskets['store_location'].astype(str).tolist()
+                else:
+                    stores = [None] * len(baskets)
+                conn.executemany("INSERT INTO baskets (basket_id, basket_key, segment, day, store) "
+                                 "VALUES (?, ?, ?, ?, ?)",
+                                 zip(basket_ids.tolist(),
+                                     baskets['basket_key'].astype(str).tolist(),
+                                     baskets['time_segment'].astype(str).tolist(),
+                                     days, stores))
+                basket_item_ids = codes[n_ant + n_cons:] + 1
+                conn.executemany("INSERT INTO basket_items (basket_id, item_id) VALUES (?, ?)",
+                                 zip(basket_ids[basket_links['row'].to_numpy()].tolist(),
+                                     basket_item_ids.tolist()))
+
+        conn.executescript(INDEXES)
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+    return {
+        'items': len(vocabulary),
+        'rules': len(rules),
+        'rule_items': len(link_rule),
+        'baskets': 0 if baskets is None else len(baskets)
+    }
+
+
+def rules_from_csv(rules_csv):
+    """Load an exported rule CSV back into mlxtend column names and frozensets"""
+    rules = pd.read_csv(rules_csv)
+    rules = rules.rename(columns=CSV_COLUMNS)
+    rules['antecedents'] = rules['Antecedent_Items'].astype(str).str.split(', ').apply(frozenset)
+    rules['consequents'] = rules['Consequent_Items'].astype(str).str.split(', ').apply(frozenset)
+    return rules
+
+
+def load_baskets(db_path):
+    """
+    Read the stored baskets back from a rules database
+
+    Returns:
+        DataFrame with basket_key, time_segment, day (NaT when not stored),
+        store (None when not stored) and items (list of product names), one
+        row per basket in basket_id order
+    """
+    sql = ("SELECT b.basket_id, b.basket_key, b.segment, b.day, b.store, i.name FROM baskets b "
+           "JOIN basket_items bi ON bi.basket_id = b.basket_id "
+           "JOIN items i ON i.item_id = bi.item_id ORDER BY b.basket_id")
+    with sqlite3.connect(db_path) as conn:
+        links = pd.read_sql_query(sql, conn)
+    grouped = links.groupby('basket_id', sort=True)
+    return pd.DataFrame({
+        'basket_key': grouped['basket_key'].first(),
+        'time_segment': grouped['segment'].first(),
+        'day': pd.to_datetime(grouped['day'].first()),
+        'store': grouped['store'].first(),
+        'items': grouped['name'].agg(list),
+    }).reset_index(drop=True)
+
+
+def load_hierarchy(db_path):
+    """
+    Read the stored product hierarchy back from a rules database
+
+    Returns:
+        DataFrame indexed by item name with product_type and product_category
+        (None where not stored)
+    """
+    with sqlite3.connect(db_path) as conn:
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(items)")]
+        if 'product_type' not in columns:
+            return pd.DataFrame(columns=['product_type', 'product_category'])
+        items = pd.read_sql_query("SELECT name, product_type, product_category FROM items", conn)
+    return items.set_index('name')
+
+
+def query_rules(db_path, item=None, segment=None, min_confidence=None, limit=50):
+    """
+    Indexed lookup of rules by item name fragment, segment and confidence
+
+    Returns:
+        DataFrame of matching rules, highest confidence first
+    """
+    conditions, params = [], []
+    if item is not None:
+        conditions.append("r.rule_id IN (SELECT ri.rule_id FROM rule_items ri "
+                          "JOIN items i ON i.item_id = ri.item_id WHERE i.name LIKE ?)")
+        params.append(f"%{item}%")
+    if segment is not None:
+        conditions.append("r.segment = ?")
+        params.append(segment)
+    if min_confidence is not None:
+        conditions.append("r.confidence >= ?")
+        params.append(min_confidence)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    sql = (f"SELECT r.segment, r.antecedents, r.consequents, r.support, r.confidence, r.lift "
+           f"FROM rules r {where} ORDER BY r.confidence DESC LIMIT ?")
+    params.append(limit)
+
+    with sqlite3.connect(db_path) as conn:
+        return pd.read_sql_query(sql, conn, params=params)
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Export or query association rules in SQLite")
+    parser.add_argument('source', type=Path, help="rule CSV to export, or database to query")
+    parser.add_argument('database', type=Path, nargs='?', help="output database (export mode)")
+    parser.add_argument('--item', help="item name fragment to search for")
+    parser.add_argument('--segment', help="time segment, e.g. Morning_Weekend")
+    parser.add_argument('--min-confidence', type=float)
+    parser.add_argument('--limit', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    if args.source.suffix == '.csv':
+        if args.database is None:
+            parser.error("an output database path is required when exporting a CSV")
+        counts = export_rules_sqlite(rules_from_csv(args.source), args.database)
+        print(f"✓ Wrote {counts['rules']:,} rules, {counts['rule_items']:,} rule-item links and "
+              f"{counts['items']:,} items to: {args.database}")
+    else:
+        result = query_rules(args.source, args.item, args.segment, args.min_confidence, args.limit)
+        print(result.to_string(index=False) if len(result) else "No matching rules.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+"""
+Run-to-Run Association Rule Diffing for Drift Monitoring
+
+Keeps a compact history of mined rule sets and diffs any two of them, so that
+pattern drift (for example last week vs. this week) can be tracked without
+re-mining old periods.
+
+Each snapshot stores one 64-bit key per rule (segment + exact pattern hash)
+together with float32 metrics in a compressed .npz file. Diffs are computed
+by sorting the keys once and matching them with a binary search, which stays
+fast for millions of rules.
+
+Usage:
+    python3 rule_diff.py snapshot apriori_results/association_rules_by_segment.csv --label 2023-W26
+    python3 rule_diff.py diff 2023-W25 2023-W26
+    python3 rule_diff.py history
+"""
+
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from rule_streaming import iter_rule_chunks, pattern_hash
+
+HISTORY_DIR = Path("apriori_results/history")
+HISTORY_LOG = "history.csv"
+CHANGE_THRESHOLD = 0.05  # Confidence change that counts as strengthened/weakened
+
+
+def _segment_hash(segments):
+    """64-bit hash of each segment name"""
+    return pd.util.hash_array(segments.astype(str).to_numpy(dtype=object))
+
+
+def load_rule_file(rules_csv):
+    """
+    Read a rule CSV into compact snapshot arrays
+
+    Returns:
+        dict of NumPy arrays sorted by rule key: key, segment, antecedents,
+        consequents, support, confidence, lift
+    """
+    parts = []
+    for chunk in iter_rule_chunks(rules_csv):
+        chunk = chunk.reset_index(drop=True)
+        # Exact (non-normalized) pattern so size variants stay distinct rules
+        key = pattern_hash(chunk['Antecedent_Items'], chunk['Consequent_Items'], normalize=False)
+        key = key ^ _segment_hash(chunk['Time_Segment'])
+        parts.append(pd.DataFrame({
+            'key': key,
+            'segment': chunk['Time_Segment'].astype(str),
+            'antecedents': chunk['Antecedent_Items'].astype(str),
+            'consequents': chunk['Consequent_Items'].astype(str),
+            'support': chunk['Support'].astype(np.float32),
+            'confidence': chunk['Confidence'].astype(np.float32),
+            'lift': chunk['Lift'].astype(np.float32)
+        }))
+
+    rules = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(
+        columns=['key', 'segment', 'antecedents', 'consequents', 'support', 'confidence', 'lift'])
+    rules = rules.sort_values('key', kind='stable').drop_duplicates('key')
+    return {
+        'key': rules['key'].to_numpy(dtype=np.uint64),
+        'segment': rules['segment'].to_numpy(dtype=str),
+        'antecedents': rules['antecedents'].to_numpy(dtype=str),
+        'consequents': rules['consequents'].to_numpy(dtype=str),
+        'support': rules['support'].to_numpy(dtype=np.float32),
+        'confidence': rules['confidence'].to_numpy(dtype=np.float32),
+        'lift': rules['lift'].to_numpy(dtype=np.float32)
+    }
+
+
+def load_snapshot(name, history_dir=HISTORY_DIR):
+    """Load a stored snapshot by label, or read a rule CSV directly"""
+    path = Path(name)
+    if path.suffix == '.csv' and path.exists():
+        return load_rule_file(path)
+    if path.suffix != '.npz':
+        path = Path(history_dir) / f"{name}.npz"
+    if not path.exists():
+        raise FileNotFoundError(f"No snapshot or rule file found for '{name}'")
+    with np.load(path) as data:
+        return {k: data[k] for k in data.files}
+
+
+def diff_rules(old, new, threshold=CHANGE_THRESHOLD):
+    """
+    Diff two snapshots by rule key
+
+    Args:
+        old, new: Snapshot dicts as returned by load_snapshot
+        threshold: Minimum absolute confidence change for a rule to count as
+                   strengthened or weakened
+
+    Returns:
+        DataFrame with one row per new, vanished, strengthened or weakened rule
+    """
+    # Both key arrays are sorted, so a binary search matches them in O(n log n)
+    pos = np.searchsorted(old['key'], new['key'])
+    pos_clipped = np.minimum(pos, max(len(old['key']) - 1, 0))
+    if len(old['key']):
+        matched = old['key'][pos_clipped] == new['key']
+    else:
+        matched = np.zeros(len(new['key']), dtype=bool)
+
+    in_new = np.zeros(len(old['key']), dtype=bool)
+    in_new[pos_clipped[matched]] = True
+
+    old_idx = pos_clipped[matched]
+    new_idx = np.flatnonzero(matched)
+    delta = new['confidence'][new_idx] - old['confidence'][old_idx]
+    strengthened = delta >= threshold
+    weakened = delta <= -threshold
+
+    added = np.flatnonzero(~matched)
+    vanished = np.flatnonzero(~in_new)
+    up = new_idx[strengthened], old_idx[strengthened]
+    down = new_idx[weakened], old_idx[weakened]
+
+    def column(snapshot_field, source):
+        """Gather one field for the new/vanished/strengthened/weakened rows, in that order"""
+        parts = []
+        for snapshot, idx in source:
+            if snapshot is None:
+                parts.append(np.full(len(idx), np.nan, dtype=np.float32))
+            else:
+                parts.append(snapshot[snapshot_field][idx])
+        return np.concatenate(parts)
+
+    labels = (new, added), (old, vanished), (new, up[0]), (new, down[0])
+    old_side = (None, added), (old, vanished), (old, up[1]), (old, down[1])
+    new_side = (new, added), (None, vanished), (new, up[0]), (new, down[0])
+
+    changes = pd.DataFrame({
+        'Status': np.repeat(['new', 'vanished', 'strengthened', 'weakened'],
+                            [len(added), len(vanished), len(up[0]), len(down[0])]),
+        'Time_Segment': column('segment', labels),
+        'Antecedent_Items': column('antecedents', labels),
+        'Consequent_Items': column('consequents', labels),
+        'Old_Confidence': column('confidence', old_side),
+        'New_Confidence': column('confidence', new_side),
+        'Old_Lift': column('lift', old_side),
+        'New_Lift': column('lift', new_side)
+    })
+    changes['Confidence_Change'] = changes['New_Confidence'] - changes['Old_Confidence']
+    return changes.sort_values(['Time_Segment', 'Status', 'Confidence_Change'],
+                               ascending=[True, True, False], ignore_index=True)
+
+
+def summarize_diff(changes, old, new):
+    """Per-segment counts of each change type, plus rule totals on both sides"""
+    summary = pd.crosstab(changes['Time_Segment'], changes['Status'])
+    for status in ('new', 'vanished', 'strengthened', 'weakened'):
+        if status not in summary.columns:
+            summary[status] = 0
+    summary = summary[['new', 'vanished', 'strengthened', 'weakened']]
+
+    segments = sorted(set(old['segment']) | set(new['segment']))
+    summary = summary.reindex(segments, fill_value=0)
+    summary['old_rules'] = pd.Series(old['segment']).value_counts().reindex(segments, fill_value=0)
+    summary['new_rules'] = pd.Series(new['segment']).value_counts().reindex(segments, fill_value=0)
+    summary.index.name = 'Time_Segment'
+    return summary.reset_index()
+
+
+def snapshot_rules(rules_csv, history_dir=HISTORY_DIR, label=None, threshold=CHANGE_THRESHOLD):
+    """
+    Store a compact snapshot of a rule file and append drift to the history log
+
+    Args:
+        rules_csv: Rule CSV exported by the analysis scripts
+        history_dir: Directory holding snapshots and history.csv
+        label: Snapshot name (defaults to the current timestamp)
+        threshold: Confidence change counted as strengthened/weakened
+
+    Returns:
+        dict: The history log row written for this snapshot
+    """
+    history_dir = Path(history_dir)
+    history_dir.mkdir(parents=True, exist_ok=True)
+    if label is None:
+        # Two runs within one second get _1, _2, ... rather than sharing a file
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        label, n = stamp, 0
+        while (history_dir / f"{label}.npz").exists():
+            n += 1
+            label = f"{stamp}_{n}"
+
+    snapshot = load_rule_file(rules_csv)
+
+    log_file = history_dir / HISTORY_LOG
+    history = pd.read_csv(log_file) if log_file.exists() else pd.DataFrame()
+
+    entry = {
+        'label': label,
+        'created': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'source': str(rules_csv),
+        'rules': len(snapshot['key']),
+        'avg_confidence': float(snapshot['confidence'].mean()) if len(snapshot['key']) else np.nan,
+        'avg_lift': float(snapshot['lift'].mean()) if len(snapshot['key']) else np.nan,
+        'previous': '',
+        'new': 0,
+        'vanished': 0,
+        'strengthened': 0,
+        'weakened': 0,
+        'jaccard': np.nan
+    }
+
+    # Load the previous snapshot before writing this one, which may reuse its label
+    previous = history['label'].iloc[-1] if len(history) else None
+    if previous is not None and (history_dir / f"{previous}.npz").exists():
+        old = load_snapshot(previous, history_dir)
+        counts = diff_rules(old, snapshot, threshold)['Status'].value_counts()
+        shared = len(snapshot['key']) - counts.get('new', 0)
+        union = len(old['key']) + counts.get('new', 0)
+        entry.update({
+            'previous': previous,
+            'new': int(counts.get('new', 0)),
+            'vanished': int(counts.get('vanished', 0)),
+            'strengthened': int(counts.get('strengthened', 0)),
+            'weakened': int(counts.get('weakened', 0)),
+            'jaccard': shared / union if union else np.nan
+        })
+
+    np.savez_compressed(history_dir / f"{label}.npz", **snapshot)
+    history = history[history['label'] != label] if len(history) else history
+    history = pd.concat([history, pd.DataFrame([entry])], ignore_index=True)
+    history.to_csv(log_file, index=False)
+    return entry
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Diff stored association rule sets")
+    parser.add_argument('--history-dir', type=Path, default=HISTORY_DIR,
+                        help=f"snapshot directory (default: {HISTORY_DIR})")
+    parser.add_argument('--threshold', type=float, default=CHANGE_THRESHOLD,
+                        help="confidence change counted as strengthened/weakened")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    snap = sub.add_parser('snapshot', help="store a compact snapshot of a rule CSV")
+    snap.add_argument('rules_csv', type=Path)
+    snap.add_argument('--label', help="snapshot name (default: timestamp)")
+
+    diff = sub.add_parser('diff', help="diff two snapshots or rule CSVs")
+    diff.add_argument('old', help="snapshot label or rule CSV")
+    diff.add_argument('new', help="snapshot label or rule CSV")
+    diff.add_argument('--output', type=Path, help="CSV receiving every changed rule")
+
+    sub.add_parser('history', help="show the drift history log")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'snapshot':
+        entry = snapshot_rules(args.rules_csv, args.history_dir, args.label, args.threshold)
+        print(f"✓ Stored snapshot '{entry['label']}' ({entry['rules']:,} rules)")
+        if entry['previous']:
+            print(f"  vs. '{entry['previous']}': {entry['new']:,} new, {entry['vanished']:,} vanished, "
+                  f"{entry['strengthened']:,} strengthened, {entry['weakened']:,} weakened "
+                  f"(Jaccard {entry['jaccard']:.3f})")
+
+    elif args.command == 'diff':
+        old = load_snapshot(args.old, args.history_dir)
+        new = load_snapshot(args.new, args.history_dir)
+        changes = diff_rules(old, new, args.threshold)
+        summary = summarize_diff(changes, old, new)
+
+        print("="*80)
+        print(f"RULE DIFF: {args.old} → {args.new}")
+        print("="*80)
+        print(summary.to_string(index=False))
+        print()
+
+        output = args.output or Path(args.history_dir) / f"diff_{Path(args.old).stem}_{Path(args.new).stem}.csv"
+        output.parent.mkdir(parents=True, exist_ok=True)
+        changes.to_csv(output, index=False)
+        print(f"✓ Saved {len(changes):,} changed rules to: {output}")
+
+    elif args.command == 'history':
+        log_file = Path(args.history_dir) / HISTORY_LOG
+        if not log_file.exists():
+            print(f"❌ No history found in {args.history_dir}/")
+            return 1
+        print(pd.read_csv(log_file).to_string(index=False))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Scalable Association Network Construction and Layout Caching
+
+Turns a rule table of any size into a drawable item-level network:
+rules are exploded into (antecedent item, consequent item) edges and
+aggregated with a single groupby, then capped or sampled by a metric.
+Spring layouts are cached on disk keyed by a hash of the graph content,
+so re-rendering a figure never recomputes an unchanged layout.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+LAYOUT_CACHE_DIR = Path("visualizations/.layout_cache")
+MAX_EDGES = 150  # Edges kept in the aggregated network
+
+
+def _explode_side(rules, column):
+    """One row per (rule, item) for a comma-separated item column"""
+    items = rules[column].astype(str).str.split(',').explode().str.strip()
+    return pd.DataFrame({'rule': items.index.to_numpy(), 'item': items.to_numpy()})
+
+
+def aggregate_item_edges(rules, metric='Confidence', max_edges=MAX_EDGES,
+                         sample=False, seed=42):
+    """
+    Aggregate rules to item-level edges
+
+    Every rule contributes one edge per (antecedent item, consequent item)
+    pair. Edges are aggregated over rules and segments.
+
+    Args:
+        rules: Exported rule frame (Antecedent_Items, Consequent_Items,
+               Time_Segment, Support, Confidence, Lift)
+        metric: Edge metric used to cap or sample ('Confidence', 'Lift', 'Support')
+        max_edges: Maximum number of edges to keep (None keeps all)
+        sample: Sample edges with probability proportional to the metric
+                instead of keeping the top edges
+        seed: Random seed for sampling
+
+    Returns:
+        DataFrame with source, target, n_rules, n_segments and the max/mean
+        Confidence, Lift and Support of the aggregated rules
+    """
+    rules = rules.reset_index(drop=True)
+    ant = _explode_side(rules, 'Antecedent_Items')
+    cons = _explode_side(rules, 'Consequent_Items')
+    pairs = ant.merge(cons, on='rule', suffixes=('_ant', '_cons'))
+
+    metrics = rules[['Time_Segment', 'Confidence', 'Lift', 'Support']]
+    pairs = pairs.join(metrics, on='rule')
+
+    edges = pairs.groupby(['item_ant', 'item_cons'], sort=False).agg(
+        n_rules=('rule', 'size'),
+        n_segments=('Time_Segment', 'nunique'),
+        Confidence=('Confidence', 'max'),
+        mean_confidence=('Confidence', 'mean'),
+        Lift=('Lift', 'max'),
+        mean_lift=('Lift', 'mean'),
+        Support=('Support', 'max')
+    ).reset_index().rename(columns={'item_ant': 'source', 'item_cons': 'target'})
+
+    if max_edges is not None and len(edges) > max_edges:
+        if sample:
+            rng = np.random.default_rng(seed)
+            weights = edges[metric].to_numpy(dtype=float)
+            keep = rng.choice(len(edges), size=max_edges, replace=False, p=weights / weights.sum())
+            edges = edges.iloc[np.sort(keep)]
+        else:
+            edges = edges.nlargest(max_edges, metric)
+
+    return edges.sort_values(metric, ascending=False, ignore_index=True)
+
+
+def build_item_graph(edges):
+    """Directed item graph from aggregated edges"""
+    return nx.from_pandas_edgelist(edges, 'source', 'target', edge_attr=True,
+                                   create_using=nx.DiGraph)
+
+
+def graph_fingerprint(G, **layout_params):
+    """Stable hash of the graph structure, edge weights and layout parameters"""
+    nodes = sorted(map(str, G.nodes()))
+    edges = sorted((str(u), str(v), round(float(d.get('weight', 1.0)), 6))
+                   for u, v, d in G.edges(data=True))
+    payload = json.dumps({'nodes': nodes, 'edges': edges, 'params': layout_params},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def cached_spring_layout(G, cache_dir=LAYOUT_CACHE_DIR, **layout_params):
+    """
+    nx.spring_layout with an on-disk cache keyed by graph content
+
+    Args:
+        G: Graph to lay out
+        cache_dir: Directory holding cached layouts as JSON
+        **layout_params: Passed to nx.spring_layout (also part of the cache key)
+
+    Returns:
+        tuple (pos, cached): layout dict and whether it came from the cache
+    """
+    cache_dir = Path(cache_dir)
+    cache_file = cache_dir / f"{graph_fingerprint(G, **layout_params)}.json"
+
+    if cache_file.exists():
+        stored = json.loads(cache_file.read_text())
+        by_name = {str(n): n for n in G.nodes()}
+        return {by_name[k]: np.array(v) for k, v in stored.items() if k in by_name}, True
+
+    pos = nx.spring_layout(G, **layout_params)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    cache_file.write_text(json.dumps({str(n): [float(x), float(y)] for n, (x, y) in pos.items()}))
+    return pos, False
@@ -0,0 +1,122 @@
+"""
+Vectorized Significance Testing for Association Rules
+
+At low support many rules with lift > 1 are produced by chance. This module
+rebuilds each rule's 2x2 contingency table from the support columns already in
+the rule frame and computes p-values for positive association (one-sided
+Fisher exact test, or Pearson chi-square), followed by a Benjamini-Hochberg
+false discovery rate correction. Everything operates on whole NumPy arrays,
+so millions of rules are tested in a single batch.
+"""
+
+import numpy as np
+from scipy import stats
+
+SIGNIFICANCE_METHODS = ('fisher', 'chi2')
+
+
+def contingency_counts(support, antecedent_support, consequent_support, n_transactions):
+    """
+    Reconstruct 2x2 contingency tables from rule supports
+
+    Args:
+        support: Fraction of transactions containing antecedent and consequent
+        antecedent_support: Fraction containing the antecedent
+        consequent_support: Fraction containing the consequent
+        n_transactions: Number of transactions the supports were measured on
+
+    Returns:
+        tuple (a, b, c, d) of int64 arrays:
+            a = A and C, b = A without C, c = C without A, d = neither
+    """
+    n = np.asarray(n_transactions, dtype=np.int64)
+    a = np.rint(np.asarray(support) * n).astype(np.int64)
+    n_ant = np.rint(np.asarray(antecedent_support) * n).astype(np.int64)
+    n_cons = np.rint(np.asarray(consequent_support) * n).astype(np.int64)
+    b = n_ant - a
+    c = n_cons - a
+    d = n - a - b - c
+    return a, b, c, d
+
+
+def fisher_exact_pvalues(a, b, c, d):
+    """One-sided (greater) Fisher exact test p-values for each table"""
+    n = a + b + c + d
+    # P(X >= a) for X ~ Hypergeometric(population=n, successes=a+c, draws=a+b)
+    return stats.hypergeom.sf(a - 1, n, a + c, a + b)
+
+
+def chi_square_pvalues(a, b, c, d):
+    """One-sided Pearson chi-square (1 dof, no continuity correction) p-values for a*d > b*c"""
+    a, b, c, d = (np.asarray(x, dtype=np.float64) for x in (a, b, c, d))
+    n = a + b + c + d
+    denominator = (a + b) * (c + d) * (a + c) * (b + d)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        statistic = n * (a * d - b * c) ** 2 / denominator
+    statistic = np.where(denominator > 0, statistic, 0.0)
+    # Half the two-sided tail in the direction of positive association
+    p = stats.chi2.sf(statistic, df=1)
+    return np.where(a * d > b * c, p / 2, 1 - p / 2)
+
+
+def benjamini_hochberg(p_values):
+    """Benjamini-Hochberg adjusted p-values (q-values), in input order"""
+    p = np.asarray(p_values, dtype=np.float64)
+    m = len(p)
+    if m == 0:
+        return p.copy()
+    order = np.argsort(p)
+    ranked = p[order] * m / np.arange(1, m + 1)
+    # Enforce monotonicity from the largest p-value downwards
+    ranked = np.minimum.accumulate(ranked[::-1])[::-1]
+    q = np.empty(m, dtype=np.float64)
+    q[order] = np.minimum(ranked, 1.0)
+    return q
+
+
+def rule_pvalues(support, antecedent_support, consequent_support, n_transactions, method='fisher'):
+    """
+    P-values and BH-adjusted p-values for arrays of rule metrics
+
+    Returns:
+        tuple (p_values, adjusted_p_values)
+    """
+    if method not in SIGNIFICANCE_METHODS:
+        raise ValueError(f"Unknown significance method '{method}' "
+                         f"(expected one of {', '.join(SIGNIFICANCE_METHODS)})")
+
+    a, b, c, d = contingency_counts(support, antecedent_support, consequent_support, n_transactions)
+    if method == 'fisher':
+        p_values = fisher_exact_pvalues(a, b, c, d)
+    else:
+        p_values = chi_square_pvalues(a, b, c, d)
+    return p_values, benjamini_hochberg(p_values)
+
+
+def add_significance(rules, method='fisher', max_adjusted_p=None,
+                     n_column='n_transactions'):
+    """
+    Add p-value and BH-adjusted p-value columns to an mlxtend rule frame
+
+    Args:
+        rules: DataFrame with 'support', 'antecedent support',
+               'consequent support' and a per-rule transaction count column
+        method: 'fisher' (one-sided exact test) or 'chi2'
+        max_adjusted_p: If set, keep only rules with adjusted p <= this value
+        n_column: Column holding the number of transactions per rule's segment
+
+    Returns:
+        DataFrame: rules with 'p_value' and 'adjusted_p_value' columns
+    """
+    p_values, adjusted = rule_pvalues(rules['support'].to_numpy(),
+                                      rules['antecedent support'].to_numpy(),
+                                      rules['consequent support'].to_numpy(),
+                                      rules[n_column].to_numpy(), method)
+
+    rules = rules.copy()
+    rules['p_value'] = p_values
+    rules['adjusted_p_value'] = adjusted
+
+    if max_adjusted_p is not None:
+        rules = rules[rules['adjusted_p_value'] <= max_adjusted_p].reset_index(drop=True)
+    return rules
@@ -0,0 +1,228 @@
+"""
+Compact Structured-Array Rule Container
+
+mlxtend returns rules as a DataFrame of frozenset columns, and the analysis
+scripts used to add string copies of both sides on top. Each rule then costs
+two frozensets, two Python strings and a row of object pointers. A RuleSet
+holds the same rules in flat NumPy arrays:
+
+    metrics            one structured record per rule: segment code,
+                       support, confidence, lift, ..., p-values
+    antecedent_ptr     CSR offsets: rule i's antecedent item IDs are
+    antecedent_items       antecedent_items[antecedent_ptr[i]:antecedent_ptr[i+1]]
+    consequent_ptr /   the same for consequents
+    consequent_items
+    items, segments    ID → name dictionaries (sorted, so ID order is name order)
+
+Sorting, filtering and top-N work on the metric arrays and gather the item
+arrays by index. Item strings are only built by itemset_strings() and
+to_frame(), for display or export, and only for the rules asked for.
+"""
+
+import numpy as np
+import pandas as pd
+
+# mlxtend column -> structured array field
+METRIC_FIELDS = {
+    'support': 'support',
+    'confidence': 'confidence',
+    'lift': 'lift',
+    'antecedent support': 'antecedent_support',
+    'consequent support': 'consequent_support',
+    'leverage': 'leverage',
+    'conviction': 'conviction',
+    'p_value': 'p_value',
+    'adjusted_p_value': 'adjusted_p_value',
+}
+
+RULE_DTYPE = np.dtype([('segment', np.int16), ('n_transactions', np.int32)]
+                      + [(field, np.float64) for field in METRIC_FIELDS.values()])
+
+# Structured array field -> exported CSV column (same layout as before)
+EXPORT_COLUMNS = {
+    'support': 'Support',
+    'confidence': 'Confidence',
+    'lift': 'Lift',
+    'antecedent_support': 'Antecedent_Support',
+    'consequent_support': 'Consequent_Support',
+    'leverage': 'Leverage',
+    'conviction': 'Conviction',
+    'p_value': 'P_Value',
+    'adjusted_p_value': 'Adjusted_P_Value',
+}
+
+SIDES = ('antecedents', 'consequents')
+
+
+def _gather(ptr, items, index):
+    """CSR rows `index` of (ptr, items) as a new (ptr, items) pair"""
+    lengths = (ptr[1:] - ptr[:-1])[index]
+    new_ptr = np.zeros(len(index) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_ptr[1:])
+    positions = (np.arange(new_ptr[-1], dtype=np.int64)
+                 - np.repeat(new_ptr[:-1], lengths) + np.repeat(ptr[:-1][index], lengths))
+    return new_ptr, items[positions]
+
+
+def _explode_frozensets(itemsets):
+    """CSR offsets and flat item names of a Series of frozensets (items sorted)"""
+    exploded = itemsets.reset_index(drop=True).apply(sorted).explode()
+    lengths = np.bincount(exploded.index.to_numpy(), minlength=len(itemsets))
+    ptr = np.zeros(len(itemsets) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=ptr[1:])
+    return ptr, exploded.to_numpy(dtype=object)
+
+
+class RuleSet:
+    """Rules as a structured metric array plus CSR item ID arrays"""
+
+    def __init__(self, metrics, antecedent_ptr, antecedent_items, consequent_ptr, consequent_items,
+                 items, segments):
+        self.metrics = metrics
+        self.antecedent_ptr = antecedent_ptr
+        self.antecedent_items = antecedent_items
+        self.consequent_ptr = consequent_ptr
+        self.consequent_items = consequent_items
+        self.items = items
+        self.segments = segments
+
+    @classmethod
+    def from_frame(cls, rules, segment_column='time_segment', n_column='n_transactions'):
+        """Build from an mlxtend rule frame (frozenset antecedents/consequents)"""
+        rules = rules.reset_index(drop=True)
+        ant_ptr, ant_names = _explode_frozensets(rules['antecedents'])
+        cons_ptr, cons_names = _explode_frozensets(rules['consequents'])
+        codes, items = pd.factorize(np.concatenate([ant_names, cons_names]), sort=True)
+        segment_codes, segments = pd.factorize(rules[segment_column].astype(str), sort=True)
+
+        metrics = np.zeros(len(rules), dtype=RULE_DTYPE)
+        metrics['segment'] = segment_codes
+        if n_column in rules.columns:
+            metrics['n_transactions'] = rules[n_column].to_numpy()
+        for column, field in METRIC_FIELDS.items():
+            metrics[field] = rules[column].to_numpy(dtype=np.float64) if column in rules.columns else np.nan
+        codes = codes.astype(np.int32)
+        return cls(metrics, ant_ptr, codes[:len(ant_names)], cons_ptr, codes[len(ant_names):],
+                   np.asarray(items, dtype=object), np.asarray(segments, dtype=object))
+
+    @classmethod
+    def concat(cls, rulesets):
+        """One RuleSet from several, merging their item and segment dictionaries"""
+        rulesets = list(rulesets)
+        items = np.unique(np.concatenate([r.items for r in rulesets]).astype(str)).astype(object)
+        segments = np.unique(np.concatenate([r.segments for r in rulesets]).astype(str)).astype(object)
+        item_keys, segment_keys = items.astype(str), segments.astype(str)
+
+        metrics, sides = [], {side: ([], []) for side in SIDES}
+        offsets = {side: 0 for side in SIDES}
+        for r in rulesets:
+            item_map = np.searchsorted(item_keys, r.items.astype(str)).astype(np.int32)
+            segment_map = np.searchsorted(segment_keys, r.segments.astype(str)).astype(np.int16)
+            part = r.metrics.copy()
+            part['segment'] = segment_map[part['segment']]
+            metrics.append(part)
+            for side in SIDES:
+                ptr, codes = r._side(side)
+                ptrs, flat = sides[side]
+                ptrs.append(ptr[:-1] + offsets[side])
+                flat.append(item_map[codes])
+                offsets[side] += len(codes)
+
+        def csr(side):
+            ptrs, flat = sides[side]
+            ptr = np.concatenate(ptrs + [np.array([offsets[side]], dtype=np.int64)])
+            return ptr, np.concatenate(flat) if flat else np.zeros(0, dtype=np.int32)
+
+        ant_ptr, ant_items = csr('antecedents')
+        cons_ptr, cons_items = csr('consequents')
+        return cls(np.concatenate(metrics), ant_ptr, ant_items, cons_ptr, cons_items, items, segments)
+
+    def __len__(self):
+        return len(self.metrics)
+
+    def _side(self, side):
+        if side == 'antecedents':
+            return self.antecedent_ptr, self.antecedent_items
+        return self.consequent_ptr, self.consequent_items
+
+    @property
+    def segment_names(self):
+        """Segment name of every rule"""
+        return self.segments[self.metrics['segment']]
+
+    @property
+    def nbytes(self):
+        """Bytes held by the rule arrays (excluding the two name dictionaries)"""
+        return (self.metrics.nbytes + self.antecedent_ptr.nbytes + self.antecedent_items.nbytes
+                + self.consequent_ptr.nbytes + self.consequent_items.nbytes)
+
+    # ------------------------------------------------------------------------
+    # Vectorized selection
+    # ------------------------------------------------------------------------
+
+    def take(self, index):
+        """The rules at the given positions, in that order"""
+        index = np.asarray(index, dtype=np.int64)
+        ant_ptr, ant_items = _gather(self.antecedent_ptr, self.antecedent_items, index)
+        cons_ptr, cons_items = _gather(self.consequent_ptr, self.consequent_items, index)
+        return RuleSet(self.metrics[index], ant_ptr, ant_items, cons_ptr, cons_items,
+                       self.items, self.segments)
+
+    def filter(self, mask):
+        """The rules where a boolean mask over the metrics is True"""
+        return self.take(np.flatnonzero(mask))
+
+    def sort(self, by, descending=False):
+        """
+        Stable sort by one or more metric fields
+
+        Args:
+            by: Field name or list of names ('segment' sorts by name)
+            descending: One flag for all fields, or one per field
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        descending = [descending] * len(by) if isinstance(descending, bool) else list(descending)
+        keys = [-self.metrics[f].astype(np.float64) if d else self.metrics[f] for f, d in zip(by, descending)]
+        return self.take(np.lexsort(keys[::-1]))
+
+    def top(self, n, by='confidence'):
+        """The n rules with the largest `by`, ties kept in rule order and NaN last (as nlargest)"""
+        values = self.metrics[by].astype(np.float64)
+        n = min(n, len(values))
+        if n <= 0:
+            return self.take(np.zeros(0, dtype=np.int64))
+        missing = np.isnan(values)
+        ranked = np.where(missing, -np.inf, values)
+        if n < len(values):
+            cutoff = np.partition(ranked, len(values) - n)[len(values) - n]
+            candidates = np.flatnonzero(ranked >= cutoff)
+        else:
+            candidates = np.arange(len(values))
+        order = np.lexsort((candidates, -ranked[candidates], missing[candidates]))[:n]
+        return self.take(candidates[order])
+
+    # ------------------------------------------------------------------------
+    # Lazy strings for display and export
+    # ------------------------------------------------------------------------
+
+    def itemset_strings(self, side):
+        """'A, B' strings of one side for every rule (items in name order)"""
+        ptr, codes = self._side(side)
+        names = pd.Series(self.items[codes], index=np.repeat(np.arange(len(self)), np.diff(ptr)))
+        return names.groupby(level=0, sort=True).agg(', '.join).reindex(range(len(self)), fill_value='').to_numpy()
+
+    def explode(self, side):
+        """(rule position, item name) arrays of one side"""
+        ptr, codes = self._side(side)
+        return np.repeat(np.arange(len(self)), np.diff(ptr)), self.items[codes]
+
+    def to_frame(self):
+        """Rules in the exported CSV column layout"""
+        frame = pd.DataFrame({
+            'Time_Segment': self.segment_names,
+            'Antecedent_Items': self.itemset_strings('antecedents'),
+            'Consequent_Items': self.itemset_strings('consequents'),
+        })
+        for field, column in EXPORT_COLUMNS.items():
+            frame[column] = self.metrics[field]
+        return frame
@@ -0,0 +1,246 @@
+"""
+Chunked, Hash-Keyed Processing of Association Rule Files
+
+Streams exported rule files (association_rules_by_segment.csv) in fixed-size
+chunks so that cross-dataset comparisons can cover every rule instead of a
+truncated top-N sample. Each rule is reduced to a 64-bit hash of its
+normalized pattern, rules are hash-partitioned into bucket files on disk, and
+the two datasets are joined one bucket at a time. Peak memory is bounded by
+the chunk size and the bucket size, not by the total number of rules.
+"""
+
+import re
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CHUNK_SIZE = 250_000      # Rules read from disk per chunk
+N_BUCKETS = 64            # Hash partitions used for the overlap join
+MAX_KEPT_OVERLAPS = 5000  # Overlapping patterns kept in memory for plots/reports
+HIST_BINS = np.linspace(0.0, 1.0, 51)  # Fixed confidence histogram edges
+
+RULE_COLUMNS = [
+    'Time_Segment',
+    'Antecedent_Items',
+    'Consequent_Items',
+    'Support',
+    'Confidence',
+    'Lift'
+]
+
+_SIZE_SUFFIX = re.compile(r'\s+(sm|rg|lg)$')
+_MIX = np.uint64(0x9E3779B97F4A7C15)  # Golden-ratio constant to mix both sides
+
+
+def normalize_product_name(name):
+    """Normalize product names for comparison (lowercase, no size suffix)"""
+    name = str(name).lower()
+    name = _SIZE_SUFFIX.sub('', name)
+    return name.strip()
+
+
+def _itemset_hashes(items, normalize=True):
+    """
+    Order-independent 64-bit hash of each comma-separated itemset.
+
+    Items are hashed individually and summed (mod 2**64) per rule, so "A, B"
+    and "B, A" map to the same key without sorting strings. With normalize,
+    items first go through the same rules as normalize_product_name.
+    """
+    exploded = items.astype(str).str.split(',').explode().str.strip()
+    if normalize:
+        exploded = (exploded.str.lower()
+                            .str.replace(_SIZE_SUFFIX, '', regex=True)
+                            .str.strip())
+    item_hashes = pd.util.hash_array(exploded.to_numpy(dtype=object))
+
+    # explode() keeps rows of the same rule contiguous, so reduceat over the
+    # first position of each rule gives one (wrapping) sum per rule
+    owner = exploded.index.to_numpy()
+    starts = np.flatnonzero(np.r_[True, owner[1:] != owner[:-1]])
+    return np.add.reduceat(item_hashes, starts)
+
+
+def pattern_hash(antecedents, consequents, normalize=True):
+    """Hash (antecedent, consequent) pairs into uint64 pattern keys"""
+    antecedents = antecedents.reset_index(drop=True)
+    consequents = consequents.reset_index(drop=True)
+    ant = _itemset_hashes(antecedents, normalize)
+    cons = _itemset_hashes(consequents, normalize)
+    return ant * _MIX + cons
+
+
+def iter_rule_chunks(path, chunksize=CHUNK_SIZE):
+    """Yield the comparison columns of a rule CSV in chunks"""
+    yield from pd.read_csv(path, usecols=RULE_COLUMNS, chunksize=chunksize)
+
+
+class RuleFileStats:
+    """Running aggregates over a rule file, updated one chunk at a time"""
+
+    def __init__(self, keywords):
+        self.keywords = list(keywords)
+        self.n_rules = 0
+        self.conf_sum = 0.0
+        self.conf_min = np.inf
+        self.conf_max = -np.inf
+        self.lift_sum = 0.0
+        self.lift_max = -np.inf
+        self.support_sum = 0.0
+        self.keyword_counts = dict.fromkeys(self.keywords, 0)
+        self.segment_counts = {}
+        self.segment_conf_sums = {}
+        self.conf_hist = np.zeros(len(HIST_BINS) - 1, dtype=np.int64)
+        self.products = set()
+
+    def update(self, chunk):
+        conf = chunk['Confidence'].to_numpy()
+        lift = chunk['Lift'].to_numpy()
+        self.n_rules += len(chunk)
+        self.conf_sum += conf.sum()
+        self.conf_min = min(self.conf_min, conf.min())
+        self.conf_max = max(self.conf_max, conf.max())
+        self.lift_sum += lift.sum()
+        self.lift_max = max(self.lift_max, lift.max())
+        self.support_sum += chunk['Support'].sum()
+        self.conf_hist += np.histogram(conf, bins=HIST_BINS)[0]
+
+        text = (chunk['Antecedent_Items'].astype(str) + ' ' +
+                chunk['Consequent_Items'].astype(str)).str.lower()
+        for keyword in self.keywords:
+            self.keyword_counts[keyword] += int(text.str.contains(keyword, regex=False).sum())
+
+        by_segment = chunk.groupby('Time_Segment')['Confidence'].agg(['size', 'sum'])
+        for segment, row in by_segment.iterrows():
+            self.segment_counts[segment] = self.segment_counts.get(segment, 0) + int(row['size'])
+            self.segment_conf_sums[segment] = self.segment_conf_sums.get(segment, 0.0) + row['sum']
+
+        for column in ('Antecedent_Items', 'Consequent_Items'):
+            items = chunk[column].astype(str).str.split(',').explode().str.strip()
+            self.products.update(items.unique())
+
+    def segment_mean_confidence(self, segment):
+        count = self.segment_counts.get(segment, 0)
+        return self.segment_conf_sums[segment] / count if count > 0 else 0
+
+    @property
+    def conf_mean(self):
+        return self.conf_sum / self.n_rules if self.n_rules else float('nan')
+
+    @property
+    def lift_mean(self):
+        return self.lift_sum / self.n_rules if self.n_rules else float('nan')
+
+    @property
+    def support_mean(self):
+        return self.support_sum / self.n_rules if self.n_rules else float('nan')
+
+
+def _partition_rules(path, workdir, tag, keywords, chunksize, n_buckets):
+    """Stream a rule file into hash buckets on disk, collecting stats on the way"""
+    stats = RuleFileStats(keywords)
+    for chunk in iter_rule_chunks(path, chunksize):
+        chunk = chunk.reset_index(drop=True)
+        stats.update(chunk)
+        chunk['Pattern_Key'] = pattern_hash(chunk['Antecedent_Items'], chunk['Consequent_Items'])
+        bucket = (chunk['Pattern_Key'] % np.uint64(n_buckets)).astype(np.int64)
+        for b, part in chunk.groupby(bucket):
+            bucket_file = workdir / f"{tag}_{b:03d}.csv"
+            part.to_csv(bucket_file, mode='a', header=not bucket_file.exists(), index=False)
+    return stats
+
+
+def _read_bucket(bucket_file):
+    """Load one bucket, keeping the highest-confidence rule per pattern"""
+    if not bucket_file.exists():
+        return None
+    part = pd.read_csv(bucket_file, dtype={'Pattern_Key': np.uint64})
+    part = part.sort_values('Confidence', ascending=False)
+    return part.drop_duplicates('Pattern_Key', keep='first')
+
+
+def stream_compare(path1, path2, keywords, chunksize=CHUNK_SIZE, n_buckets=N_BUCKETS,
+                   overlaps_file=None, max_kept=MAX_KEPT_OVERLAPS):
+    """
+    Compare two complete rule files in bounded memory
+
+    Args:
+        path1, path2: Rule CSVs exported by the analysis scripts
+        keywords: Product keywords to count rule involvement for
+        chunksize: Rules read per chunk
+        n_buckets: Number of hash partitions for the overlap join
+        overlaps_file: Optional CSV receiving every overlapping pattern
+        max_kept: Overlapping patterns (highest DS1 confidence) kept in memory
+
+    Returns:
+        dict with per-file RuleFileStats ('stats1', 'stats2'), unique pattern
+        counts, the overlap count, delta statistics and the kept overlaps
+    """
+    workdir = Path(tempfile.mkdtemp(prefix="rule_compare_"))
+    try:
+        stats1 = _partition_rules(path1, workdir, 'ds1', keywords, chunksize, n_buckets)
+        stats2 = _partition_rules(path2, workdir, 'ds2', keywords, chunksize, n_buckets)
+
+        if overlaps_file is not None and Path(overlaps_file).exists():
+            Path(overlaps_file).unlink()
+
+        n_patterns1 = n_patterns2 = n_common = 0
+        conf_delta_sum = lift_delta_sum = 0.0
+        conf_abs_delta_sum = 0.0
+        kept = None
+
+        for b in range(n_buckets):
+            part1 = _read_bucket(workdir / f"ds1_{b:03d}.csv")
+            part2 = _read_bucket(workdir / f"ds2_{b:03d}.csv")
+            n_patterns1 += 0 if part1 is None else len(part1)
+            n_patterns2 += 0 if part2 is None else len(part2)
+            if part1 is None or part2 is None:
+                continue
+
+            joined = part1.merge(part2, on='Pattern_Key', suffixes=('_1', '_2'))
+            if len(joined) == 0:
+                continue
+
+            overlaps = pd.DataFrame({
+                'Pattern': joined['Antecedent_Items_1'] + ' → ' + joined['Consequent_Items_1'],
+                'DS1_Confidence': joined['Confidence_1'],
+                'DS2_Confidence': joined['Confidence_2'],
+                'DS1_Lift': joined['Lift_1'],
+                'DS2_Lift': joined['Lift_2'],
+                'DS1_Segment': joined['Time_Segment_1'],
+                'DS2_Segment': joined['Time_Segment_2'],
+                'Confidence_Delta': joined['Confidence_2'] - joined['Confidence_1'],
+                'Lift_Delta': joined['Lift_2'] - joined['Lift_1']
+            })
+
+            n_common += len(overlaps)
+            conf_delta_sum += overlaps['Confidence_Delta'].sum()
+            conf_abs_delta_sum += overlaps['Confidence_Delta'].abs().sum()
+            lift_delta_sum += overlaps['Lift_Delta'].sum()
+
+            if overlaps_file is not None:
+                overlaps.to_csv(overlaps_file, mode='a',
+                                header=not Path(overlaps_file).exists(), index=False)
+
+            kept = overlaps if kept is None else pd.concat([kept, overlaps], ignore_index=True)
+            kept = kept.nlargest(max_kept, 'DS1_Confidence')
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if kept is None:
+        kept = pd.DataFrame()
+
+    return {
+        'stats1': stats1,
+        'stats2': stats2,
+        'n_patterns1': n_patterns1,
+        'n_patterns2': n_patterns2,
+        'n_common': n_common,
+        'mean_confidence_delta': conf_delta_sum / n_common if n_common else float('nan'),
+        'mean_abs_confidence_delta': conf_abs_delta_sum / n_common if n_common else float('nan'),
+        'mean_lift_delta': lift_delta_sum / n_common if n_common else float('nan'),
+        'overlaps': kept.reset_index(drop=True)
+    }
@@ -2,16 +2,25 @@
 Main Script to Run Complete Apriori Analysis Pipeline
 ======================================================
 
-This script runs all analysis components in the correct sequence:
+This script runs all analysis components in dependency order:
 1. Primary dataset Apriori analysis
-2. Visualization generation
+2. Visualization generation            (needs 1)
 3. Secondary dataset Apriori analysis
-4. Cross-dataset comparison
-5. Comprehensive verification
-6. Results explanation
+4. Cross-dataset comparison            (needs 1 and 3)
+
+Independent branches run at the same time (the two dataset analyses start
+together), with every output line prefixed by its step name. If a step
+fails, the steps still running are cancelled and nothing new is started.
+
+Each step declares its inputs (data files, parameters, upstream artifacts)
+and outputs. A step is skipped when the hash of its inputs matches the one
+recorded in the pipeline manifest and all of its outputs still exist, so
+re-running the visualizations after a styling tweak does not re-mine the data.
 
 Usage:
-    python3 run_analysis.py
+    python3 run_analysis.py            # Run only steps whose inputs changed
+    python3 run_analysis.py --force    # Re-run every step
+    python3 run_analysis.py --jobs 1   # Run one step at a time
 
 Estimated Runtime: 5-10 minutes
 
@@ -19,69 +28,284 @@ Author: Course Project
 Date: November 2024
 """
 
+import argparse
+import ast
+import hashlib
+import json
+import os
 import subprocess
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
 from datetime import datetime
 
+ROOT = Path(__file__).parent
+MANIFEST_FILE = Path(".pipeline_manifest.json")
+KAGGLEHUB_CACHE = Path.home() / ".cache/kagglehub/datasets"
+
+DATASET1_FILE = "Coffee Shop Sales Dashboard by Alfi Aziz.xlsx"
+DATASET1_CANDIDATES = [
+    ROOT / DATASET1_FILE,
+    KAGGLEHUB_CACHE / "alfiaziz003/coffee-shop-sales-dashboard-by-alfi-aziz/versions/1" / DATASET1_FILE,
+]
+DATASET2_DIR = KAGGLEHUB_CACHE / "ylchang/coffee-shop-sample-data-1113/versions/1"
+
+# Helper modules imported by the analysis scripts; a change to any of them
+# invalidates the steps that use it
+RULE_MODULES = ["rule_streaming.py", "rule_diff.py", "rule_significance.py", "rule_database.py",
+                "run_report.py", "basket_mining.py", "profiling.py", "adaptive_support.py",
+                "demand_forecast.py", "xlsx_stream.py", "rule_store.py", "summary_report.py",
+                "dataset_loaders.py"]
+FIGURE_MODULES = ["figure_rendering.py"]
+
+# The analysis pipeline as a DAG of steps
+PIPELINE = [
+    {
+        'name': 'primary_analysis',
+        'script': 'apriori_analysis.py',
+        'description': 'Primary Dataset Apriori Analysis',
+        'after': [],
+        'inputs': [p for p in DATASET1_CANDIDATES[:1] if p.exists()] or DATASET1_CANDIDATES[1:],
+        'modules': RULE_MODULES,
+        'outputs': ['apriori_results/association_rules_by_segment.csv',
+                    'apriori_results/analysis_summary.txt',
+                    'apriori_results/demand_forecast.csv'],
+    },
+    {
+        'name': 'visualizations',
+        'script': 'visualize_results.py',
+        'description': 'Generate Visualizations and Figures',
+        'after': ['primary_analysis'],
+        'inputs': ['apriori_results/association_rules_by_segment.csv'],
+        'modules': FIGURE_MODULES + ["rule_network.py"],
+        'outputs': ['visualizations/1_confidence_by_segment.png',
+                    'visualizations/2_lift_by_segment.png',
+                    'visualizations/3_support_confidence_scatter.png',
+                    'visualizations/4_association_network.png',
+                    'visualizations/5_combined_dashboard.png',
+                    'visualizations/6_inventory_recommendations.png'],
+    },
+    {
+        'name': 'secondary_analysis',
+        'script': 'apriori_new_dataset.py',
+        'description': 'Secondary Dataset Apriori Analysis',
+        'after': [],
+        'inputs': [DATASET2_DIR / "201904 sales reciepts.csv", DATASET2_DIR / "product.csv"],
+        'modules': RULE_MODULES,
+        'outputs': ['apriori_results_new/association_rules_by_segment.csv',
+                    'apriori_results_new/analysis_summary.txt',
+                    'apriori_results_new/demand_forecast.csv'],
+    },
+    {
+        'name': 'comparison',
+        'script': 'compare_datasets.py',
+        'description': 'Cross-Dataset Comparison Analysis',
+        'after': ['primary_analysis', 'secondary_analysis'],
+        'inputs': ['apriori_results/association_rules_by_segment.csv',
+                   'apriori_results_new/association_rules_by_segment.csv'],
+        'modules': FIGURE_MODULES + ["rule_streaming.py", "run_report.py", "summary_report.py"],
+        'outputs': ['comparison_results/comparison_report.txt',
+                    'comparison_results/metrics_comparison.csv'],
+    },
+]
+
 def print_banner(text):
     """Print a formatted banner"""
     print("\n" + "="*80)
     print(text.center(80))
     print("="*80 + "\n")
 
-def print_section(text):
-    """Print a formatted section header"""
-    print("\n" + "-"*80)
-    print(text)
-    print("-"*80)
+def file_digest(path):
+    """SHA-256 of a file's content, or None if it does not exist"""
+    path = Path(path)
+    if not path.is_file():
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def script_parameters(script_path):
+    """
+    Top-level UPPERCASE constants with literal values (MIN_SUPPORT, ...)
+
+    These are the tunable parameters of each analysis script. They are
+    already covered by the script's content hash, but are recorded in the
+    manifest so it is clear which settings produced the cached outputs.
+    """
+    tree = ast.parse(Path(script_path).read_text())
+    params = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1:
+            target = node.targets[0]
+            if isinstance(target, ast.Name) and target.id.isupper():
+                try:
+                    params[target.id] = ast.literal_eval(node.value)
+                except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+                    # Not a plain literal (e.g. Path(...), 2**10): not recorded
+                    continue
+    return params
 
-def run_script(script_name, description):
+def step_fingerprint(step):
     """
-    Run a Python script and handle errors
+    Hash everything a step depends on
+
+    Returns:
+        tuple (hash, details): hash is None when a declared input is missing,
+        which forces the step to run
+    """
+    script_path = ROOT / step['script']
+    details = {
+        'script': file_digest(script_path),
+        'modules': {m: file_digest(ROOT / m) for m in step['modules']},
+        'inputs': {str(p): file_digest(p) for p in step['inputs']},
+        'parameters': script_parameters(script_path),
+        'python': sys.version.split()[0],
+    }
+    if details['script'] is None or None in details['inputs'].values():
+        return None, details
+    payload = json.dumps(details, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest(), details
+
+def load_manifest():
+    """Read the step manifest from the previous runs"""
+    if MANIFEST_FILE.exists():
+        try:
+            return json.loads(MANIFEST_FILE.read_text())
+        except json.JSONDecodeError:
+            print(f"⚠️  Ignoring unreadable manifest: {MANIFEST_FILE}")
+    return {}
+
+def save_manifest(manifest):
+    """Write the step manifest"""
+    MANIFEST_FILE.write_text(json.dumps(manifest, indent=2, sort_keys=True, default=str))
+
+def is_up_to_date(step, fingerprint, manifest):
+    """A step is current if its input hash is unchanged and all outputs exist"""
+    entry = manifest.get(step['name'])
+    return (fingerprint is not None
+            and entry is not None
+            and entry.get('input_hash') == fingerprint
+            and all(Path(o).exists() for o in step['outputs']))
+
+def topological_order(pipeline):
+    """Order steps so that every step runs after the steps it depends on"""
+    by_name = {step['name']: step for step in pipeline}
+    ordered, visiting, done = [], set(), set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Pipeline dependency cycle at step '{name}'")
+        visiting.add(name)
+        for dependency in by_name[name]['after']:
+            visit(dependency)
+        visiting.discard(name)
+        done.add(name)
+        ordered.append(by_name[name])
+
+    for step in pipeline:
+        visit(step['name'])
+    return ordered
+
+# Serializes console output from concurrently running steps
+_print_lock = threading.Lock()
+# Set on the first failure so that no further step is started
+_stop = threading.Event()
+
+def log(text=""):
+    """Print a complete block of lines without interleaving"""
+    with _print_lock:
+        print(text, flush=True)
+
+def run_script(script_name, description, prefix, running):
+    """
+    Run a Python script, streaming its output with a step prefix
 
     Args:
         script_name: Name of the script file
         description: Description of what the script does
+        prefix: Tag printed in front of every output line
+        running: Shared dict of running processes (used for cancellation)
 
     Returns:
-        bool: True if successful, False otherwise
+        str: 'success', 'failed' or 'cancelled'
     """
     script_path = Path(__file__).parent / script_name
 
+    if _stop.is_set():
+        return 'cancelled'
     if not script_path.exists():
-        print(f"❌ ERROR: Script '{script_name}' not found!")
-        return False
+        log(f"{prefix} ❌ ERROR: Script '{script_name}' not found!")
+        return 'failed'
 
-    print_section(f"Running: {description}")
-    print(f"Script: {script_name}")
-    print(f"Started: {datetime.now().strftime('%H:%M:%S')}")
-    print()
+    log(f"\n{'-'*80}\n{prefix} Running: {description}\n"
+        f"{prefix} Script: {script_name}\n"
+        f"{prefix} Started: {datetime.now().strftime('%H:%M:%S')}\n{'-'*80}")
 
     try:
-        # Run the script
-        result = subprocess.run(
-            [sys.executable, str(script_path)],
-            check=True,
-            capture_output=False,  # Show output in real-time
-            text=True
+        # Unbuffered child output so lines appear as they are printed
+        process = subprocess.Popen(
+            [sys.executable, "-u", str(script_path)],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            env={**os.environ, "PYTHONUNBUFFERED": "1"}
         )
+        with _print_lock:
+            running[script_name] = process
+            if _stop.is_set():
+                process.cancelled = True
+                process.terminate()
+
+        for line in process.stdout:
+            log(f"{prefix} {line.rstrip()}")
+        returncode = process.wait()
 
-        print(f"\n✓ Completed: {script_name}")
-        print(f"Finished: {datetime.now().strftime('%H:%M:%S')}")
-        return True
+        with _print_lock:
+            running.pop(script_name, None)
+            cancelled = getattr(process, 'cancelled', False)
+
+        if cancelled:
+            log(f"{prefix} ⚠️  Cancelled: {script_name}")
+            return 'cancelled'
+        if returncode != 0:
+            log(f"{prefix} ❌ ERROR: Script '{script_name}' failed with exit code {returncode}")
+            log(f"{prefix} Please check the error messages above and fix any issues.")
+            return 'failed'
+
+        log(f"{prefix} ✓ Completed: {script_name}\n"
+            f"{prefix} Finished: {datetime.now().strftime('%H:%M:%S')}")
+        return 'success'
 
-    except subprocess.CalledProcessError as e:
-        print(f"\n❌ ERROR: Script '{script_name}' failed with exit code {e.returncode}")
-        print(f"Please check the error messages above and fix any issues.")
-        return False
     except Exception as e:
-        print(f"\n❌ ERROR: Unexpected error running '{script_name}': {str(e)}")
-        return False
+        log(f"{prefix} ❌ ERROR: Unexpected error running '{script_name}': {str(e)}")
+        return 'failed'
+
+def cancel_running(running, futures):
+    """Terminate every step that is still running and drop queued ones (fail-fast)"""
+    _stop.set()
+    for future in futures:
+        future.cancel()
+    with _print_lock:
+        for process in running.values():
+            process.cancelled = True
+            process.terminate()
 
 def main():
     """Main execution function"""
 
+    parser = argparse.ArgumentParser(description="Run the complete Apriori analysis pipeline")
+    parser.add_argument('--force', action='store_true',
+                        help="re-run every step even if its inputs are unchanged")
+    parser.add_argument('--jobs', type=int, default=None,
+                        help="maximum steps running at the same time (default: no limit)")
+    args = parser.parse_args()
+
     print_banner("TIME-SEGMENTED APRIORI ANALYSIS - COMPLETE PIPELINE")
 
     start_time = datetime.now()
@@ -89,30 +313,91 @@ def main():
     print(f"Python version: {sys.version.split()[0]}")
     print(f"Working directory: {Path.cwd()}")
 
-    # Define the analysis pipeline (only essential scripts)
-    pipeline = [
-        ("apriori_analysis.py", "Step 1/3: Primary Dataset Apriori Analysis"),
-        ("visualize_results.py", "Step 2/3: Generate Visualizations and Figures"),
-        ("compare_datasets.py", "Step 3/3: Cross-Dataset Comparison Analysis"),
-    ]
+    pipeline = topological_order(PIPELINE)
+    manifest = load_manifest()
 
     # Track results
     results = []
+    status = {}
+    running = {}
+    pending = list(pipeline)
+    futures = {}
+    failed_step = None
+    numbers = {step['name']: i for i, step in enumerate(pipeline, 1)}
 
-    # Execute each script in sequence
-    for i, (script, description) in enumerate(pipeline, 1):
-        success = run_script(script, description)
-        results.append((script, success))
-
-        if not success:
-            print_banner("PIPELINE STOPPED DUE TO ERROR")
-            print(f"Failed at step {i}/{len(pipeline)}: {script}")
-            print("\nPlease review the error messages above and:")
-            print("1. Ensure all required libraries are installed (pip install -r requirements.txt)")
-            print("2. Verify the dataset files are present")
-            print("3. Check that you have sufficient disk space")
-            print("4. Review the README.md for troubleshooting tips")
-            sys.exit(1)
+    def record(step, outcome, fingerprint, details):
+        """Update the manifest after a step finished"""
+        if outcome != 'success':
+            manifest.pop(step['name'], None)
+        else:
+            # Upstream outputs may have changed, so hash inputs again after the run
+            if fingerprint is None:
+                fingerprint, details = step_fingerprint(step)
+            manifest[step['name']] = {
+                'input_hash': fingerprint,
+                'inputs': details,
+                'outputs': {o: file_digest(o) for o in step['outputs']},
+                'finished': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            }
+        save_manifest(manifest)
+
+    # Start every step whose dependencies are satisfied; independent
+    # branches run concurrently, up to --jobs steps at a time
+    with ThreadPoolExecutor(max_workers=args.jobs or len(pipeline)) as pool:
+        while pending or futures:
+            started = True
+            while started and failed_step is None:
+                started = False
+                for step in list(pending):
+                    if not all(status.get(d) in ('success', 'skipped') for d in step['after']):
+                        continue
+                    pending.remove(step)
+                    started = True
+
+                    description = f"Step {numbers[step['name']]}/{len(pipeline)}: {step['description']}"
+                    fingerprint, details = step_fingerprint(step)
+
+                    if not args.force and is_up_to_date(step, fingerprint, manifest):
+                        log(f"\n{'-'*80}\nSkipping: {description}\n"
+                            f"Inputs unchanged since {manifest[step['name']]['finished']} "
+                            f"(hash {fingerprint[:12]}); outputs are up to date")
+                        status[step['name']] = 'skipped'
+                        results.append((step['script'], 'skipped'))
+                        continue
+
+                    future = pool.submit(run_script, step['script'], description,
+                                         f"[{step['name']}]", running)
+                    futures[future] = (step, fingerprint, details)
+
+            if not futures:
+                break
+
+            finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in finished:
+                step, fingerprint, details = futures.pop(future)
+                outcome = 'cancelled' if future.cancelled() else future.result()
+                status[step['name']] = outcome
+                results.append((step['script'], outcome))
+                record(step, outcome, fingerprint, details)
+
+                if outcome == 'failed' and failed_step is None:
+                    failed_step = step
+                    cancel_running(running, futures)
+
+    if failed_step is not None:
+        cancelled = [script for script, outcome in results if outcome == 'cancelled']
+        print_banner("PIPELINE STOPPED DUE TO ERROR")
+        print(f"Failed at step {numbers[failed_step['name']]}/{len(pipeline)}: {failed_step['script']}")
+        if cancelled:
+            print(f"Cancelled: {', '.join(cancelled)}")
+        if pending:
+            print(f"Not started: {', '.join(step['script'] for step in pending)}")
+        print("\nPlease review the error messages above and:")
+        print("1. Ensure all required libraries are installed (pip install -r requirements.txt)")
+        print("2. Verify the dataset files are present")
+        print("3. Check that you have sufficient disk space")
+        print("4. Review the README.md for troubleshooting tips")
+        sys.exit(1)
 
     # Calculate elapsed time
     end_time = datetime.now()
@@ -124,9 +409,9 @@ def main():
 
     print("Execution Summary:")
     print("-" * 80)
-    for script, success in results:
-        status = "✓ SUCCESS" if success else "❌ FAILED"
-        print(f"  {status}: {script}")
+    for script, outcome in results:
+        label = {"success": "✓ SUCCESS", "skipped": "↷ SKIPPED (cached)"}[outcome]
+        print(f"  {label}: {script}")
 
     print(f"\nTotal execution time: {int(minutes)} minutes {int(seconds)} seconds")
     print(f"Pipeline completed at: {end_time.strftime('%Y-%m-%d %H:%M:%S')}")
@@ -135,9 +420,10 @@ def main():
     print("OUTPUT LOCATIONS:")
     print("="*80)
     print("  • Association Rules:    apriori_results/")
+    print("  • Dataset 2 Rules:      apriori_results_new/")
     print("  • Visualizations:       visualizations/")
     print("  • Comparison Results:   comparison_results/")
-    print("  • Verification Report:  verification_report.txt")
+    print(f"  • Step Manifest:        {MANIFEST_FILE}")
     print("\nAll results are ready for review!")
     print("="*80 + "\n")
 
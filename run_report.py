@@ -0,0 +1,251 @@
+"""
+Per-Phase Timing and Memory Instrumentation
+
+A lightweight recorder for the phase-structured analysis scripts. Each phase
+(and each time segment inside a phase) records wall time, CPU time, resident
+memory and whatever row/basket/rule counts the script attaches to it. The
+result is written as a machine-readable JSON run report, so runs on
+production-size data can be compared and regressions tracked.
+
+Usage:
+    report = RunReport("apriori_analysis", OUTPUT_DIR / "run_report.json")
+    report.begin("Phase 1: Loading")        # ends the previous phase
+    report.count(rows=len(df))
+    report.segment("Morning_Weekday", baskets=1234)
+    report.segment_count(rules=56)
+    report.save()
+
+An optional profiling.Profiler is switched along with the phases and segments.
+
+CPU time includes finished child processes (e.g. figure workers). Peak RSS is
+measured per phase and segment on Linux: the kernel's high-water mark (VmHWM)
+is reset through /proc/self/clear_refs when a span starts and read when it
+ends, and folded into the enclosing spans before every reset. Elsewhere it
+falls back to ru_maxrss, the process high-water mark since start, and the span
+is marked `peak_rss_cumulative`. Without either source it is reported as null.
+"""
+
+import json
+import os
+import platform
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def cpu_seconds():
+    """User + system CPU time of this process and its finished children"""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process since start in MB, or None if unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def current_rss_mb():
+    """Current resident set size in MB (Linux only), or None"""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+def resettable_peak_rss_mb():
+    """Kernel high-water mark VmHWM in MB (Linux only, reset by reset_peak_rss), or None"""
+    try:
+        with open('/proc/self/status') as f:
+            match = re.search(r'^VmHWM:\s+(\d+) kB', f.read(), re.MULTILINE)
+    except OSError:
+        return None
+    return int(match.group(1)) / 1024 if match else None
+
+
+def reset_peak_rss():
+    """Reset VmHWM to the current RSS; False if the kernel does not allow it"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        return False
+    return True
+
+
+def _round(value, digits=3):
+    return None if value is None else round(value, digits)
+
+
+class _Span:
+    """Wall/CPU/memory measurement between start and stop"""
+
+    def __init__(self, name, counts, peak_resettable):
+        self.name = name
+        self.counts = dict(counts)
+        self.wall_start = time.perf_counter()
+        self.cpu_start = cpu_seconds()
+        self.rss_start = current_rss_mb()
+        self.peak_resettable = peak_resettable
+        self.peak = None
+        self.result = None
+
+    def observe_peak(self, peak):
+        """Fold a high-water mark reading into this span's peak"""
+        if peak is not None and (self.peak is None or peak > self.peak):
+            self.peak = peak
+
+    def stop(self):
+        if self.result is not None:
+            return self.result
+        rss_end = current_rss_mb()
+        if self.peak_resettable:
+            self.observe_peak(resettable_peak_rss_mb())
+        else:
+            self.peak = peak_rss_mb()
+        self.result = {
+            'name': self.name,
+            'wall_seconds': _round(time.perf_counter() - self.wall_start),
+            'cpu_seconds': _round(cpu_seconds() - self.cpu_start),
+            'peak_rss_mb': _round(self.peak, 1),
+            'peak_rss_cumulative': not self.peak_resettable,
+            'rss_delta_mb': (_round(rss_end - self.rss_start, 1)
+                             if rss_end is not None and self.rss_start is not None else None),
+            'counts': self.counts,
+        }
+        return self.result
+
+
+class RunReport:
+    """Collects per-phase and per-segment measurements for one script run"""
+
+    def __init__(self, script, output_file, parameters=None, profiler=None):
+        """
+        Args:
+            script: Name of the instrumented script
+            output_file: Path of the JSON report
+            parameters: Optional dict of run parameters to record
+            profiler: Optional profiling.Profiler driven by begin()/segment()
+        """
+        self.script = script
+        self.output_file = Path(output_file)
+        self.parameters = parameters or {}
+        self.profiler = profiler
+        self.started = datetime.now()
+        self._peak_resettable = resettable_peak_rss_mb() is not None and reset_peak_rss()
+        self._phase = None
+        self._segment = None
+        self._run = _Span(script, {}, self._peak_resettable)
+        self.phases = []
+
+    def _start_span(self, name, counts):
+        """New span with VmHWM reset, after handing the current mark to the open spans"""
+        if self._peak_resettable:
+            peak = resettable_peak_rss_mb()
+            for span in (self._run, self._phase, self._segment):
+                if span is not None:
+                    span.observe_peak(peak)
+            reset_peak_rss()
+        return _Span(name, counts, self._peak_resettable)
+
+    def _stop_span(self, span):
+        """Stop a span, handing its high-water mark to the spans around it"""
+        result = span.stop()
+        for outer in (self._run, self._phase):
+            if outer is not None and outer is not span:
+                outer.observe_peak(span.peak)
+        return result
+
+    def begin(self, phase, **counts):
+        """Start a phase, ending the current one (and its open segment)"""
+        self.end()
+        if self.profiler is not None:
+            self.profiler.begin_phase(phase)
+        self._phase = self._start_span(phase, counts)
+        self._phase.segments = []
+
+    def count(self, **counts):
+        """Attach counts to the current phase"""
+        if self._phase is not None:
+            self._phase.counts.update(counts)
+
+    def segment(self, name, **counts):
+        """Start a segment inside the current phase, ending the previous segment"""
+        self._end_segment()
+        if self.profiler is not None:
+            self.profiler.segment(name)
+        if self._phase is not None:
+            self._segment = self._start_span(name, counts)
+
+    def segment_count(self, **counts):
+        """Attach counts to the current segment"""
+        if self._segment is not None:
+            self._segment.counts.update(counts)
+
+    def _end_segment(self):
+        if self._segment is not None:
+            self._phase.segments.append(self._stop_span(self._segment))
+            self._segment = None
+
+    def end(self):
+        """End the current phase"""
+        self._end_segment()
+        if self._phase is not None:
+            if self.profiler is not None:
+                self.profiler.end_phase()
+            result = self._stop_span(self._phase)
+            if self._phase.segments:
+                result['segments'] = self._phase.segments
+            self.phases.append(result)
+            self._phase = None
+
+    def to_dict(self):
+        """The run report as a JSON-serializable dict"""
+        self.end()
+        total = self._run.stop()
+        profile_files = self.profiler.finish() if self.profiler is not None else []
+        return {
+            'script': self.script,
+            'started': self.started.strftime('%Y-%m-%d %H:%M:%S'),
+            'finished': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'parameters': self.parameters,
+            'wall_seconds': total['wall_seconds'],
+            'cpu_seconds': total['cpu_seconds'],
+            'peak_rss_mb': total['peak_rss_mb'],
+            'peak_rss_cumulative': total['peak_rss_cumulative'],
+            'phases': self.phases,
+            'profile_files': profile_files,
+        }
+
+    def save(self):
+        """End the run and write the JSON report; returns the report dict"""
+        report = self.to_dict()
+        self.output_file.parent.mkdir(parents=True, exist_ok=True)
+        self.output_file.write_text(json.dumps(report, indent=2, default=str))
+        return report
+
+    def format_table(self):
+        """Phase timing table for the console"""
+        lines = [f"{'Phase':<56} {'Wall (s)':>9} {'CPU (s)':>9} {'Peak RSS (MB)':>14}"]
+        for phase in self.phases:
+            rss = '-' if phase['peak_rss_mb'] is None else f"{phase['peak_rss_mb']:.1f}"
+            lines.append(f"{phase['name'][:56]:<56} {phase['wall_seconds']:>9.2f} "
+                         f"{phase['cpu_seconds']:>9.2f} {rss:>14}")
+        if not self._peak_resettable:
+            lines.append("(Peak RSS is the process high-water mark since start, not per phase)")
+        return "\n".join(lines)
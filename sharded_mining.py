@@ -0,0 +1,251 @@
+"""
+Sharded Per-Store Mining with Merged Chain-Wide Results
+
+The analysis scripts mine all stores together. This script partitions the
+stored baskets by store and mines each shard in a parallel worker process,
+in the two phases of SON (see son_mining.py):
+
+    phase 1   a worker mines its store per time segment (level-wise Apriori
+              counts, itemset_counts.py) and derives the store's rules; the
+              store's frequent itemsets are its chain-wide candidates
+    phase 2   a worker counts the union of all stores' candidates on its
+              store; the coordinator sums the counts per segment
+
+An itemset frequent chain-wide is frequent in at least one store, so the
+summed counts give the exact chain-wide rules. Only candidates travel
+between processes, never the subsets that no store finds frequent.
+
+It works from the baskets and stores saved in <results>/rules.db, so run the
+analysis script once first.
+
+Outputs (in the results directory):
+    store_rules.csv     rules per store and segment
+    chain_rules.csv     chain-wide rules from the summed shard counts
+    store_summary.csv   baskets, candidates and rules per store and segment,
+                        plus rules found only in that store, the largest
+                        frequent itemset and whether --max-len cut the
+                        counting short (capped)
+
+Usage:
+    python3 sharded_mining.py apriori_results
+    python3 sharded_mining.py apriori_results --jobs 4 --min-support 0.03
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from itemset_counts import (MAX_LEN, basket_matrix, count_candidates, encode_items, export_rules,
+                            largest_frequent, levelwise_counts, rules_from_counts)
+from rule_database import load_baskets
+
+MIN_SUPPORT = 0.02
+MIN_CONFIDENCE = 0.40
+MIN_SEGMENT_BASKETS = 10  # Same cut-off as the analysis scripts
+
+
+def _by_segment(segments, codes):
+    """A store's baskets grouped by time segment"""
+    by_segment = {}
+    for segment, basket in zip(segments, codes):
+        by_segment.setdefault(segment, []).append(basket)
+    return sorted(by_segment.items())
+
+
+def mine_shard(store, segments, codes, vocabulary, min_support, min_confidence, max_len):
+    """
+    Phase 1: mine one store's baskets (runs in a worker process)
+
+    Returns:
+        dict with 'store', 'baskets' ({segment: n_baskets}), 'candidates'
+        ({segment: the store's frequent itemsets as code tuples}),
+        'largest' ({segment: (largest frequent itemset size, capped)}) and
+        'rules' (the store's rules with a time_segment column)
+    """
+    sizes, candidates, largest, all_rules = {}, {}, {}, []
+    for segment, baskets in _by_segment(segments, codes):
+        n_baskets = len(baskets)
+        # A hair below the threshold so float rounding can never drop a
+        # chain-wide frequent itemset
+        min_count = min_support * n_baskets * (1 - 1e-9)
+        itemsets, part_counts, capped = levelwise_counts(basket_matrix(baskets, len(vocabulary)),
+                                                         [min_count], max_len=max_len)
+        counts = part_counts[0]
+        sizes[segment] = n_baskets
+        candidates[segment] = [i for i, c in zip(itemsets, counts) if c >= min_count]
+        largest[segment] = (largest_frequent(itemsets, counts, min_support * n_baskets), capped)
+        if n_baskets < MIN_SEGMENT_BASKETS:
+            continue
+        _, rules = rules_from_counts(dict(zip(itemsets, counts.tolist())), n_baskets,
+                                     min_support, min_confidence, vocabulary)
+        if len(rules):
+            rules['time_segment'] = segment
+            all_rules.append(rules)
+    rules = pd.concat(all_rules, ignore_index=True) if all_rules else None
+    return {'store': store, 'baskets': sizes, 'candidates': candidates, 'largest': largest, 'rules': rules}
+
+
+def count_shard(segments, codes, n_items, candidates):
+    """Phase 2: one store's counts of every segment's chain-wide candidates (runs in a worker process)"""
+    return {segment: count_candidates(basket_matrix(baskets, n_items), candidates[segment])
+            for segment, baskets in _by_segment(segments, codes)}
+
+
+def merge_shards(shards, candidates, counted, vocabulary, min_support, min_confidence):
+    """
+    Chain-wide rules from the summed phase-2 shard counts
+
+    Returns:
+        tuple (rules, baskets_per_segment)
+    """
+    totals, sizes = {}, {}
+    for shard, counts in zip(shards, counted):
+        for segment, segment_counts in counts.items():
+            totals[segment] = totals.get(segment, 0) + segment_counts
+            sizes[segment] = sizes.get(segment, 0) + shard['baskets'][segment]
+
+    all_rules = []
+    for segment, n_baskets in sorted(sizes.items()):
+        if n_baskets < MIN_SEGMENT_BASKETS:
+            continue
+        _, rules = rules_from_counts(dict(zip(candidates[segment], totals[segment].tolist())), n_baskets,
+                                     min_support, min_confidence, vocabulary)
+        if len(rules):
+            rules['time_segment'] = segment
+            all_rules.append(rules)
+    rules = pd.concat(all_rules, ignore_index=True) if all_rules else pd.DataFrame(
+        columns=['antecedents', 'consequents', 'support', 'confidence', 'lift', 'time_segment'])
+    return rules, sizes
+
+
+def mine_sharded(baskets, jobs=None, min_support=MIN_SUPPORT, min_confidence=MIN_CONFIDENCE,
+                 max_len=MAX_LEN):
+    """
+    Mine every store in parallel and merge their candidate counts chain-wide
+
+    Args:
+        baskets: DataFrame with store, time_segment and items (load_baskets)
+        jobs: Worker processes (default: one per CPU, at most one per store)
+        max_len: Largest itemset size counted (None: no limit, as in the
+                 batch path)
+
+    Returns:
+        tuple (store_rules, chain_rules, summary)
+    """
+    baskets = baskets[baskets['items'].apply(len) > 1].reset_index(drop=True)
+    codes, vocabulary = encode_items(baskets['items'])
+    stores = sorted(baskets['store'].unique())
+    jobs = min(jobs or os.cpu_count() or 1, len(stores))
+    shard_baskets = []
+    for store in stores:
+        rows = baskets.index[baskets['store'] == store]
+        shard_baskets.append((baskets.loc[rows, 'time_segment'].tolist(), [codes[i] for i in rows]))
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(mine_shard, store, segments, shard_codes, vocabulary,
+                               min_support, min_confidence, max_len)
+                   for store, (segments, shard_codes) in zip(stores, shard_baskets)]
+        shards = [f.result() for f in futures]
+
+        # Chain-wide candidates: itemsets frequent in at least one store
+        candidates = {}
+        for shard in shards:
+            for segment, found in shard['candidates'].items():
+                candidates.setdefault(segment, set()).update(found)
+        candidates = {segment: sorted(found, key=lambda i: (len(i), i)) for segment, found in candidates.items()}
+
+        futures = [pool.submit(count_shard, segments, shard_codes, len(vocabulary), candidates)
+                   for segments, shard_codes in shard_baskets]
+        counted = [f.result() for f in futures]
+
+    chain_rules, chain_sizes = merge_shards(shards, candidates, counted, vocabulary, min_support, min_confidence)
+    chain_keys = set(zip(chain_rules['time_segment'], chain_rules['antecedents'], chain_rules['consequents']))
+
+    store_rules, summary = [], []
+    for shard in shards:
+        rules = shard['rules']
+        keys = [] if rules is None else list(zip(rules['time_segment'], rules['antecedents'],
+                                                 rules['consequents']))
+        for segment, n_baskets in sorted(shard['baskets'].items()):
+            segment_keys = [k for k in keys if k[0] == segment]
+            summary.append({'store': shard['store'], 'time_segment': segment, 'baskets': n_baskets,
+                            'share_of_chain': n_baskets / chain_sizes[segment],
+                            'candidates': len(shard['candidates'][segment]),
+                            'rules': len(segment_keys),
+                            'store_only_rules': sum(k not in chain_keys for k in segment_keys),
+                            'largest_itemset': shard['largest'][segment][0],
+                            'capped': shard['largest'][segment][1]})
+        if rules is not None:
+            rules.insert(0, 'store', shard['store'])
+            store_rules.append(rules)
+
+    store_rules = pd.concat(store_rules, ignore_index=True) if store_rules else pd.DataFrame(
+        columns=['store', 'antecedents', 'consequents', 'support', 'confidence', 'lift', 'time_segment'])
+    return store_rules, chain_rules, pd.DataFrame(summary)
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Mine rules per store in parallel and merge them chain-wide")
+    parser.add_argument('results_dir', type=Path, help="analysis output directory containing rules.db")
+    parser.add_argument('--jobs', type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument('--min-support', type=float, default=MIN_SUPPORT)
+    parser.add_argument('--min-confidence', type=float, default=MIN_CONFIDENCE)
+    parser.add_argument('--max-len', type=int, default=MAX_LEN,
+                        help="largest itemset size counted (default: every size that can be frequent)")
+    args = parser.parse_args(argv)
+
+    db_file = args.results_dir / "rules.db"
+    if not db_file.exists():
+        print(f"❌ ERROR: {db_file} not found. Run the analysis script for this dataset first.")
+        return 1
+    baskets = load_baskets(db_file)
+    if baskets['store'].isna().all():
+        print(f"❌ ERROR: {db_file} has no basket stores. Re-run the analysis script to store them.")
+        return 1
+
+    print("="*80)
+    print(f"SHARDED MINING: {baskets['store'].nunique()} stores")
+    print("="*80)
+
+    start = time.perf_counter()
+    store_rules, chain_rules, summary = mine_sharded(baskets, args.jobs, args.min_support,
+                                                     args.min_confidence, args.max_len)
+    elapsed = time.perf_counter() - start
+    print(f"✓ Mined {summary['store'].nunique()} shards and merged their counts in {elapsed:.2f}s "
+          f"({summary['candidates'].sum():,} store candidates)")
+    capped = summary[summary['capped']]
+    if len(capped):
+        print(f"⚠️  Itemsets capped at {args.max_len} items in {len(capped)} store/segment shards; "
+              f"longer itemsets have candidates there, so longer rules are missing")
+    else:
+        print(f"✓ Largest frequent itemset: {summary['largest_itemset'].max()} items (no size cap)")
+    print()
+
+    print("Rules per store and segment:")
+    print(summary.pivot(index='store', columns='time_segment', values='rules').fillna(0).astype(int).to_string())
+    print(f"\nChain-wide (summed shard counts): {len(chain_rules):,} rules")
+    print(f"Store-only rules (not found chain-wide): {summary['store_only_rules'].sum():,}")
+    print()
+
+    store_file = args.results_dir / "store_rules.csv"
+    store_export = export_rules(store_rules)
+    store_export.insert(0, 'Store', store_rules['store'].to_numpy())
+    store_export.to_csv(store_file, index=False)
+    chain_file = args.results_dir / "chain_rules.csv"
+    export_rules(chain_rules).to_csv(chain_file, index=False)
+    summary_file = args.results_dir / "store_summary.csv"
+    summary.to_csv(summary_file, index=False)
+    print(f"✓ Saved per-store rules to: {store_file}")
+    print(f"✓ Saved chain-wide rules to: {chain_file}")
+    print(f"✓ Saved store summary to: {summary_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
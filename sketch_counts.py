@@ -0,0 +1,286 @@
+"""
+Bounded-Memory Approximate Item and Pair Counting for Streams
+
+Exact pair counts grow with the catalog and never shrink. This backend keeps
+a fixed memory footprint per segment:
+
+    Count-Min sketch   depth × width counters for items and for pairs. An
+                       estimate never undercounts and overcounts by at most
+                       e/width × N with probability 1 - e^-depth (N = total
+                       items or pairs counted)
+    Space-Saving       the `capacity` most frequent pairs with their counts.
+                       Every pair counted more than N/capacity times is in
+                       the list, and no listed count is more than N/capacity
+                       above the true count
+
+A pair's count is the smaller of its two overestimates. SketchPairCounts has
+the same interface as pos_stream.ExactPairCounts, so pos_stream.pair_rules
+computes support, confidence and lift from it as in the batch path
+(`python3 pos_stream.py --counts sketch`).
+
+Reconciliation compares the sketch with exact counts on the baskets of an
+analysis run. It reports the count errors against their bounds and the
+rules gained or lost:
+
+    python3 sketch_counts.py apriori_results_new --width 512 --capacity 200
+
+Output: <results>/sketch_reconciliation.csv, one row per segment.
+"""
+
+import argparse
+import heapq
+import math
+import sys
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+WIDTH = 2048
+DEPTH = 4
+CAPACITY = 1000
+PAIR_SEPARATOR = '\x1f'
+_MERSENNE = np.uint64((1 << 61) - 1)
+
+
+def _key_hashes(keys):
+    """Stable 64-bit hashes of string keys"""
+    return pd.util.hash_array(np.asarray(keys, dtype=object))
+
+
+class CountMinSketch:
+    """Count-Min sketch over string keys"""
+
+    def __init__(self, width=WIDTH, depth=DEPTH, seed=0):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.uint32)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2**61 - 1, size=(depth, 1), dtype=np.uint64)
+        self._b = rng.integers(0, 2**61 - 1, size=(depth, 1), dtype=np.uint64)
+        self._rows = np.arange(depth)[:, None]
+        self.total = 0
+
+    def _columns(self, hashes):
+        # Wrapping multiply-add, then mod a Mersenne prime for mixing
+        with np.errstate(over='ignore'):
+            mixed = (self._a * hashes[None, :] + self._b) % _MERSENNE
+        return (mixed % np.uint64(self.width)).astype(np.int64)
+
+    def add(self, keys):
+        """Count each key once"""
+        if len(keys) == 0:
+            return
+        columns = self._columns(_key_hashes(keys))
+        np.add.at(self.table, (np.broadcast_to(self._rows, columns.shape), columns), 1)
+        self.total += len(keys)
+
+    def estimate(self, keys):
+        """Overestimates of the keys' counts"""
+        if len(keys) == 0:
+            return np.zeros(0, dtype=np.int64)
+        columns = self._columns(_key_hashes(keys))
+        return self.table[self._rows, columns].min(axis=0).astype(np.int64)
+
+    @property
+    def epsilon(self):
+        return math.e / self.width
+
+    @property
+    def delta(self):
+        return math.exp(-self.depth)
+
+    @property
+    def error_bound(self):
+        """Maximum overcount with probability 1 - delta"""
+        return self.epsilon * self.total
+
+    @property
+    def nbytes(self):
+        return self.table.nbytes
+
+
+class SpaceSaving:
+    """Space-Saving heavy hitters: the `capacity` most frequent keys"""
+
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self.counts = {}  # key -> (count, overestimate)
+        self._heap = []  # (count, key), possibly stale
+        self.total = 0
+
+    def add(self, key):
+        self.total += 1
+        if key in self.counts:
+            count, error = self.counts[key]
+            self.counts[key] = (count + 1, error)
+            return
+        if len(self.counts) < self.capacity:
+            self.counts[key] = (1, 0)
+            heapq.heappush(self._heap, (1, key))
+            return
+        # Evict the current minimum; the newcomer inherits its count as error
+        while True:
+            count, victim = heapq.heappop(self._heap)
+            current = self.counts.get(victim)
+            if current is not None and current[0] == count:
+                break
+            if current is not None:
+                heapq.heappush(self._heap, (current[0], victim))
+        del self.counts[victim]
+        self.counts[key] = (count + 1, count)
+        heapq.heappush(self._heap, (count + 1, key))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(c, k) for k, (c, _) in self.counts.items()]
+            heapq.heapify(self._heap)
+
+    @property
+    def error_bound(self):
+        """Maximum overcount of any listed key; keys above it are always listed"""
+        return self.total / self.capacity
+
+
+class SketchPairCounts:
+    """Fixed-memory item and pair counts of one segment's baskets"""
+
+    def __init__(self, width=WIDTH, depth=DEPTH, capacity=CAPACITY, seed=0):
+        self.baskets = 0
+        self.items = CountMinSketch(width, depth, seed)
+        self.pairs = CountMinSketch(width, depth, seed + 1)
+        self.heavy = SpaceSaving(capacity)
+
+    def add(self, items):
+        """Count one basket (a set of item names)"""
+        items = sorted(items)
+        pairs = [a + PAIR_SEPARATOR + b for a, b in combinations(items, 2)]
+        self.baskets += 1
+        self.items.add(items)
+        self.pairs.add(pairs)
+        for pair in pairs:
+            self.heavy.add(pair)
+
+    def item_count(self, item):
+        return int(self.items.estimate([item])[0])
+
+    def pair_items(self, min_count):
+        """(pair, count) for listed pairs whose estimate reaches min_count"""
+        keys = list(self.heavy.counts)
+        if not keys:
+            return []
+        estimates = np.minimum(self.pairs.estimate(keys),
+                               np.array([self.heavy.counts[k][0] for k in keys]))
+        return [(tuple(k.split(PAIR_SEPARATOR)), int(c)) for k, c in zip(keys, estimates) if c >= min_count]
+
+    def memory_entries(self):
+        return self.items.table.size + self.pairs.table.size + self.heavy.capacity
+
+    def error_bounds(self):
+        """Explicit count error bounds of the current state"""
+        return {
+            'item_count_error': self.items.error_bound,
+            'pair_count_error': min(self.pairs.error_bound, self.heavy.error_bound),
+            'confidence': 1 - self.items.delta,
+            'pairs_always_listed_above': self.heavy.error_bound,
+        }
+
+
+# ============================================================================
+# RECONCILIATION
+# ============================================================================
+
+def reconcile(baskets, width=WIDTH, depth=DEPTH, capacity=CAPACITY, min_support=0.02, min_confidence=0.40):
+    """
+    Compare sketch and exact counts (and the rules they give) per segment
+
+    Returns:
+        DataFrame with one row per segment
+    """
+    from pos_stream import ExactPairCounts, pair_rules
+
+    rows = []
+    for segment, items in baskets.groupby('time_segment', sort=True)['items']:
+        exact, sketch = ExactPairCounts(), SketchPairCounts(width, depth, capacity)
+        for basket in items:
+            basket = set(basket)
+            if len(basket) > 1:
+                exact.add(basket)
+                sketch.add(basket)
+        if exact.baskets == 0:
+            continue
+
+        true_pairs = exact.pairs
+        listed = dict(sketch.pair_items(0))
+        pair_errors = np.array([listed[p] - c for p, c in true_pairs.items() if p in listed])
+        item_errors = (sketch.items.estimate(list(exact.items))
+                       - np.array(list(exact.items.values())))
+        bounds = sketch.error_bounds()
+
+        exact_rules = {(r['antecedent'], r['consequent']): r
+                       for r in pair_rules(exact, segment, min_support, min_confidence)}
+        sketch_rules = {(r['antecedent'], r['consequent']): r
+                        for r in pair_rules(sketch, segment, min_support, min_confidence)}
+        shared = exact_rules.keys() & sketch_rules.keys()
+        rows.append({
+            'time_segment': segment,
+            'baskets': exact.baskets,
+            'exact_entries': exact.memory_entries(),
+            'sketch_bytes': sketch.items.nbytes + sketch.pairs.nbytes,
+            'heavy_hitter_capacity': capacity,
+            'pairs_listed': len(listed),
+            'pairs_exact': len(true_pairs),
+            'max_item_error': int(item_errors.max()) if len(item_errors) else 0,
+            'item_error_bound': bounds['item_count_error'],
+            'max_pair_error': int(pair_errors.max()) if len(pair_errors) else 0,
+            'pair_error_bound': bounds['pair_count_error'],
+            'exact_rules': len(exact_rules),
+            'sketch_rules': len(sketch_rules),
+            'rules_missed': len(exact_rules.keys() - sketch_rules.keys()),
+            'rules_extra': len(sketch_rules.keys() - exact_rules.keys()),
+            'max_confidence_error': max((abs(sketch_rules[k]['confidence'] - exact_rules[k]['confidence'])
+                                         for k in shared), default=0.0),
+        })
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    """Command-line entry point (reconciliation mode)"""
+    parser = argparse.ArgumentParser(description="Reconcile sketch counts against exact counts")
+    parser.add_argument('results_dir', type=Path, help="analysis output directory containing rules.db")
+    parser.add_argument('--width', type=int, default=WIDTH, help="Count-Min counters per row")
+    parser.add_argument('--depth', type=int, default=DEPTH, help="Count-Min rows")
+    parser.add_argument('--capacity', type=int, default=CAPACITY, help="heavy-hitter pairs kept")
+    parser.add_argument('--min-support', type=float, default=0.02)
+    parser.add_argument('--min-confidence', type=float, default=0.40)
+    args = parser.parse_args(argv)
+
+    from rule_database import load_baskets
+    db_file = args.results_dir / "rules.db"
+    if not db_file.exists():
+        print(f"❌ ERROR: {db_file} not found. Run the analysis script for this dataset first.")
+        return 1
+
+    print("="*80)
+    print(f"SKETCH RECONCILIATION: width {args.width}, depth {args.depth}, {args.capacity} heavy hitters")
+    print("="*80)
+    results = reconcile(load_baskets(db_file), args.width, args.depth, args.capacity,
+                        args.min_support, args.min_confidence)
+    print(results[['time_segment', 'baskets', 'max_item_error', 'item_error_bound', 'max_pair_error',
+                   'pair_error_bound', 'exact_rules', 'rules_missed', 'rules_extra',
+                   'max_confidence_error']].to_string(index=False))
+    print()
+
+    within = ((results['max_item_error'] <= results['item_error_bound'])
+              & (results['max_pair_error'] <= results['pair_error_bound']))
+    if within.all():
+        print("✓ All count errors within their bounds")
+    else:
+        print(f"⚠️  {(~within).sum()} segment(s) exceeded a bound (expected with probability ≤ e^-depth)")
+    output_file = args.results_dir / "sketch_reconciliation.csv"
+    results.to_csv(output_file, index=False)
+    print(f"✓ Saved reconciliation to: {output_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
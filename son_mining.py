@@ -0,0 +1,355 @@
+"""
+Partitioned Two-Phase (SON) Mining with a Coordinator and Workers
+
+For histories that do not fit one machine, the baskets of every segment are
+split into partitions and mined with the SON algorithm:
+
+    phase 1   each worker runs apriori on its partitions at the same relative
+              support; the union of locally frequent itemsets is the
+              candidate set (an itemset frequent overall is frequent in at
+              least one partition, so nothing is missed)
+    phase 2   each worker counts every candidate on its partitions; the
+              coordinator sums the counts and keeps candidates whose global
+              support reaches the threshold
+
+Rules are then generated from the exact global supports, so the result is
+the same as mining each segment on one node (use --verify to check).
+
+Coordinator and workers talk through multiprocessing.connection over TCP
+with an HMAC-authenticated handshake. The coordinator listens on --bind and
+starts --local-workers worker processes on this machine. Workers on other
+machines join with:
+
+    python3 son_mining.py --worker coordinator-host:6123 --authkey <key>
+
+Messages are pickled tuples; only run workers against a coordinator you
+trust. The coordinator sends each partition to its worker once, as integer
+item codes, and afterwards only sends candidate lists.
+
+Output (in the results directory):
+    son_rules.csv   rules of every segment
+
+Usage:
+    python3 son_mining.py apriori_results --local-workers 4 --partitions 8 --verify
+    python3 son_mining.py apriori_results --bind 0.0.0.0:6123 --local-workers 0 --remote-workers 3
+"""
+
+import argparse
+import os
+import secrets
+import subprocess
+import sys
+import time
+from multiprocessing.connection import Client, Listener, wait
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from mlxtend.frequent_patterns import apriori, association_rules
+
+from itemset_counts import basket_matrix, count_candidates, encode_items, export_rules
+from rule_database import load_baskets
+
+MIN_SUPPORT = 0.02
+MIN_CONFIDENCE = 0.40
+MIN_SEGMENT_BASKETS = 10  # Same cut-off as the analysis scripts
+DEFAULT_BIND = "127.0.0.1:0"  # Port 0 = any free port
+AUTHKEY_ENV = "SON_AUTHKEY"
+
+
+# ============================================================================
+# WORKER
+# ============================================================================
+
+def local_frequent(X, min_support):
+    """Phase 1: itemsets frequent within one partition, as sorted code tuples"""
+    if X.shape[0] == 0:
+        return []
+    present = np.flatnonzero(X.any(axis=0))
+    itemsets = apriori(pd.DataFrame(X[:, present]), min_support=min_support)
+    return [tuple(sorted(present[list(i)].tolist())) for i in itemsets['itemsets']]
+
+
+def run_worker(address, authkey):
+    """
+    Serve partition requests from a coordinator until told to stop
+
+    A request that raises is answered with ('error', key, message) and the
+    worker keeps serving, so the coordinator can report it and shut down.
+    """
+    partitions = {}
+    with Client(address, authkey=authkey) as conn:
+        while True:
+            message = conn.recv()
+            command = message[0]
+            if command == 'stop':
+                return
+            key = message[1]
+            try:
+                if command == 'load':
+                    _, key, n_items, baskets = message
+                    partitions[key] = basket_matrix(baskets, n_items)
+                    conn.send(('ok', key, None))
+                elif command == 'local':
+                    _, key, min_support = message
+                    conn.send(('local', key, local_frequent(partitions[key], min_support)))
+                elif command == 'count':
+                    _, key, candidates = message
+                    conn.send(('count', key, count_candidates(partitions[key], candidates)))
+                else:
+                    raise ValueError(f"unknown command '{command}'")
+            except Exception as e:
+                conn.send(('error', key, f"{type(e).__name__}: {e}"))
+
+
+# ============================================================================
+# COORDINATOR
+# ============================================================================
+
+def parse_address(value):
+    """'host:port' → (host, port)"""
+    host, _, port = value.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+class Coordinator:
+    """Accepts workers and farms requests out to them"""
+
+    def __init__(self, bind=DEFAULT_BIND, authkey=None, local_workers=None, remote_workers=0):
+        """
+        Args:
+            bind: 'host:port' to listen on
+            authkey: Shared secret (bytes); random when only local workers join
+            local_workers: Worker processes to start here (default: one per CPU)
+            remote_workers: Workers expected to connect from elsewhere
+        """
+        n_local = (os.cpu_count() or 1) if local_workers is None else local_workers
+        if n_local + remote_workers == 0:
+            raise ValueError("at least one local or remote worker is required")
+        self.authkey = authkey or secrets.token_hex(16).encode()
+        self.listener = Listener(parse_address(bind), authkey=self.authkey)
+        self.address = self.listener.address
+        self.processes = [
+            subprocess.Popen([sys.executable, str(Path(__file__).resolve()), '--worker',
+                              f"{self.address[0]}:{self.address[1]}"],
+                             env={**os.environ, AUTHKEY_ENV: self.authkey.decode()})
+            for _ in range(n_local)
+        ]
+        self.workers = [self.listener.accept() for _ in range(n_local + remote_workers)]
+        self.owner = {}  # partition key -> worker connection
+
+    def run(self, requests):
+        """
+        Send (key, message) requests, one outstanding per worker at a time
+
+        Returns:
+            dict: key → reply payload
+
+        Raises:
+            RuntimeError: a worker reported an error or disconnected
+        """
+        queues = {id(conn): [] for conn in self.workers}
+        for key, message in requests:
+            queues[id(self.owner[key])].append(message)
+        replies, busy = {}, []
+        for conn in self.workers:
+            if queues[id(conn)]:
+                conn.send(queues[id(conn)].pop(0))
+                busy.append(conn)
+        while busy:
+            for conn in wait(busy):
+                try:
+                    status, key, payload = conn.recv()
+                except (EOFError, OSError):
+                    raise RuntimeError("a worker disconnected before replying") from None
+                if status == 'error':
+                    raise RuntimeError(f"worker failed on partition {key}: {payload}")
+                replies[key] = payload
+                if queues[id(conn)]:
+                    conn.send(queues[id(conn)].pop(0))
+                else:
+                    busy.remove(conn)
+        return replies
+
+    def load(self, partitions, n_items):
+        """Assign partitions to workers round-robin and ship them once"""
+        for i, key in enumerate(partitions):
+            self.owner[key] = self.workers[i % len(self.workers)]
+        self.run([(key, ('load', key, n_items, baskets)) for key, baskets in partitions.items()])
+
+    def close(self):
+        """Stop every worker, even ones that already died, and reap the local processes"""
+        for conn in self.workers:
+            try:
+                conn.send(('stop',))
+            except OSError:
+                pass
+            conn.close()
+        for process in self.processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        self.listener.close()
+
+
+def mine_son(coordinator, baskets, n_partitions, min_support=MIN_SUPPORT, min_confidence=MIN_CONFIDENCE):
+    """
+    SON mining of every segment through the coordinator's workers
+
+    Returns:
+        tuple (rules, stats): rules with a time_segment column and one stats
+        row per segment (baskets, candidates, frequent itemsets, rules)
+    """
+    baskets = baskets[baskets['items'].apply(len) > 1].reset_index(drop=True)
+    codes, vocabulary = encode_items(baskets['items'])
+    names = np.asarray(vocabulary, dtype=object)
+
+    segments = {}
+    partitions = {}
+    for segment, rows in baskets.groupby('time_segment', sort=True).groups.items():
+        if len(rows) < MIN_SEGMENT_BASKETS:
+            continue
+        segments[segment] = len(rows)
+        for p, chunk in enumerate(np.array_split(np.asarray(rows), n_partitions)):
+            if len(chunk):
+                partitions[(segment, p)] = [codes[i] for i in chunk]
+    coordinator.load(partitions, len(vocabulary))
+
+    # Phase 1: locally frequent itemsets (a hair below the threshold so float
+    # rounding can never drop a globally frequent itemset)
+    local = coordinator.run([(key, ('local', key, min_support * (1 - 1e-9))) for key in partitions])
+    candidates = {segment: sorted({i for key, found in local.items() if key[0] == segment for i in found},
+                                  key=lambda i: (len(i), i))
+                  for segment in segments}
+
+    # Phase 2: exact global counts of every candidate
+    counted = coordinator.run([(key, ('count', key, candidates[key[0]])) for key in partitions])
+
+    all_rules, stats = [], []
+    for segment, n_baskets in segments.items():
+        totals = sum(counts for key, counts in counted.items() if key[0] == segment)
+        support = np.asarray(totals, dtype=float) / n_baskets
+        keep = support >= min_support
+        itemsets = pd.DataFrame({
+            'support': support[keep],
+            'itemsets': [frozenset(names[list(c)]) for c, k in zip(candidates[segment], keep) if k],
+        })
+        row = {'time_segment': segment, 'baskets': n_baskets, 'candidates': len(candidates[segment]),
+               'frequent_itemsets': len(itemsets), 'rules': 0}
+        if len(itemsets) and itemsets['itemsets'].apply(len).max() >= 2:
+            rules = association_rules(itemsets, metric="confidence", min_threshold=min_confidence)
+            if len(rules):
+                rules['time_segment'] = segment
+                all_rules.append(rules)
+                row['rules'] = len(rules)
+        stats.append(row)
+
+    rules = pd.concat(all_rules, ignore_index=True) if all_rules else pd.DataFrame(
+        columns=['antecedents', 'consequents', 'support', 'confidence', 'lift', 'time_segment'])
+    return rules, pd.DataFrame(stats)
+
+
+def single_node_rules(baskets, min_support, min_confidence):
+    """Reference result: apriori on every whole segment"""
+    from basket_mining import encode_baskets
+    all_rules = []
+    for segment, items in baskets.groupby('time_segment', sort=True)['items']:
+        multi_item = [t for t in items if len(t) > 1]
+        if len(multi_item) < MIN_SEGMENT_BASKETS:
+            continue
+        itemsets = apriori(encode_baskets(multi_item), min_support=min_support, use_colnames=True)
+        if len(itemsets) == 0:
+            continue
+        rules = association_rules(itemsets, metric="confidence", min_threshold=min_confidence)
+        rules['time_segment'] = segment
+        all_rules.append(rules)
+    return pd.concat(all_rules, ignore_index=True) if all_rules else pd.DataFrame(
+        columns=['antecedents', 'consequents', 'support', 'confidence', 'lift', 'time_segment'])
+
+
+def _rule_keys(rules):
+    return sorted(zip(rules['time_segment'], rules['antecedents'].apply(lambda x: tuple(sorted(x))),
+                      rules['consequents'].apply(lambda x: tuple(sorted(x))),
+                      np.round(rules['support'].astype(float), 12),
+                      np.round(rules['confidence'].astype(float), 12)))
+
+
+def main(argv=None):
+    """Command-line entry point (coordinator, or worker with --worker)"""
+    parser = argparse.ArgumentParser(description="Two-phase partitioned (SON) association rule mining")
+    parser.add_argument('results_dir', type=Path, nargs='?', help="analysis output directory containing rules.db")
+    parser.add_argument('--worker', metavar='HOST:PORT', help="run as a worker for the coordinator at HOST:PORT")
+    parser.add_argument('--authkey', help=f"shared secret (default: ${AUTHKEY_ENV}, or random for local-only runs)")
+    parser.add_argument('--bind', default=DEFAULT_BIND, help="coordinator listen address")
+    parser.add_argument('--local-workers', type=int, help="workers started on this machine (default: one per CPU)")
+    parser.add_argument('--remote-workers', type=int, default=0, help="workers expected to connect from elsewhere")
+    parser.add_argument('--partitions', type=int, help="partitions per segment (default: one per worker)")
+    parser.add_argument('--min-support', type=float, default=MIN_SUPPORT)
+    parser.add_argument('--min-confidence', type=float, default=MIN_CONFIDENCE)
+    parser.add_argument('--verify', action='store_true', help="compare against single-node apriori")
+    args = parser.parse_args(argv)
+
+    authkey = args.authkey or os.environ.get(AUTHKEY_ENV)
+    if args.worker:
+        if not authkey:
+            parser.error(f"--authkey or ${AUTHKEY_ENV} is required for a worker")
+        run_worker(parse_address(args.worker), authkey.encode())
+        return 0
+    if args.results_dir is None:
+        parser.error("results_dir is required for the coordinator")
+    if args.remote_workers and not authkey:
+        parser.error(f"--authkey or ${AUTHKEY_ENV} is required when remote workers join")
+    if (args.local_workers is not None and args.local_workers < 0) or args.remote_workers < 0:
+        parser.error("--local-workers and --remote-workers cannot be negative")
+    if args.local_workers == 0 and args.remote_workers == 0:
+        parser.error("at least one local or remote worker is required")
+    if args.partitions is not None and args.partitions < 1:
+        parser.error("--partitions must be at least 1")
+
+    db_file = args.results_dir / "rules.db"
+    if not db_file.exists():
+        print(f"❌ ERROR: {db_file} not found. Run the analysis script for this dataset first.")
+        return 1
+    baskets = load_baskets(db_file)
+
+    print("="*80)
+    print("SON MINING: partitioned two-phase mining")
+    print("="*80)
+
+    start = time.perf_counter()
+    coordinator = Coordinator(args.bind, authkey.encode() if authkey else None,
+                              args.local_workers, args.remote_workers)
+    try:
+        n_partitions = args.partitions if args.partitions is not None else len(coordinator.workers)
+        print(f"✓ Coordinator on {coordinator.address[0]}:{coordinator.address[1]} with "
+              f"{len(coordinator.workers)} workers, {n_partitions} partitions per segment")
+        rules, stats = mine_son(coordinator, baskets, n_partitions, args.min_support, args.min_confidence)
+    except RuntimeError as e:
+        print(f"❌ ERROR: {e}")
+        return 1
+    finally:
+        coordinator.close()
+    elapsed = time.perf_counter() - start
+    print(f"✓ Mined {len(stats)} segments in {elapsed:.2f}s ({len(rules):,} rules)")
+    print()
+    print(stats.to_string(index=False))
+    print()
+
+    rules_file = args.results_dir / "son_rules.csv"
+    export_rules(rules).to_csv(rules_file, index=False)
+    print(f"✓ Saved rules to: {rules_file}")
+
+    if args.verify:
+        reference = single_node_rules(baskets, args.min_support, args.min_confidence)
+        if _rule_keys(reference) == _rule_keys(rules):
+            print(f"✓ Identical to single-node apriori ({len(reference):,} rules)")
+        else:
+            print(f"❌ Differs from single-node apriori ({len(reference):,} rules vs {len(rules):,})")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
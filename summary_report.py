@@ -0,0 +1,280 @@
+"""
+Single-Pass Rule Statistics and Text/JSON/HTML Summary Reports
+
+summarize_rules() computes every aggregate the summary reports use in one
+groupby over the exported rule frame: rules, mean confidence and lift, and
+maximum confidence per segment, significant rules, and the confidence
+buckets. The overall figures are then derived from the segment rows, and
+the top-N rules are picked with a single partial selection. No per-segment
+boolean masks are built.
+
+SummaryReport collects the report as a list of blocks (banners, text lines,
+labelled fields, segment statistics, top rules) and renders the same blocks
+as text, JSON or HTML:
+
+    summary = summarize_rules(export_rules, top_n=10)
+    document = SummaryReport("STATISTICAL SUMMARY", statistics=summary)
+    document.fields("OVERALL RESULTS", [("Total rules", summary['rules'], '{:,}')])
+    document.segments("RULES BY TIME SEGMENT", summary['segments'])
+    document.save(OUTPUT_DIR / "analysis_summary")   # .txt, .json and .html
+"""
+
+import html
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+RULE_WIDTH = 80
+TOP_N = 10
+SIGNIFICANCE_LEVEL = 0.05
+
+# (label, lower bound inclusive, upper bound exclusive)
+CONFIDENCE_BUCKETS = (
+    ('Very High (≥60%)', 0.6, np.inf),
+    ('High (50-59%)', 0.5, 0.6),
+    ('Moderate (40-49%)', 0.4, 0.5),
+)
+
+
+def _python(value):
+    """NumPy scalars → plain Python values for JSON"""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+def _to_python(value):
+    if isinstance(value, dict):
+        return {k: _to_python(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_to_python(v) for v in value]
+    return _python(value)
+
+
+def summarize_rules(rules, top_n=TOP_N, buckets=CONFIDENCE_BUCKETS):
+    """
+    All summary statistics of an exported rule frame in one grouped pass
+
+    Args:
+        rules: DataFrame with Time_Segment, Antecedent_Items,
+               Consequent_Items, Support, Confidence and Lift (and optionally
+               Adjusted_P_Value)
+        top_n: Number of highest-confidence rules to keep
+
+    Returns:
+        dict with overall figures, 'segments' (one dict per segment, sorted
+        by name), 'confidence_buckets' and 'top_rules'
+    """
+    confidence = rules['Confidence'].to_numpy(dtype=np.float64)
+    columns = {
+        'segment': rules['Time_Segment'].to_numpy(),
+        'confidence': confidence,
+        'lift': rules['Lift'].to_numpy(dtype=np.float64),
+    }
+    has_p = 'Adjusted_P_Value' in rules.columns
+    if has_p:
+        columns['significant'] = rules['Adjusted_P_Value'].to_numpy(dtype=np.float64) <= SIGNIFICANCE_LEVEL
+    for i, (_, low, high) in enumerate(buckets):
+        columns[f'bucket_{i}'] = (confidence >= low) & (confidence < high)
+    frame = pd.DataFrame(columns)
+
+    aggregations = {
+        'rules': ('confidence', 'size'),
+        'confidence_sum': ('confidence', 'sum'),
+        'lift_sum': ('lift', 'sum'),
+        'max_confidence': ('confidence', 'max'),
+        **{f'bucket_{i}': (f'bucket_{i}', 'sum') for i in range(len(buckets))},
+    }
+    if has_p:
+        aggregations['significant'] = ('significant', 'sum')
+    grouped = frame.groupby('segment', sort=True).agg(**aggregations)
+
+    segments = []
+    for segment, row in grouped.iterrows():
+        segments.append({
+            'segment': segment,
+            'rules': int(row['rules']),
+            'mean_confidence': row['confidence_sum'] / row['rules'],
+            'mean_lift': row['lift_sum'] / row['rules'],
+            'max_confidence': row['max_confidence'],
+            'significant_rules': int(row['significant']) if has_p else None,
+        })
+
+    n_rules = int(grouped['rules'].sum())
+    top = rules.nlargest(top_n, 'Confidence')
+    summary = {
+        'rules': n_rules,
+        'segments_analyzed': len(grouped),
+        'mean_confidence': grouped['confidence_sum'].sum() / n_rules if n_rules else 0.0,
+        'mean_lift': grouped['lift_sum'].sum() / n_rules if n_rules else 0.0,
+        'max_confidence': grouped['max_confidence'].max() if n_rules else 0.0,
+        'significant_rules': int(grouped['significant'].sum()) if has_p else None,
+        'segments': segments,
+        'confidence_buckets': [
+            {'label': label, 'min': low, 'max': high, 'rules': int(grouped[f'bucket_{i}'].sum())}
+            for i, (label, low, high) in enumerate(buckets)
+        ],
+        'top_rules': [
+            {'segment': s, 'antecedents': a, 'consequents': c, 'support': sup, 'confidence': conf, 'lift': lift}
+            for s, a, c, sup, conf, lift in zip(top['Time_Segment'], top['Antecedent_Items'],
+                                                top['Consequent_Items'], top['Support'],
+                                                top['Confidence'], top['Lift'])
+        ],
+    }
+    return _to_python(summary)
+
+
+def segment_lookup(summary):
+    """{segment: segment statistics} of a summarize_rules result"""
+    return {s['segment']: s for s in summary['segments']}
+
+
+class SummaryReport:
+    """A report as a list of blocks, rendered to text, JSON or HTML"""
+
+    def __init__(self, title, statistics=None):
+        self.title = title
+        self.statistics = _to_python(statistics)
+        self.blocks = []
+
+    def banner(self, title):
+        """Section title between two full-width rules"""
+        self.blocks.append({'type': 'banner', 'title': title})
+
+    def lines(self, lines):
+        """Free text, one entry per line"""
+        self.blocks.append({'type': 'lines', 'lines': list(lines)})
+
+    def fields(self, heading, items):
+        """
+        Labelled values under a heading
+
+        Args:
+            items: (label, value) or (label, value, format) tuples; a plain
+                   string is kept as a verbatim line
+        """
+        entries = []
+        for item in items:
+            if isinstance(item, str):
+                entries.append({'text': item})
+            else:
+                label, value, fmt = (*item, None)[:3]
+                entries.append({'label': label, 'value': _python(value),
+                                'display': fmt.format(value) if fmt else str(value)})
+        self.blocks.append({'type': 'fields', 'heading': heading, 'items': entries})
+
+    def segments(self, heading, segments):
+        """Per-segment rule statistics (summarize_rules()['segments'])"""
+        self.blocks.append({'type': 'segments', 'heading': heading, 'segments': segments})
+
+    def top_rules(self, heading, rules):
+        """Numbered rule list (summarize_rules()['top_rules'])"""
+        self.blocks.append({'type': 'top_rules', 'heading': heading, 'rules': rules})
+
+    def rule(self):
+        """Closing full-width rule"""
+        self.blocks.append({'type': 'rule'})
+
+    # ------------------------------------------------------------------------
+    # Rendering
+    # ------------------------------------------------------------------------
+
+    def to_text(self):
+        out = ["=" * RULE_WIDTH, self.title, "=" * RULE_WIDTH, ""]
+        for block in self.blocks:
+            kind = block['type']
+            if kind == 'banner':
+                out += ["=" * RULE_WIDTH, block['title'], "=" * RULE_WIDTH, ""]
+            elif kind == 'rule':
+                out.append("=" * RULE_WIDTH)
+            elif kind == 'lines':
+                out += block['lines'] + [""]
+            elif kind == 'fields':
+                out.append(f"{block['heading']}:")
+                for item in block['items']:
+                    out.append(item['text'] if 'text' in item else f"  - {item['label']}: {item['display']}")
+                out.append("")
+            elif kind == 'segments':
+                out.append(f"{block['heading']}:")
+                for s in block['segments']:
+                    out += [f"  - {s['segment']}:",
+                            f"      Rules found: {s['rules']}",
+                            f"      Avg confidence: {s['mean_confidence']:.3f}",
+                            f"      Avg lift: {s['mean_lift']:.3f}",
+                            f"      Max confidence: {s['max_confidence']:.3f}"]
+                out.append("")
+            elif kind == 'top_rules':
+                out.append(f"{block['heading']}:")
+                for i, r in enumerate(block['rules'], 1):
+                    out += ["", f"{i}. [{r['segment']}]",
+                            f"   {r['antecedents']} → {r['consequents']}",
+                            f"   Confidence: {r['confidence']:.3f} | Support: {r['support']:.3f} | "
+                            f"Lift: {r['lift']:.3f}"]
+                out.append("")
+        return "\n".join(out)
+
+    def to_dict(self):
+        return {'title': self.title, 'blocks': self.blocks, 'statistics': self.statistics}
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2, ensure_ascii=False)
+
+    def to_html(self):
+        e = html.escape
+        out = ["<!DOCTYPE html>", "<html><head><meta charset=\"utf-8\">", f"<title>{e(self.title)}</title>",
+               "<style>body{font-family:sans-serif;max-width:60em;margin:2em auto}"
+               "table{border-collapse:collapse}td,th{border:1px solid #ccc;padding:.2em .6em;text-align:right}"
+               "td:first-child,th:first-child{text-align:left}pre{white-space:pre-wrap}</style>",
+               "</head><body>", f"<h1>{e(self.title)}</h1>"]
+        for block in self.blocks:
+            kind = block['type']
+            if kind == 'banner':
+                out.append(f"<h2>{e(block['title'])}</h2>")
+            elif kind == 'rule':
+                out.append("<hr>")
+            elif kind == 'lines':
+                out.append(f"<pre>{e(chr(10).join(block['lines']))}</pre>")
+            elif kind == 'fields':
+                out.append(f"<h3>{e(block['heading'])}</h3><ul>")
+                for item in block['items']:
+                    text = (e(item['text'].strip()) if 'text' in item
+                            else f"<b>{e(item['label'])}</b>: {e(item['display'])}")
+                    out.append(f"<li>{text}</li>")
+                out.append("</ul>")
+            elif kind == 'segments':
+                out.append(f"<h3>{e(block['heading'])}</h3><table><tr><th>Segment</th><th>Rules</th>"
+                           "<th>Avg confidence</th><th>Avg lift</th><th>Max confidence</th></tr>")
+                for s in block['segments']:
+                    out.append(f"<tr><td>{e(s['segment'])}</td><td>{s['rules']:,}</td>"
+                               f"<td>{s['mean_confidence']:.3f}</td><td>{s['mean_lift']:.3f}</td>"
+                               f"<td>{s['max_confidence']:.3f}</td></tr>")
+                out.append("</table>")
+            elif kind == 'top_rules':
+                out.append(f"<h3>{e(block['heading'])}</h3><table><tr><th>Rule</th><th>Segment</th>"
+                           "<th>Confidence</th><th>Support</th><th>Lift</th></tr>")
+                for r in block['rules']:
+                    out.append(f"<tr><td>{e(r['antecedents'])} → {e(r['consequents'])}</td>"
+                               f"<td>{e(r['segment'])}</td><td>{r['confidence']:.3f}</td>"
+                               f"<td>{r['support']:.3f}</td><td>{r['lift']:.3f}</td></tr>")
+                out.append("</table>")
+        out.append("</body></html>")
+        return "\n".join(out)
+
+    def save(self, stem):
+        """
+        Write <stem>.txt, <stem>.json and <stem>.html
+
+        Returns:
+            dict: format → written path
+        """
+        stem = Path(stem)
+        paths = {'text': stem.with_suffix('.txt'), 'json': stem.with_suffix('.json'),
+                 'html': stem.with_suffix('.html')}
+        paths['text'].write_text(self.to_text(), encoding='utf-8')
+        paths['json'].write_text(self.to_json(), encoding='utf-8')
+        paths['html'].write_text(self.to_html(), encoding='utf-8')
+        return paths
@@ -0,0 +1,252 @@
+"""
+Rule-Driven Monte Carlo Surplus Simulator
+
+Estimates the waste and stock-outs an order policy would produce. For every
+time segment, daily basket streams are sampled from the item frequencies and
+the mined rules of an analysis run:
+
+    baskets per day     Poisson with the segment's observed mean
+                        (segment_volume.csv)
+    item occurrences    items are drawn in order of frequency; an item that is
+                        the consequent of a mined single-item rule A → B (A
+                        drawn earlier) is drawn conditionally on A:
+                        Binomial(count_A, P(B|A)) + Binomial(N - count_A, P(B|not A))
+                        otherwise Binomial(N, P(B))
+
+The probabilities come from the stored baskets in rules.db, so every item
+keeps its observed frequency while rule pairs keep their co-occurrence. All
+draws are batched NumPy calls over the simulated days. The loop runs over
+items, never over baskets or days.
+
+An order policy fixes the daily order per segment and item. Unsold stock is
+wasted at the end of the segment (fresh food). Policies:
+
+    mean    expected demand, rounded up
+    pNN     NN-th percentile of demand, taken from an independent
+            calibration run (e.g. p90 = 90% chance of not running out)
+
+Outputs (in the results directory):
+    surplus_simulation.csv   waste, lost sales and stock-out rates per policy and segment
+    surplus_orders.csv       daily order per policy, segment and item
+
+Demand is counted in basket occurrences of an item (a product ordered twice
+in one receipt counts once).
+
+Usage:
+    python3 surplus_simulator.py apriori_results
+    python3 surplus_simulator.py apriori_results_new --days 20000 --policies mean p80 p90 p95
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from basket_mining import encode_baskets
+from rule_database import load_baskets, rules_from_csv
+
+DEFAULT_DAYS = 10_000
+DEFAULT_POLICIES = ['mean', 'p80', 'p90', 'p95']
+
+
+def segment_model(items, rules, baskets_per_day):
+    """
+    Sampling model of one segment
+
+    Args:
+        items: List of baskets (lists of product names) observed in the segment
+        rules: Rules of the segment with frozenset antecedents/consequents
+        baskets_per_day: Mean baskets per day
+
+    Returns:
+        dict with 'items' (names in draw order), 'p' (basket frequency),
+        'parent' (index of the conditioning item or -1), 'p_given' and
+        'p_given_not' (P(item | parent) and P(item | no parent)) and 'rate'
+    """
+    encoded = encode_baskets(items)
+    X = encoded.to_numpy(dtype=np.float64)
+    n_baskets = X.shape[0]
+    p = X.mean(axis=0)
+    joint = (X.T @ X) / n_baskets
+
+    # Frequent items first; a parent must be drawn before its child
+    order = np.argsort(-p, kind='stable')
+    p, joint = p[order], joint[np.ix_(order, order)]
+    names = encoded.columns[order]
+    position = {name: i for i, name in enumerate(names)}
+
+    parent = np.full(len(names), -1)
+    best_lift = np.ones(len(names))
+    single = rules[(rules['antecedents'].apply(len) == 1) & (rules['consequents'].apply(len) == 1)]
+    for antecedent, consequent in zip(single['antecedents'], single['consequents']):
+        a = position.get(next(iter(antecedent)))
+        b = position.get(next(iter(consequent)))
+        if a is None or b is None or a >= b:
+            continue
+        lift = joint[a, b] / (p[a] * p[b])
+        if lift > best_lift[b]:
+            parent[b], best_lift[b] = a, lift
+
+    has_parent = parent >= 0
+    pa = np.where(has_parent, p[np.maximum(parent, 0)], 0.0)
+    pab = np.where(has_parent, joint[np.maximum(parent, 0), np.arange(len(names))], 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        p_given = np.where(has_parent, pab / pa, p)
+        p_given_not = np.where(has_parent & (pa < 1), (p - pab) / (1 - pa), p)
+    return {
+        'items': list(names),
+        'p': p,
+        'parent': parent,
+        'p_given': np.clip(p_given, 0, 1),
+        'p_given_not': np.clip(p_given_not, 0, 1),
+        'rate': baskets_per_day,
+    }
+
+
+def simulate_demand(model, n_days, rng):
+    """
+    Daily item demand of a segment
+
+    Returns:
+        n_days × n_items integer array of basket occurrences per item
+    """
+    n_baskets = rng.poisson(model['rate'], size=n_days)
+    demand = np.empty((n_days, len(model['items'])), dtype=np.int64)
+    for j, parent in enumerate(model['parent']):
+        if parent < 0:
+            demand[:, j] = rng.binomial(n_baskets, model['p'][j])
+        else:
+            with_parent = demand[:, parent]
+            demand[:, j] = (rng.binomial(with_parent, model['p_given'][j])
+                            + rng.binomial(n_baskets - with_parent, model['p_given_not'][j]))
+    return demand
+
+
+def order_quantities(policy, model, calibration):
+    """Daily order per item under a policy ('mean' or 'pNN')"""
+    if policy == 'mean':
+        return np.ceil(model['rate'] * model['p']).astype(np.int64)
+    if policy.startswith('p') and policy[1:].isdigit():
+        level = int(policy[1:]) / 100
+        return np.quantile(calibration, level, axis=0, method='higher').astype(np.int64)
+    raise ValueError(f"Unknown order policy '{policy}' (use 'mean' or e.g. 'p90')")
+
+
+def evaluate_policy(orders, demand):
+    """Waste, lost sales and stock-out statistics of fixed daily orders"""
+    sold = np.minimum(demand, orders)
+    waste = orders - sold
+    lost = demand - sold
+    stockout = demand > orders
+    total_demand = demand.sum()
+    return {
+        'ordered_per_day': orders.sum(),
+        'demand_per_day': total_demand / len(demand),
+        'waste_per_day': waste.sum() / len(demand),
+        'waste_rate': waste.sum() / max(orders.sum() * len(demand), 1),
+        'lost_sales_per_day': lost.sum() / len(demand),
+        'fill_rate': sold.sum() / total_demand if total_demand else 1.0,
+        'item_stockout_rate': stockout.mean(),
+        'days_with_stockout': stockout.any(axis=1).mean(),
+    }
+
+
+def simulate(baskets, rules, volume, policies, n_days=DEFAULT_DAYS, seed=42):
+    """
+    Simulate every segment under every policy
+
+    Returns:
+        tuple (results, orders): per policy × segment statistics and the
+        order table
+    """
+    rng = np.random.default_rng(seed)
+    rates = volume.set_index('time_segment')['baskets_per_day']
+    results, orders_table = [], []
+    for segment, items in baskets.groupby('time_segment', sort=True)['items']:
+        if segment not in rates.index or rates[segment] <= 0:
+            continue
+        model = segment_model(list(items), rules[rules['time_segment'] == segment], rates[segment])
+        # Policies are calibrated and evaluated on independent streams
+        calibration = simulate_demand(model, n_days, rng)
+        demand = simulate_demand(model, n_days, rng)
+        for policy in policies:
+            orders = order_quantities(policy, model, calibration)
+            results.append({'policy': policy, 'time_segment': segment,
+                            'rule_linked_items': int((model['parent'] >= 0).sum()),
+                            **evaluate_policy(orders, demand)})
+            orders_table.append(pd.DataFrame({'policy': policy, 'time_segment': segment,
+                                              'product': model['items'],
+                                              'expected_demand': model['rate'] * model['p'],
+                                              'daily_order': orders}))
+    return pd.DataFrame(results), pd.concat(orders_table, ignore_index=True)
+
+
+def policy_totals(results):
+    """Per-policy totals over all segments"""
+    totals = results.groupby('policy', sort=False)[
+        ['ordered_per_day', 'demand_per_day', 'waste_per_day', 'lost_sales_per_day']].sum()
+    totals['waste_rate'] = totals['waste_per_day'] / totals['ordered_per_day']
+    totals['fill_rate'] = 1 - totals['lost_sales_per_day'] / totals['demand_per_day']
+    return totals
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Monte Carlo surplus simulation of order policies")
+    parser.add_argument('results_dir', type=Path,
+                        help="analysis output directory with rules.db, the rules CSV and segment_volume.csv")
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS, help="simulated days per segment")
+    parser.add_argument('--policies', nargs='+', default=DEFAULT_POLICIES)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    db_file = args.results_dir / "rules.db"
+    rules_file = args.results_dir / "association_rules_by_segment.csv"
+    volume_file = args.results_dir / "segment_volume.csv"
+    for required in (db_file, rules_file, volume_file):
+        if not required.exists():
+            print(f"❌ ERROR: {required} not found. Run the analysis script for this dataset first.")
+            return 1
+
+    print("="*80)
+    print(f"SURPLUS SIMULATION: {args.days:,} days per segment, policies {', '.join(args.policies)}")
+    print("="*80)
+
+    baskets = load_baskets(db_file)
+    rules = rules_from_csv(rules_file)
+    volume = pd.read_csv(volume_file)
+    print(f"✓ Loaded {len(baskets):,} baskets and {len(rules):,} rules")
+
+    start = time.perf_counter()
+    try:
+        results, orders = simulate(baskets, rules, volume, args.policies, args.days, args.seed)
+    except ValueError as e:
+        print(f"❌ ERROR: {e}")
+        return 1
+    elapsed = time.perf_counter() - start
+    print(f"✓ Simulated {results['time_segment'].nunique()} segments × {len(args.policies)} policies "
+          f"in {elapsed:.2f}s")
+    print()
+
+    results_file = args.results_dir / "surplus_simulation.csv"
+    results.to_csv(results_file, index=False)
+    orders_file = args.results_dir / "surplus_orders.csv"
+    orders.to_csv(orders_file, index=False)
+
+    print("Per policy (all segments, per day):")
+    print(f"  {'Policy':<8} {'Ordered':>9} {'Demand':>9} {'Waste':>9} {'Waste %':>8} {'Lost':>8} {'Fill %':>7}")
+    for policy, row in policy_totals(results).iterrows():
+        print(f"  {policy:<8} {row['ordered_per_day']:>9.1f} {row['demand_per_day']:>9.1f} "
+              f"{row['waste_per_day']:>9.1f} {row['waste_rate']*100:>7.1f}% "
+              f"{row['lost_sales_per_day']:>8.1f} {row['fill_rate']*100:>6.1f}%")
+    print()
+    print(f"✓ Saved per-segment results to: {results_file}")
+    print(f"✓ Saved order quantities to: {orders_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
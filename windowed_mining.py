@@ -0,0 +1,221 @@
+"""
+Sliding-Window Rule Mining over Time
+
+The analysis scripts mine the whole date range as one block, which averages
+seasonal items away. This script mines overlapping windows instead, e.g.
+4-week windows stepping one week at a time, for every time segment.
+
+Windows are not re-mined from scratch. The Apriori candidates of every
+window (itemset_counts.py) are counted once per week. Each window's counts
+are the previous window's plus the weeks entering it minus the weeks leaving
+it. Rules for each window are read off those counts at the usual support and
+confidence thresholds. Like the analysis scripts, only multi-item baskets
+are mined.
+
+It works from the baskets and basket days stored in <results>/rules.db, so
+run the analysis script once first.
+
+Outputs (in the results directory):
+    window_rules.csv     every rule of every window and segment
+    window_metrics.csv   per window and segment: baskets, itemsets, rules,
+                         mean confidence and lift (the metric time series),
+                         the largest frequent itemset and whether --max-len
+                         cut the counting short
+    window_metrics.png   those series over time
+
+Usage:
+    python3 windowed_mining.py apriori_results
+    python3 windowed_mining.py apriori_results_new --window-weeks 2 --step-weeks 1
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from itemset_counts import (MAX_LEN, basket_matrix, encode_items, export_rules, levelwise_counts,
+                            rules_from_counts)
+from rule_database import load_baskets
+
+WINDOW_WEEKS = 4
+STEP_WEEKS = 1
+MIN_SUPPORT = 0.02
+MIN_CONFIDENCE = 0.40
+MIN_SEGMENT_BASKETS = 10  # Same cut-off as the analysis scripts
+
+
+def week_numbers(days):
+    """Week index of each day, counted from the Monday of the first week"""
+    first_monday = days.min() - pd.Timedelta(days=days.min().dayofweek)
+    return ((days - first_monday).dt.days // 7).to_numpy()
+
+
+def window_starts(n_weeks, window_weeks, step_weeks):
+    """First week of every window that fits in n_weeks (at least one window)"""
+    return list(range(0, max(n_weeks - window_weeks, 0) + 1, step_weeks))
+
+
+def mine_windows(baskets, window_weeks=WINDOW_WEEKS, step_weeks=STEP_WEEKS,
+                 min_support=MIN_SUPPORT, min_confidence=MIN_CONFIDENCE, max_len=MAX_LEN):
+    """
+    Rules and metrics of every window and segment from incremental counts
+
+    Args:
+        baskets: DataFrame with time_segment, day and items (load_baskets)
+
+    Returns:
+        tuple (rules, metrics): rules with window_start, window_end and
+        time_segment columns; one metrics row per window and segment
+    """
+    baskets = baskets[baskets['items'].apply(len) > 1].reset_index(drop=True)
+    codes, vocabulary = encode_items(baskets['items'])
+    X = basket_matrix(codes, len(vocabulary))
+    weeks = week_numbers(baskets['day'])
+    first_monday = baskets['day'].min() - pd.Timedelta(days=baskets['day'].min().dayofweek)
+    n_weeks = int(weeks.max()) + 1
+    starts = window_starts(n_weeks, window_weeks, step_weeks)
+    # Window × week membership: each window's counts are the sum of its weeks'
+    windows = np.array([[start <= w < start + window_weeks for w in range(n_weeks)] for start in starts],
+                       dtype=np.int64)
+
+    all_rules, metrics = [], []
+    for segment in sorted(baskets['time_segment'].unique()):
+        in_segment = (baskets['time_segment'] == segment).to_numpy()
+        week_sizes = np.bincount(weeks[in_segment], minlength=n_weeks)
+        window_sizes = windows @ week_sizes
+        # Windows too small to mine set no threshold, so they add no candidates
+        min_counts = np.where(window_sizes >= MIN_SEGMENT_BASKETS, min_support * window_sizes, np.inf)
+        # Count each week once; windows only add and subtract whole weeks
+        itemsets, week_counts, capped = levelwise_counts(X[in_segment], min_counts, weeks[in_segment],
+                                                         windows, max_len)
+
+        window = week_counts[:window_weeks].sum(axis=0)
+        n_baskets = int(week_sizes[:window_weeks].sum())
+        previous = 0
+        for start in starts:
+            for w in range(previous, start):
+                window -= week_counts[w]
+                n_baskets -= int(week_sizes[w])
+                entering = w + window_weeks
+                if entering < n_weeks:
+                    window += week_counts[entering]
+                    n_baskets += int(week_sizes[entering])
+            previous = start
+
+            window_start = first_monday + pd.Timedelta(weeks=start)
+            window_end = window_start + pd.Timedelta(weeks=window_weeks) - pd.Timedelta(days=1)
+            row = {'window_start': window_start.date(), 'window_end': window_end.date(),
+                   'time_segment': segment, 'baskets': n_baskets,
+                   'frequent_itemsets': 0, 'rules': 0, 'mean_confidence': np.nan, 'mean_lift': np.nan,
+                   'largest_itemset': 0, 'capped': capped}
+            if n_baskets >= MIN_SEGMENT_BASKETS:
+                frequent, rules = rules_from_counts(dict(zip(itemsets, window.tolist())), n_baskets,
+                                                    min_support, min_confidence, vocabulary)
+                row['frequent_itemsets'] = len(frequent)
+                row['largest_itemset'] = int(frequent['itemsets'].apply(len).max()) if len(frequent) else 0
+                if len(rules):
+                    row.update(rules=len(rules), mean_confidence=rules['confidence'].mean(),
+                               mean_lift=rules['lift'].mean())
+                    rules.insert(0, 'time_segment', segment)
+                    rules.insert(0, 'window_end', row['window_end'])
+                    rules.insert(0, 'window_start', row['window_start'])
+                    all_rules.append(rules)
+            metrics.append(row)
+
+    rules = pd.concat(all_rules, ignore_index=True) if all_rules else pd.DataFrame(
+        columns=['window_start', 'window_end', 'time_segment', 'antecedents', 'consequents',
+                 'support', 'confidence', 'lift'])
+    return rules, pd.DataFrame(metrics)
+
+
+def export_window_rules(rules):
+    """Window rules in the exported CSV layout, with the window columns first"""
+    exported = export_rules(rules)
+    exported.insert(0, 'Window_End', rules['window_end'].to_numpy())
+    exported.insert(0, 'Window_Start', rules['window_start'].to_numpy())
+    return exported
+
+
+def plot_window_metrics(metrics, output_file):
+    """Rules and mean lift per segment across windows"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from figure_rendering import save_figure
+
+    fig, axes = plt.subplots(2, 1, figsize=(12, 8), sharex=True)
+    for segment, series in metrics.groupby('time_segment'):
+        x = pd.to_datetime(series['window_start'])
+        axes[0].plot(x, series['rules'], marker='o', label=segment)
+        axes[1].plot(x, series['mean_lift'], marker='o', label=segment)
+    axes[0].set_ylabel('Rules', fontsize=11, fontweight='bold')
+    axes[1].set_ylabel('Mean Lift', fontsize=11, fontweight='bold')
+    axes[1].set_xlabel('Window Start', fontsize=11, fontweight='bold')
+    axes[0].set_title('Association Rules per Sliding Window', fontsize=14, fontweight='bold')
+    axes[0].legend(fontsize=9, ncol=2)
+    for ax in axes:
+        ax.grid(True, alpha=0.3)
+    save_figure(fig, output_file)
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Mine association rules over sliding time windows")
+    parser.add_argument('results_dir', type=Path, help="analysis output directory containing rules.db")
+    parser.add_argument('--window-weeks', type=int, default=WINDOW_WEEKS)
+    parser.add_argument('--step-weeks', type=int, default=STEP_WEEKS)
+    parser.add_argument('--min-support', type=float, default=MIN_SUPPORT)
+    parser.add_argument('--min-confidence', type=float, default=MIN_CONFIDENCE)
+    parser.add_argument('--max-len', type=int, default=MAX_LEN,
+                        help="largest itemset size counted (default: every size that can be frequent)")
+    args = parser.parse_args(argv)
+
+    db_file = args.results_dir / "rules.db"
+    if not db_file.exists():
+        print(f"❌ ERROR: {db_file} not found. Run the analysis script for this dataset first.")
+        return 1
+    baskets = load_baskets(db_file)
+    if baskets['day'].isna().all():
+        print(f"❌ ERROR: {db_file} has no basket days. Re-run the analysis script to store them.")
+        return 1
+
+    print("="*80)
+    print(f"SLIDING-WINDOW MINING: {args.window_weeks}-week windows, step {args.step_weeks} week(s)")
+    print("="*80)
+    print(f"✓ Loaded {len(baskets):,} baskets from {baskets['day'].min().date()} "
+          f"to {baskets['day'].max().date()}")
+
+    start = time.perf_counter()
+    rules, metrics = mine_windows(baskets, args.window_weeks, args.step_weeks,
+                                  args.min_support, args.min_confidence, args.max_len)
+    elapsed = time.perf_counter() - start
+    n_windows = metrics['window_start'].nunique()
+    print(f"✓ Mined {n_windows} windows × {metrics['time_segment'].nunique()} segments "
+          f"in {elapsed:.2f}s ({len(rules):,} rules)")
+    if metrics['capped'].any():
+        print(f"⚠️  Itemsets capped at {args.max_len} items; longer itemsets have candidates in "
+              f"{metrics.loc[metrics['capped'], 'time_segment'].nunique()} segments, so longer rules are missing")
+    print()
+
+    rules_file = args.results_dir / "window_rules.csv"
+    export_window_rules(rules).to_csv(rules_file, index=False)
+    metrics_file = args.results_dir / "window_metrics.csv"
+    metrics.to_csv(metrics_file, index=False)
+
+    print("Rules per window:")
+    print(metrics.pivot(index='window_start', columns='time_segment', values='rules').to_string())
+    print()
+
+    plot_file = args.results_dir / "window_metrics.png"
+    plot_window_metrics(metrics, plot_file)
+    print(f"✓ Saved window rules to: {rules_file}")
+    print(f"✓ Saved metric time series to: {metrics_file}")
+    print(f"✓ Saved plot to: {plot_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
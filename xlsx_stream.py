@@ -0,0 +1,343 @@
+"""
+Row-Streaming Reader for the Dataset 1 Workbook
+
+pd.read_excel builds the whole workbook in memory (every column, every cell
+object) before returning a DataFrame. This reader opens the workbook with
+openpyxl's read-only mode, which parses the sheet XML row by row, and keeps
+only the columns the analysis needs:
+
+    transaction_date, transaction_time   combined into transaction_datetime
+    store_location, product_detail       basket key and items
+    transaction_qty                      demand forecast (Phase 8)
+    product_type, product_category       product hierarchy (hierarchy_mining.py)
+
+Rows are collected into chunks of `chunk_rows`. Excel serial dates (days
+since 1899-12-30) and serial times (fractions of a day) are converted one
+chunk at a time, so memory is bounded by the chunk size rather than by the
+sheet. An optional `convert` callable is applied to every chunk as well;
+dataset_loaders.py uses it to cast each chunk to its declared schema before
+the next one is read. concat_chunks() joins chunks whose categoricals have
+different categories without falling back to object strings.
+
+chunk_baskets() groups one chunk into baskets and merge_chunk_baskets()
+joins the per-chunk baskets. A basket whose lines straddle two chunks is
+merged at the end, so the result is the same as building baskets from the
+whole sheet. LineItemTotals keeps the per-chunk totals the rest of the
+analysis needs (segment counts, hierarchy, daily units), so
+apriori_analysis.py never holds the whole sheet. stream_baskets() keeps
+only the baskets.
+
+Usage:
+    python3 xlsx_stream.py
+    python3 xlsx_stream.py "Coffee Shop Sales Dashboard by Alfi Aziz.xlsx" --chunk-rows 20000
+    python3 xlsx_stream.py --compare     # check against pd.read_excel
+"""
+
+import argparse
+import datetime
+import sys
+import time
+import tracemalloc
+from itertools import chain
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from basket_mining import add_time_segments, build_baskets
+
+SHEET = "Transactions"
+COLUMNS = ('transaction_date', 'transaction_time', 'store_location', 'product_detail', 'transaction_qty',
+           'product_type', 'product_category')
+CHUNK_ROWS = 50_000
+EXCEL_EPOCH = '1899-12-30'
+
+
+def _is_number(value):
+    return isinstance(value, (int, float, np.number)) and not isinstance(value, bool)
+
+
+def excel_dates(values):
+    """Dates from a batch of cells: datetimes, Excel serial numbers or strings"""
+    values = pd.Series(values, dtype=object)
+    numeric = values.map(_is_number).to_numpy(dtype=bool)
+    dates = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+    if numeric.any():
+        dates[numeric] = pd.to_datetime(values[numeric].astype(float), unit='D', origin=EXCEL_EPOCH)
+    if (~numeric).any():
+        dates[~numeric] = pd.to_datetime(values[~numeric])
+    return dates.dt.normalize()
+
+
+def excel_times(values):
+    """Times of day from a batch of cells: times, datetimes, day fractions or strings"""
+    values = pd.Series(values, dtype=object)
+    numeric = values.map(_is_number).to_numpy(dtype=bool)
+    stamps = values.map(lambda v: isinstance(v, datetime.datetime)).to_numpy(dtype=bool)
+    times = pd.Series(pd.NaT, index=values.index, dtype='timedelta64[ns]')
+    if numeric.any():
+        times[numeric] = pd.to_timedelta(values[numeric].astype(float), unit='D')
+    if stamps.any():
+        moments = pd.to_datetime(values[stamps])
+        times[stamps] = moments - moments.dt.normalize()
+    text = ~(numeric | stamps)
+    if text.any():
+        times[text] = pd.to_timedelta(values[text].astype(str))
+    return times
+
+
+def iter_transaction_chunks(path, sheet=SHEET, columns=COLUMNS, chunk_rows=CHUNK_ROWS, convert=None):
+    """
+    Stream the sheet as DataFrames of at most chunk_rows rows
+
+    Args:
+        convert: Optional function applied to each converted chunk (e.g. a
+                 dtype cast) before it is yielded
+
+    Yields:
+        DataFrame with the requested columns; transaction_date (datetime64)
+        and transaction_time (timedelta64) are already converted, and
+        transaction_datetime is added when both are read
+    """
+    def finish(batch):
+        chunk = _convert_chunk(batch, columns)
+        return convert(chunk) if convert else chunk
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook[sheet].iter_rows(values_only=True)
+        header = next(rows)
+        missing = [c for c in columns if c not in header]
+        if missing:
+            raise KeyError(f"Sheet '{sheet}' has no column(s): {', '.join(missing)}")
+        positions = [header.index(c) for c in columns]
+
+        batch = []
+        for row in rows:
+            if row is None or all(v is None for v in row):
+                continue
+            batch.append([row[i] for i in positions])
+            if len(batch) == chunk_rows:
+                yield finish(batch)
+                batch = []
+        if batch:
+            yield finish(batch)
+    finally:
+        workbook.close()
+
+
+def _convert_chunk(batch, columns):
+    chunk = pd.DataFrame(batch, columns=list(columns))
+    if 'transaction_date' in chunk:
+        chunk['transaction_date'] = excel_dates(chunk['transaction_date'])
+    if 'transaction_time' in chunk:
+        chunk['transaction_time'] = excel_times(chunk['transaction_time'])
+    if 'transaction_date' in chunk and 'transaction_time' in chunk:
+        chunk['transaction_datetime'] = chunk['transaction_date'] + chunk['transaction_time']
+    if 'transaction_qty' in chunk:
+        chunk['transaction_qty'] = pd.to_numeric(chunk['transaction_qty'])
+    return chunk
+
+
+def concat_chunks(chunks, columns=COLUMNS):
+    """
+    One frame from streamed chunks
+
+    Categorical columns get the sorted union of every chunk's categories
+    first, so they stay categorical instead of becoming object strings.
+    """
+    chunks = list(chunks)
+    if not chunks:
+        return _convert_chunk([], columns)
+    for column in chunks[0].columns:
+        if isinstance(chunks[0][column].dtype, pd.CategoricalDtype):
+            categories = sorted(set().union(*(c[column].cat.categories for c in chunks)))
+            for chunk in chunks:
+                chunk[column] = chunk[column].cat.set_categories(categories)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def read_transactions(path, sheet=SHEET, columns=COLUMNS, chunk_rows=CHUNK_ROWS, convert=None):
+    """The needed columns of the whole sheet (streamed, then concatenated)"""
+    return concat_chunks(iter_transaction_chunks(path, sheet, columns, chunk_rows, convert), columns)
+
+
+def transaction_keys(chunk):
+    """Basket key: timestamp to the second plus store, as in apriori_analysis.py"""
+    return chunk['transaction_datetime'].dt.strftime('%Y-%m-%d %H:%M:%S') + '_' + chunk['store_location'].astype(str)
+
+
+def chunk_baskets(chunk):
+    """
+    Baskets of one chunk of line items
+
+    Segments (unless the chunk already has them) and keys are added to a
+    shallow copy, so the chunk itself keeps only its columns.
+    """
+    chunk = chunk.copy(deep=False)
+    if 'time_segment' not in chunk:
+        chunk = add_time_segments(chunk)
+    chunk['transaction_key'] = transaction_keys(chunk)
+    return build_baskets(chunk, 'transaction_key', 'product_detail',
+                         first_columns=('time_segment', 'transaction_datetime', 'store_location'))
+
+
+def merge_chunk_baskets(partial):
+    """
+    Join per-chunk baskets (chunk_baskets) into the baskets of the whole sheet
+
+    Returns:
+        DataFrame like build_baskets in apriori_analysis.py: transaction_key,
+        items, time_segment, datetime and store_location, sorted by key
+    """
+    partial = list(partial)
+    if not partial:
+        return pd.DataFrame(columns=['transaction_key', 'items', 'time_segment', 'datetime', 'store_location'])
+    baskets = pd.concat(partial, ignore_index=True)
+
+    # Baskets split across a chunk boundary: join their items in row order
+    split = baskets['transaction_key'].duplicated(keep=False)
+    if split.any():
+        grouped = baskets[split].groupby('transaction_key', sort=False)
+        merged = grouped.first()
+        merged['items'] = grouped['items'].agg(lambda lists: list(chain.from_iterable(lists)))
+        baskets = pd.concat([baskets[~split], merged.reset_index()], ignore_index=True)
+    baskets = baskets.sort_values('transaction_key', ignore_index=True)
+    return baskets.rename(columns={'transaction_datetime': 'datetime'})
+
+
+class LineItemTotals:
+    """
+    What the analysis needs from the line items besides their baskets
+
+    Each segmented chunk (add_time_segments) is folded in as it is streamed:
+    line counts, the datetime range, products, the first hierarchy row per
+    product, the days each segment was seen and the daily units per store,
+    segment and product. Memory is set by those totals (the demand forecast's
+    series × days), not by the number of line items.
+    """
+
+    def __init__(self, item_column='product_detail', qty_column='transaction_qty',
+                 store_column='store_location', hierarchy_columns=('product_type', 'product_category'),
+                 datetime_column='transaction_datetime'):
+        self.item_column = item_column
+        self.qty_column = qty_column
+        self.store_column = store_column
+        self.hierarchy_columns = list(hierarchy_columns)
+        self.datetime_column = datetime_column
+        self.rows = 0
+        self.skipped = 0
+        self.first = self.last = None
+        self.segment_items = pd.Series(dtype=np.int64)
+        self.products = set()
+        self._hierarchy, self._segment_days, self._daily = [], [], []
+
+    def add(self, chunk):
+        """Fold one chunk of segmented line items into the totals"""
+        item, dt = self.item_column, self.datetime_column
+        self.rows += len(chunk)
+        if chunk[dt].notna().any():
+            first, last = chunk[dt].min(), chunk[dt].max()
+            self.first = first if self.first is None else min(self.first, first)
+            self.last = last if self.last is None else max(self.last, last)
+        self.segment_items = self.segment_items.add(chunk['time_segment'].value_counts(), fill_value=0).astype(np.int64)
+        self.products.update(chunk[item].dropna().unique())
+        self._hierarchy.append(chunk[[item] + self.hierarchy_columns].drop_duplicates(item))
+        day = chunk[dt].dt.normalize()
+        self._segment_days.append(pd.DataFrame({'time_segment': chunk['time_segment'], dt: day})
+                                  .drop_duplicates())
+
+        # Daily units of the rows the forecast can use (same rule as demand_matrix)
+        keys = [self.store_column, 'time_segment', item]
+        valid = chunk[keys + [dt]].notna().all(axis=1)
+        self.skipped += int((~valid).sum())
+        daily = chunk.loc[valid, self.qty_column].groupby(
+            [chunk.loc[valid, k] for k in keys] + [day[valid]], observed=True).sum()
+        self._daily.append(daily.reset_index())
+
+    def hierarchy(self):
+        """Type and category of every product (first row seen), indexed by product"""
+        frame = concat_chunks(self._hierarchy, [self.item_column] + self.hierarchy_columns)
+        return frame.drop_duplicates(self.item_column).set_index(self.item_column)[self.hierarchy_columns]
+
+    def segment_days(self):
+        """One row per (time_segment, day) seen, for segment_volume"""
+        return concat_chunks(self._segment_days, ['time_segment', self.datetime_column]).drop_duplicates()
+
+    def daily_units(self):
+        """Daily units per store, segment and product, usable as forecast_demand's line items"""
+        return concat_chunks(self._daily, [self.store_column, 'time_segment', self.item_column,
+                                           self.datetime_column, self.qty_column])
+
+
+def stream_baskets(path, sheet=SHEET, chunk_rows=CHUNK_ROWS):
+    """Build transaction baskets chunk by chunk, keeping only the baskets"""
+    columns = ('transaction_date', 'transaction_time', 'store_location', 'product_detail')
+    return merge_chunk_baskets(chunk_baskets(chunk)
+                               for chunk in iter_transaction_chunks(path, sheet, columns, chunk_rows))
+
+
+def _default_dataset():
+    local = Path(__file__).parent / "Coffee Shop Sales Dashboard by Alfi Aziz.xlsx"
+    cached = (Path.home() / ".cache/kagglehub/datasets/alfiaziz003/coffee-shop-sales-dashboard-by-alfi-aziz"
+              "/versions/1/Coffee Shop Sales Dashboard by Alfi Aziz.xlsx")
+    return local if local.exists() else cached
+
+
+def _measure(function):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024**2
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Stream the Dataset 1 workbook into transaction baskets")
+    parser.add_argument('dataset', type=Path, nargs='?', default=None, help="workbook path")
+    parser.add_argument('--sheet', default=SHEET)
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help="rows per chunk")
+    parser.add_argument('--compare', action='store_true', help="also load with pd.read_excel and compare")
+    args = parser.parse_args(argv)
+
+    dataset = args.dataset or _default_dataset()
+    if not dataset.exists():
+        print(f"❌ ERROR: {dataset} not found.")
+        return 1
+
+    print("="*80)
+    print(f"STREAMING XLSX READER: {dataset.name} ({args.chunk_rows:,} rows per chunk)")
+    print("="*80)
+    baskets, elapsed, peak = _measure(lambda: stream_baskets(dataset, args.sheet, args.chunk_rows))
+    print(f"✓ Streamed {len(baskets):,} baskets in {elapsed:.2f}s (peak {peak:.1f} MB traced)")
+
+    if args.compare:
+        def load_full():
+            df = pd.read_excel(dataset, sheet_name=args.sheet)
+            df['transaction_datetime'] = (excel_dates(df['transaction_date'].astype(object))
+                                          + excel_times(df['transaction_time'].astype(object)))
+            df = add_time_segments(df)
+            df['transaction_key'] = transaction_keys(df)
+            return build_baskets(df, 'transaction_key', 'product_detail',
+                                 first_columns=('time_segment', 'transaction_datetime', 'store_location'))
+
+        full, full_elapsed, full_peak = _measure(load_full)
+        print(f"✓ pd.read_excel: {len(full):,} baskets in {full_elapsed:.2f}s (peak {full_peak:.1f} MB traced)")
+        full = full.rename(columns={'transaction_datetime': 'datetime'})
+        same = (len(full) == len(baskets)
+                and full['transaction_key'].tolist() == baskets['transaction_key'].tolist()
+                and full['items'].tolist() == baskets['items'].tolist()
+                and full['time_segment'].tolist() == baskets['time_segment'].tolist())
+        if not same:
+            print("❌ Streamed baskets differ from pd.read_excel")
+            return 1
+        print("✓ Streamed baskets match pd.read_excel")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())